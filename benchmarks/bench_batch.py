@@ -0,0 +1,46 @@
+"""
+Compare recording throughput with and without prov.batch(), on the default in-memory store and on the stores kleio
+ships. The default store's addN adds one triple at a time, so batching mostly pays off on stores with a bulk addN.
+
+    python benchmarks/bench_batch.py [entities]
+"""
+
+import sys
+import time
+
+from kleio import prov
+
+
+def record(n):
+    activity = prov.Activity("ex:activity")
+    for i in range(n):
+        entity = prov.Entity("ex:entity-%d" % i)
+        entity.set_was_generated_by(activity)
+        entity.set_was_derived_from(prov.Entity("ex:entity-%d" % (i // 2)))
+        activity.set_used(entity)
+
+
+def run(n, store, batched):
+    session = prov.ProvSession(store=store)
+    session.ns("ex", "http://example.org/")
+    with session:
+        start = time.perf_counter()
+        if batched:
+            with prov.batch():
+                record(n)
+        else:
+            record(n)
+        elapsed = time.perf_counter() - start
+    return len(session.ds), elapsed
+
+
+def main(n):
+    for store in ("default", "Compact", "SQLite"):
+        for batched in (False, True):
+            (triples, elapsed) = run(n, store, batched)
+            print("%-8s %-7s %8d triples  %6.2fs  %9.0f triples/s" % (store, "batch" if batched else "direct", triples,
+                                                                      elapsed, triples / elapsed))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
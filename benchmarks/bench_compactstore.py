@@ -0,0 +1,57 @@
+"""
+Compare the memory per triple and the lookup latency of the compact store with rdflib's default in-memory store.
+
+    python benchmarks/bench_compactstore.py [entities]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from kleio import prov
+
+
+def record(session, n):
+    with session:
+        bundle = prov.bundle("http://example.org/bundle")
+        activity = prov.Activity("http://example.org/activity")
+        for i in range(n):
+            entity = prov.Entity("http://example.org/entity-%d" % i, bundle=bundle if i % 4 == 0 else None)
+            entity.set_label("entity %d" % i)
+            entity.set_was_generated_by(activity)
+            entity.set_was_derived_from(prov.Entity("http://example.org/entity-%d" % (i // 2)))
+
+
+def look_up(session, n):
+    triples = session.ds.triples
+    nodes = [prov.URIRef("http://example.org/entity-%d" % (i * 7919 % n)) for i in range(n)]
+    start = time.perf_counter()
+    for node in nodes:
+        for _ in triples((node, prov.PROV.wasGeneratedBy, None)):
+            pass
+    by_subject = (time.perf_counter() - start) / n
+    start = time.perf_counter()
+    for node in nodes:
+        for _ in triples((None, prov.PROV.wasDerivedFrom, node)):
+            pass
+    by_object = (time.perf_counter() - start) / n
+    return by_subject, by_object
+
+
+def main(n):
+    for store in ("default", "Compact"):
+        gc.collect()
+        tracemalloc.start()
+        session = prov.ProvSession(store=store)
+        record(session, n)
+        gc.collect()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        (by_subject, by_object) = look_up(session, n)
+        print("%-8s %8d triples  %6.0f bytes/triple  s p ? %5.1f us  ? p o %5.1f us" % (
+            store, len(session.ds), memory / len(session.ds), by_subject * 1e6, by_object * 1e6))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
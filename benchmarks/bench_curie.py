@@ -0,0 +1,49 @@
+"""
+Time CURIE expansion with thousands of bound prefixes: the session's cached expansion against a linear scan of the
+namespace bindings for every id, as _absolutize used to do.
+
+    python benchmarks/bench_curie.py [prefixes] [lookups]
+"""
+
+import sys
+import time
+
+from kleio import prov
+
+
+def linear(session, uri):
+    (prefix, colon, reference) = uri.partition(":")
+    if colon:
+        for (p, namespace) in session.ds.namespace_manager.namespaces():
+            if p == prefix:
+                return namespace + reference
+    return uri
+
+
+def main(prefixes, lookups):
+    session = prov.ProvSession()
+    for i in range(prefixes):
+        session.ns("p%d" % i, "http://example.org/ns/%d#" % i)
+    ids = ["p%d:entity-%d" % (i % prefixes, i % 1000) for i in range(lookups)]
+    print("%d prefixes, %d lookups of %d distinct ids" % (prefixes, lookups, len(set(ids))))
+
+    start = time.perf_counter()
+    for uri in ids[:1000]:
+        linear(session, uri)
+    print("linear scan     %8.2f us/id" % ((time.perf_counter() - start) / 1000 * 1e6))
+
+    session.clear_prefix_cache()
+    start = time.perf_counter()
+    for uri in ids:
+        session.absolutize(uri)
+    print("absolutize      %8.2f us/id" % ((time.perf_counter() - start) / lookups * 1e6))
+
+    session.clear_prefix_cache()
+    start = time.perf_counter()
+    for i in range(lookups):
+        session.absolutize("p%d:fresh-%d" % (i % prefixes, i))
+    print("uncached ids    %8.2f us/id" % ((time.perf_counter() - start) / lookups * 1e6))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000, int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
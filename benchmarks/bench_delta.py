@@ -0,0 +1,48 @@
+"""
+Compare shipping a few thousand changes with export_delta() against serializing the whole dataset, and the cost of
+keeping the change log while recording.
+
+    python benchmarks/bench_delta.py [entities] [changed]
+"""
+
+import io
+import sys
+import time
+
+from kleio import prov
+
+
+def record(session, start, n):
+    with session:
+        activity = prov.Activity("http://example.org/activity")
+        for i in range(start, start + n):
+            entity = prov.Entity("http://example.org/entity-%d" % i)
+            entity.set_was_generated_by(activity)
+            entity.set(prov.RDFS.label, prov.Literal("entity %d" % i))
+
+
+def main(n, changed):
+    for logged in (False, True):
+        session = prov.ProvSession()
+        session.set_change_log(logged)
+        start = time.perf_counter()
+        record(session, 0, n)
+        print("record %d entities, change log %-3s  %6.2fs" % (n, "on" if logged else "off",
+                                                               time.perf_counter() - start))
+
+    checkpoint = session.checkpoint()
+    record(session, n, changed)
+    stream = io.BytesIO()
+    start = time.perf_counter()
+    session.export_delta(stream, checkpoint)
+    print("export_delta of %d changes        %6.3fs  %8d bytes" % (
+        session.checkpoint() - checkpoint, time.perf_counter() - start, len(stream.getvalue())))
+    stream = io.BytesIO()
+    start = time.perf_counter()
+    prov.serialize_to(stream, "nquads", session.ds)
+    print("serialize_to of %d triples      %6.3fs  %8d bytes" % (
+        len(session.ds), time.perf_counter() - start, len(stream.getvalue())))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000, int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
@@ -0,0 +1,61 @@
+"""
+Compare getting the provenance graph into NumPy edge arrays by serializing it to Turtle and parsing that again with
+export_edges() writing .npy or CSV, and the time to load the .npy arrays. Requires NumPy for loading.
+
+    python benchmarks/bench_edges.py [entities]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy
+from rdflib import Graph
+
+from kleio import prov
+
+
+def record(session, n):
+    with session:
+        for i in range(n):
+            activity = prov.Activity("http://example.org/activity-%d" % (i // 10))
+            entity = prov.Entity("http://example.org/entity-%d" % i)
+            entity.generation(activity)
+            if i:
+                entity.set_was_derived_from(prov.Entity("http://example.org/entity-%d" % (i // 2)))
+
+
+def main(n):
+    session = prov.ProvSession()
+    record(session, n)
+    directory = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        with session:
+            text = prov.serialize("turtle")
+        graph = Graph()
+        graph.parse(data=text, format="turtle")
+        ids = {}
+        edges = numpy.array([(ids.setdefault(s, len(ids)), ids.setdefault(o, len(ids)))
+                             for (s, p, o) in graph if p != prov.RDF.type and not isinstance(o, prov.Literal)])
+        print("%d triples: serialize, parse and intern   %6.2fs  %d edges" % (
+            len(session.ds), time.perf_counter() - start, len(edges)))
+        for format in ("npy", "csv"):
+            target = os.path.join(directory, format)
+            start = time.perf_counter()
+            (count, nodes) = session.export_edges(target, format=format)
+            print("export_edges(format=%s)                %6.2fs  %d edges, %d nodes, %d bytes" % (
+                format, time.perf_counter() - start, count, nodes,
+                sum(os.path.getsize(os.path.join(target, name)) for name in os.listdir(target))))
+        start = time.perf_counter()
+        for name in ("source", "relation", "target"):
+            numpy.load(os.path.join(directory, "npy", name + ".npy"))
+        print("numpy.load of the three id arrays      %6.3fs" % (time.perf_counter() - start))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,52 @@
+"""
+Compare serializing every bundle into one TriG document with export_bundles() writing one file per bundle, with one
+worker process and with one per CPU.
+
+    python benchmarks/bench_export.py [bundles] [entities per bundle]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from kleio import prov
+
+
+def record(session, bundles, n):
+    with session:
+        for b in range(bundles):
+            bundle = prov.bundle("http://example.org/run-%d" % b)
+            activity = prov.Activity("http://example.org/run-%d/activity" % b, bundle=bundle)
+            for i in range(n):
+                entity = prov.Entity("http://example.org/run-%d/entity-%d" % (b, i), bundle=bundle)
+                entity.set_was_generated_by(activity)
+                entity.set(prov.RDFS.label, prov.Literal("entity %d" % i))
+            prov.Bundle(bundle.identifier).set_was_generated_by(prov.Activity("http://example.org/pipeline"))
+
+
+def main(bundles, n):
+    session = prov.ProvSession()
+    record(session, bundles, n)
+    print("%d bundles, %d triples, %d CPUs" % (bundles, len(session.ds), os.cpu_count()))
+    start = time.perf_counter()
+    with session:
+        prov.serialize("trig", session.ds)
+    print("serialize(trig), one document      %6.2fs" % (time.perf_counter() - start))
+    for format in ("trig", "nquads"):
+        for workers in sorted(set((1, os.cpu_count()))):
+            directory = tempfile.mkdtemp()
+            try:
+                start = time.perf_counter()
+                timings = session.export_bundles(directory, format=format, workers=workers)
+                elapsed = time.perf_counter() - start
+            finally:
+                shutil.rmtree(directory)
+            seconds = sorted(seconds for (path, seconds) in timings.values())
+            print("export_bundles(%-6s), %d worker(s)  %6.2fs  per bundle median %.4fs, max %.4fs" % (
+                format, workers, elapsed, seconds[len(seconds) // 2], seconds[-1]))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000, int(sys.argv[2]) if len(sys.argv) > 2 else 20)
@@ -0,0 +1,67 @@
+"""
+Compare recording a provenance table row by row through Entity, Activity and Agent with ingest_table(), from Python
+lists, from NumPy arrays and from CSV, and into the Compact store, in rows per second.
+
+    python benchmarks/bench_ingest.py [rows]
+"""
+
+import csv
+import datetime
+import io
+import sys
+import time
+
+from kleio import prov
+
+START = datetime.datetime(2020, 1, 1)
+
+
+def table(n):
+    return {
+        "entity": ["http://example.org/entity-%d" % i for i in range(n)],
+        "activity": ["http://example.org/activity-%d" % (i // 10) for i in range(n)],
+        "agent": ["http://example.org/agent-%d" % (i % 7) for i in range(n)],
+        "used": ["http://example.org/input-%d" % (i // 100) for i in range(n)],
+        "generated_at": [START + datetime.timedelta(seconds=i) for i in range(n)]
+    }
+
+
+def row_by_row(session, columns):
+    with session:
+        for (e, a, g, u, t) in zip(*(columns[name] for name in ("entity", "activity", "agent", "used",
+                                                              "generated_at"))):
+            entity = prov.Entity(e)
+            activity = prov.Activity(a)
+            entity.generation(activity, datetime=t)
+            activity.usage(prov.Entity(u))
+            activity.association(prov.Agent(g))
+
+
+def main(n):
+    columns = table(n)
+    runs = [("row by row", lambda session: row_by_row(session, columns)),
+            ("ingest_table, lists", lambda session: session.ingest_table(columns))]
+    try:
+        import numpy
+        arrays = dict((name, numpy.array(values)) for (name, values) in columns.items())
+        arrays["generated_at"] = arrays["generated_at"].astype("datetime64[us]")
+        runs.append(("ingest_table, NumPy", lambda session: session.ingest_table(arrays)))
+    except ImportError:
+        pass
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(list(columns))
+    writer.writerows(zip(*(columns[name] for name in columns)))
+    runs.append(("ingest_table, CSV", lambda session: session.ingest_table(io.StringIO(text.getvalue()))))
+    runs.append(("ingest_table, Compact", lambda session: session.ingest_table(columns)))
+
+    for (label, run) in runs:
+        session = prov.ProvSession("Compact" if label.endswith("Compact") else "default")
+        start = time.perf_counter()
+        run(session)
+        elapsed = time.perf_counter() - start
+        print("%-22s %6.2fs  %8.0f rows/s  %d triples" % (label, elapsed, n / elapsed, len(session.ds)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
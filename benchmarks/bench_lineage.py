@@ -0,0 +1,50 @@
+"""
+Time prov.lineage() on a deep derivation chain and on a wide fan-out, against following get_was_derived_from() one
+hop at a time.
+
+    python benchmarks/bench_lineage.py [hops]
+"""
+
+import sys
+import time
+
+from kleio import prov
+
+
+def node(i):
+    return prov.URIRef("http://example.org/entity-%d" % i)
+
+
+def main(n):
+    session = prov.ProvSession()
+    with session:
+        graph = session.ds.default_context
+        graph.addN((node(i), prov.PROV.wasDerivedFrom, node(i - 1), graph) for i in range(1, n))
+        graph.addN((node(n), prov.PROV.wasDerivedFrom, node(n + i), graph) for i in range(1, n))
+        size = len(session.ds)
+
+        start = time.perf_counter()
+        count = sum(1 for _ in prov.lineage(node(n - 1)))
+        print("chain of %d hops, lineage up      %7.2fs" % (count, time.perf_counter() - start))
+        start = time.perf_counter()
+        count = sum(1 for _ in prov.lineage(node(0), "down"))
+        print("chain of %d hops, lineage down    %7.2fs" % (count, time.perf_counter() - start))
+        start = time.perf_counter()
+        count = sum(1 for _ in prov.lineage(node(n)))
+        print("fan-out of %d, lineage up         %7.2fs" % (count, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        entity = prov.Entity.wrap(node(n - 1))
+        hops = 0
+        while True:
+            sources = entity.get_was_derived_from()
+            if not sources:
+                break
+            entity = sources[0]
+            hops += 1
+        print("chain of %d hops, one getter per hop %5.2fs, %d triples written" % (
+            hops, time.perf_counter() - start, len(session.ds) - size))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,43 @@
+"""
+Time adding members to a large collection and answering member counts and membership tests from the member index.
+
+    python benchmarks/bench_members.py [members]
+"""
+
+import sys
+import time
+
+from kleio import prov
+
+
+def main(n):
+    session = prov.ProvSession()
+    with session:
+        collection = prov.Collection("http://example.org/collection")
+        start = time.perf_counter()
+        with prov.batch():
+            for i in range(n):
+                collection.set_had_member("http://example.org/member-%d" % i)
+        print("%d members added         %8.2fs" % (n, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        collection.get_member_count()
+        print("first get_member_count()  %8.2f ms (builds the index)" % ((time.perf_counter() - start) * 1e3))
+        start = time.perf_counter()
+        for _ in range(1000):
+            collection.get_member_count()
+        print("get_member_count()        %8.2f us" % ((time.perf_counter() - start) / 1000 * 1e6))
+        start = time.perf_counter()
+        for i in range(1000):
+            collection.has_member("http://example.org/member-%d" % (i * 7919 % n))
+        print("has_member()              %8.2f us" % ((time.perf_counter() - start) / 1000 * 1e6))
+        start = time.perf_counter()
+        collection.set_had_member("http://example.org/member-%d" % n)
+        print("set_had_member() indexed  %8.2f us" % ((time.perf_counter() - start) * 1e6))
+        start = time.perf_counter()
+        count = sum(1 for _ in collection.iter_members())
+        print("iter_members() of %d   %8.2fs" % (count, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,49 @@
+"""
+Record the same pipeline runs, plus a few of their own, in two sessions with blank node and with content-addressed
+influences, merge the two with ProvSession.merge(), and compare recording time, merge time and merged size.
+
+    python benchmarks/bench_merge.py [entities per session]
+"""
+
+import datetime
+import sys
+import time
+
+from kleio import prov
+
+START = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def record(session, n, offset):
+    entities = [prov.URIRef("http://example.org/entity-%d" % i) for i in range(offset, offset + n)]
+    activities = [prov.URIRef("http://example.org/activity-%d" % (i // 10)) for i in range(offset, offset + n)]
+    agent = prov.URIRef("http://example.org/agent")
+    times = [START + datetime.timedelta(seconds=i) for i in range(offset, offset + n)]
+    with session:
+        for (e, a, t) in zip(entities, activities, times):
+            activity = prov.Activity(a)
+            prov.Entity(e).generation(activity, datetime=t)
+            activity.association(prov.Agent(agent))
+
+
+def main(n):
+    print("%d entities per session, 90%% shared" % n)
+    for content_ids in (False, True):
+        sessions = []
+        start = time.perf_counter()
+        for offset in (0, n // 10):
+            session = prov.ProvSession()
+            session.set_content_ids(content_ids)
+            record(session, n, offset)
+            sessions.append(session)
+        recorded = time.perf_counter() - start
+        merged = prov.ProvSession()
+        start = time.perf_counter()
+        merged.merge(*sessions)
+        print("%-14s record %6.2fs  merge %6.2fs  %d + %d -> %d triples" % (
+            "content ids" if content_ids else "blank nodes", recorded, time.perf_counter() - start,
+            len(sessions[0].ds), len(sessions[1].ds), len(merged.ds)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
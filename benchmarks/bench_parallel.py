@@ -0,0 +1,58 @@
+"""
+Time prov.load_parallel() on a generated N-Quads file with 1, 2, 4, ... worker processes up to the core count and
+print the speed-up over a single worker and over rdflib's own N-Quads parser.
+
+    python benchmarks/bench_parallel.py [triples]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from kleio import parallel, prov
+
+
+def generate(path, n):
+    with open(path, "w") as stream:
+        for i in range(n // 4):
+            entity = "<http://example.org/entity/%d>" % i
+            graph = "<http://example.org/bundle/%d>" % (i % 16)
+            stream.write("%s <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> "
+                         "<http://www.w3.org/ns/prov#Entity> %s .\n" % (entity, graph))
+            stream.write('%s <http://www.w3.org/2000/01/rdf-schema#label> "entity %d"@en %s .\n' % (entity, i, graph))
+            stream.write("%s <http://www.w3.org/ns/prov#wasDerivedFrom> <http://example.org/entity/%d> %s .\n"
+                         % (entity, i // 2, graph))
+            stream.write('%s <http://www.w3.org/ns/prov#generatedAtTime> "2014-05-01T00:00:00"'
+                         '^^<http://www.w3.org/2001/XMLSchema#dateTime> %s .\n' % (entity, graph))
+
+
+def main(n):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "prov.nq")
+    generate(path, n)
+    cores = os.cpu_count() or 1
+    print("%d quads, %.1f MB, %d cores" % (n, os.path.getsize(path) / 1e6, cores))
+
+    start = time.time()
+    prov.ProvSession().ds.parse(path, format="nquads")
+    print("rdflib parse          %6.2fs" % (time.time() - start))
+
+    workers = 1
+    single = None
+    while True:
+        session = prov.ProvSession()
+        start = time.time()
+        parallel.load(path, session.ds, workers=workers, chunk_size=1 << 20)
+        elapsed = time.time() - start
+        single = single or elapsed
+        print("load_parallel x%-3d    %6.2fs  speed-up %.2f" % (workers, elapsed, single / elapsed))
+        if workers >= cores:
+            break
+        workers = min(workers * 2, cores)
+    os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,53 @@
+"""
+Compare saving and loading a binary snapshot with serializing and parsing the same dataset as N-Quads.
+
+    python benchmarks/bench_snapshot.py [entities]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from kleio import prov
+
+
+def record(session, n):
+    with session:
+        bundle = prov.bundle("ex:bundle")
+        for i in range(n):
+            entity = prov.Entity("ex:entity-%d" % i, bundle=bundle)
+            entity.set_label("entity %d" % i)
+            entity.set_was_derived_from(prov.Entity("ex:entity-%d" % (i // 2), bundle=bundle))
+
+
+def main(n):
+    directory = tempfile.mkdtemp()
+    snapshot = os.path.join(directory, "prov.snapshot")
+    nquads = os.path.join(directory, "prov.nq")
+    session = prov.ProvSession()
+    session.ns("ex", "http://example.org/")
+    record(session, n)
+    print("%d triples" % len(session.ds))
+
+    start = time.time()
+    session.save_snapshot(snapshot)
+    print("save snapshot   %6.2fs  %5.1f MB" % (time.time() - start, os.path.getsize(snapshot) / 1e6))
+    start = time.time()
+    with open(nquads, "wb") as stream:
+        prov.serialize_to(stream, "nquads", session.ds)
+    print("write nquads    %6.2fs  %5.1f MB" % (time.time() - start, os.path.getsize(nquads) / 1e6))
+
+    start = time.time()
+    prov.ProvSession().load_snapshot(snapshot)
+    print("load snapshot   %6.2fs" % (time.time() - start))
+    start = time.time()
+    prov.ProvSession().ds.parse(nquads, format="nquads")
+    print("parse nquads    %6.2fs" % (time.time() - start))
+    os.remove(snapshot)
+    os.remove(nquads)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
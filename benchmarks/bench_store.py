@@ -0,0 +1,51 @@
+"""
+Compare insert and lookup rates of the default in-memory store with the SQLite store on disk.
+
+    python benchmarks/bench_store.py [entities]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from kleio import prov
+
+
+def record(session, n):
+    with session, prov.batch():
+        activity = prov.Activity("ex:activity")
+        for i in range(n):
+            entity = prov.Entity("ex:entity-%d" % i)
+            entity.set_label("entity %d" % i)
+            entity.set_was_generated_by(activity)
+
+
+def look_up(session, n):
+    with session:
+        for i in range(n):
+            prov.Entity.wrap("ex:entity-%d" % (i * 7919 % n)).get_was_generated_by()
+
+
+def main(n):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "prov.db")
+    for (name, store, configuration) in (("memory", "default", None), ("SQLite", "SQLite", path)):
+        session = prov.ProvSession(store=store, configuration=configuration)
+        session.ns("ex", "http://example.org/")
+        start = time.perf_counter()
+        record(session, n)
+        session.commit()
+        inserted = time.perf_counter() - start
+        start = time.perf_counter()
+        look_up(session, n)
+        looked_up = time.perf_counter() - start
+        print("%-7s %8d triples  insert %9.0f triples/s  lookup %8.0f getters/s" % (
+            name, len(session.ds), len(session.ds) / inserted, n / looked_up))
+        session.ds.close()
+    os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,75 @@
+"""
+Time range, latest-N and as-of queries over prov:generatedAtTime with and without the temporal index on a recorded
+dataset, then feed the index itself events directly, without a store behind it, and query it.
+
+    python benchmarks/bench_temporal.py [recorded entities] [index-only events]
+"""
+
+import datetime
+import random
+import sys
+import time
+
+from kleio import prov
+
+START = datetime.datetime(2020, 1, 1)
+
+
+def record(session, n):
+    with session:
+        for i in range(n):
+            entity = prov.Entity("http://example.org/entity-%d" % i)
+            entity.set_generated_at_time(START + datetime.timedelta(seconds=i))
+
+
+def queries(session, n, step):
+    middle = START + n // 2 * step
+    timings = []
+    for query in (lambda: session.events_between(middle, middle + datetime.timedelta(hours=1)),
+                  lambda: session.latest_events(100),
+                  lambda: session.latest_events(100, before=middle),
+                  lambda: session.as_of(middle)):
+        start = time.perf_counter()
+        for (i, _) in enumerate(query()):
+            if i == 99:
+                break
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(n, events):
+    session = prov.ProvSession()
+    record(session, n)
+    print("%d entities       range 1h  latest 100  latest before  as-of (first 100)" % n)
+    for (label, indexed) in (("off", False), ("on, cold", True), ("on, warm", True)):
+        if indexed != session.using_temporal_index():
+            session.set_temporal_index(indexed)
+        timings = queries(session, n, datetime.timedelta(seconds=1))
+        print("index %-9s  %s" % (label, "  ".join("%8.4fs" % t for t in timings)))
+
+    session = prov.ProvSession()
+    session.set_temporal_index(True)
+    index = session.temporal_index
+    index.events(prov.PROV.generatedAtTime)
+    order = list(range(events))
+    random.seed(1)
+    for i in random.sample(range(events), events // 200):
+        j = random.randrange(events)
+        (order[i], order[j]) = (order[j], order[i])
+    nodes = [prov.URIRef("http://example.org/e%d" % i) for i in range(events)]
+    prop = prov.PROV.generatedAtTime
+    microsecond = datetime.timedelta(microseconds=1)
+    start = time.perf_counter()
+    for i in order:
+        index.add(prop, nodes[i], START + i * microsecond)
+    print("index-only: add %d events (1%% out of order)  %6.2fs" % (events, time.perf_counter() - start))
+    del nodes
+    start = time.perf_counter()
+    index.events(prov.PROV.generatedAtTime)
+    print("first query sorts them in                      %6.2fs" % (time.perf_counter() - start))
+    timings = queries(session, events, datetime.timedelta(microseconds=1))
+    print("queries           %s" % "  ".join("%8.6fs" % t for t in timings))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000, int(sys.argv[2]) if len(sys.argv) > 2 else 10000000)
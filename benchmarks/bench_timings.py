@@ -0,0 +1,56 @@
+"""
+Compare reading activity durations one object at a time through get_started_at_time()/get_ended_at_time() with
+timings(), and time a vectorized percentile over the result. Requires NumPy.
+
+    python benchmarks/bench_timings.py [activities]
+"""
+
+import datetime
+import sys
+import time
+
+import numpy
+
+from kleio import prov
+
+START = datetime.datetime(2020, 1, 1)
+
+
+def record(session, n):
+    with session:
+        for i in range(n):
+            activity = prov.Activity("http://example.org/activity-%d" % i)
+            activity.set_started_at_time(START + datetime.timedelta(seconds=i))
+            activity.set_ended_at_time(START + datetime.timedelta(seconds=i + i % 600))
+
+
+def main(n):
+    session = prov.ProvSession()
+    record(session, n)
+    ids = ["http://example.org/activity-%d" % i for i in range(n)]
+
+    start = time.perf_counter()
+    with session:
+        durations = []
+        for id in ids:
+            activity = prov.Activity.wrap(id)
+            durations.append(activity.get_ended_at_time() - activity.get_started_at_time())
+    print("%d activities, per object getters      %6.2fs" % (n, time.perf_counter() - start))
+
+    for (label, indexed) in (("off", False), ("on, cold", True), ("on, warm", True)):
+        if indexed != session.using_temporal_index():
+            session.set_temporal_index(indexed)
+        start = time.perf_counter()
+        table = session.timings()
+        print("timings(), temporal index %-9s    %6.2fs" % (label, time.perf_counter() - start))
+    start = time.perf_counter()
+    session.timings(ids[:n // 10])
+    print("timings() of %d given activities     %6.2fs" % (n // 10, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    (p50, p99) = numpy.percentile(table["duration"].astype(numpy.int64), [50, 99]) / 1e6
+    print("duration p50 %.0fs, p99 %.0fs              %6.3fs" % (p50, p99, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
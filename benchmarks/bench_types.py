@@ -0,0 +1,47 @@
+"""
+Time the construction of PROV resources, which asserts all of their PROV types in one bulk write from the per-class
+type table, against asserting the same types with one add_type() call per class in the hierarchy.
+
+    python benchmarks/bench_types.py [objects]
+"""
+
+import sys
+import time
+
+from kleio import prov
+
+
+CLASSES = (prov.Entity, prov.Activity, prov.Collection, prov.Derivation, prov.Generation, prov.Association)
+
+
+def table(cls, n):
+    with prov.ProvSession():
+        start = time.perf_counter()
+        for i in range(n):
+            cls("http://example.org/node-%d" % i)
+        return time.perf_counter() - start
+
+
+def per_class(cls, n):
+    types = prov._prov_types(cls)
+    with prov.ProvSession():
+        start = time.perf_counter()
+        for i in range(n):
+            resource = prov.Resource("http://example.org/node-%d" % i)
+            for rdf_type in types:
+                resource.add_type(rdf_type)
+        return time.perf_counter() - start
+
+
+def main(n):
+    print("%-12s %5s %12s %12s" % ("class", "types", "table", "add_type"))
+    for cls in CLASSES:
+        # best of three runs, alternating the two ways
+        times = [(table(cls, n), per_class(cls, n)) for _ in range(3)]
+        print("%-12s %5d %9.1f us %9.1f us" % (cls.__name__, len(prov._prov_types(cls)),
+                                               min(t for (t, _) in times) / n * 1e6,
+                                               min(t for (_, t) in times) / n * 1e6))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,52 @@
+"""
+Compare materialized super- and inverse properties with virtual inference: stored triples, memory, recording time
+and getter throughput.
+
+    python benchmarks/bench_virtual_inference.py [entities]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from kleio import prov
+
+
+def record(session, n):
+    with session:
+        activity = prov.Activity("http://example.org/activity")
+        for i in range(n):
+            entity = prov.Entity("http://example.org/entity-%d" % i)
+            entity.set_was_generated_by(activity)
+            entity.set_was_revision_of(prov.Entity("http://example.org/entity-%d" % (i // 2)))
+            activity.set_used(entity)
+
+
+def read(session, n):
+    with session:
+        for i in range(n):
+            entity = prov.Entity.wrap("http://example.org/entity-%d" % i)
+            entity.get_was_influenced_by()
+            entity.get_was_derived_from()
+
+
+def main(n):
+    for virtual in (False, True):
+        session = prov.ProvSession()
+        session.set_use_inverse_properties(True)
+        session.set_virtual_inference(virtual)
+        tracemalloc.start()
+        start = time.perf_counter()
+        record(session, n)
+        recorded = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        start = time.perf_counter()
+        read(session, n)
+        read_time = time.perf_counter() - start
+        print("%-12s %8d triples  %6.1f MB  record %6.2fs  getters %8.0f/s" % (
+            "virtual" if virtual else "materialized", len(session.ds), memory / 1e6, recorded, 2 * n / read_time))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
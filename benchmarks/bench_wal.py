@@ -0,0 +1,65 @@
+"""
+Measure the cost of the write-ahead log per fsync policy when recording entities one write at a time and in batches,
+and the time to replay and to compact the log.
+
+    python benchmarks/bench_wal.py [entities] [batch size]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from kleio import prov
+
+
+def record(session, n, batch_size):
+    with session:
+        activity = prov.Activity("http://example.org/activity")
+        for start in range(0, n, batch_size or n):
+            with prov.batch() if batch_size else session:
+                for i in range(start, min(n, start + (batch_size or n))):
+                    entity = prov.Entity("http://example.org/entity-%d" % i)
+                    entity.set_was_generated_by(activity)
+                    entity.set(prov.RDFS.label, prov.Literal("entity %d" % i))
+
+
+def main(n, batch_size):
+    directory = tempfile.mkdtemp()
+    try:
+        for size in (None, batch_size):
+            for policy in (None, "never", "interval", "always"):
+                path = os.path.join(directory, "%s-%s.wal" % (policy, size))
+                session = prov.ProvSession()
+                if policy is not None:
+                    session.open_wal(path, fsync=policy)
+                start = time.perf_counter()
+                record(session, n, size)
+                elapsed = time.perf_counter() - start
+                if policy is not None:
+                    session.close_wal()
+                print("%-13s fsync %-8s  %6.2fs  %8.0f entities/s" % (
+                    "batch of %d" % size if size else "single writes", policy or "no log", elapsed, n / elapsed))
+
+        path = os.path.join(directory, "never-None.wal")
+        start = time.perf_counter()
+        session = prov.ProvSession()
+        session.open_wal(path)
+        print("replay %d bytes of log  %6.2fs  %d triples" % (
+            os.path.getsize(path), time.perf_counter() - start, len(session.ds)))
+        start = time.perf_counter()
+        session.compact_wal()
+        print("compact                  %6.2fs" % (time.perf_counter() - start))
+        session.close_wal()
+        start = time.perf_counter()
+        session = prov.ProvSession()
+        session.open_wal(path)
+        print("reopen from snapshot     %6.2fs  %d triples" % (time.perf_counter() - start, len(session.ds)))
+        session.close_wal()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000, int(sys.argv[2]) if len(sys.argv) > 2 else 100)
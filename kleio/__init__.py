@@ -4,11 +4,23 @@ __date__ = "2016/07/27"
 __docformat__ = "restructuredtext en"
 
 __all__ = [
-    'prov'
+    'asyncprov',
+    'compactstore',
+    'parallel',
+    'prov',
+    'snapshot',
+    'sqlitestore',
+    'wal'
 ]
 
 NORMALIZE_LITERALS = True
 
 DAWG_LITERAL_COLLATION = False
 
+from rdflib import plugin
+from rdflib.store import Store
+
+plugin.register("SQLite", Store, "kleio.sqlitestore", "SQLiteStore")
+plugin.register("Compact", Store, "kleio.compactstore", "CompactStore")
+
 from kleio import prov
\ No newline at end of file
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from kleio import prov
+
+log = logging.getLogger(__name__)
+
+
+class AsyncProvEmitter(object):
+    """
+    Asynchronous facade over kleio.prov for asyncio applications. Provenance is recorded by enqueueing callables that
+    use the kleio.prov API, e.g.
+
+        emitter.record(lambda: prov.Entity("ex:report").set_was_generated_by(prov.Activity("ex:run")))
+
+    which returns immediately. A background task hands the queued records to a single worker thread, where they are
+    applied in order, in batches, inside the emitter's session, so the event loop never waits on graph mutation or
+    serialization. All access to the session should go through the emitter (record, emit or run) while it is in use.
+    """
+
+    def __init__(self, session=None, batch_size=1000, max_pending=0):
+        self.session = session if session is not None else prov.current_session()
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._queue = None
+        self._task = None
+
+    def _start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(self.max_pending)
+            self._task = asyncio.ensure_future(self._drain())
+
+    def record(self, fn, *args, **kwargs):
+        """
+        Enqueue fn(*args, **kwargs) to be applied to the session in the background and return immediately. Raises
+        asyncio.QueueFull if max_pending records are already waiting; use emit() to wait for room instead. Errors
+        raised by fn are logged.
+        """
+        self._start()
+        self._queue.put_nowait((fn, args, kwargs, None))
+
+    async def emit(self, fn, *args, **kwargs):
+        """
+        Enqueue fn(*args, **kwargs) like record(), waiting for room in the queue if max_pending records are waiting.
+        """
+        self._start()
+        await self._queue.put((fn, args, kwargs, None))
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Apply fn(*args, **kwargs) after all records enqueued before it and return its result.
+        """
+        self._start()
+        future = asyncio.get_event_loop().create_future()
+        await self._queue.put((fn, args, kwargs, future))
+        return await future
+
+    async def flush(self):
+        """
+        Wait until every record enqueued so far has been applied to the session.
+        """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def serialize_async(self, format="xml", bundle=None):
+        """
+        Serialize bundle, the session's dataset by default, once all enqueued records have been applied.
+        """
+        return await self.run(prov.serialize, format, self.session.ds if bundle is None else bundle)
+
+    async def close(self):
+        """
+        Apply all pending records and stop the background task and worker thread.
+        """
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown()
+
+    async def _drain(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            records = [await self._queue.get()]
+            while len(records) < self.batch_size and not self._queue.empty():
+                records.append(self._queue.get_nowait())
+            try:
+                try:
+                    results = await loop.run_in_executor(self._executor, self._apply, records)
+                except asyncio.CancelledError:
+                    raise
+                except BaseException as e:
+                    log.exception("failed to apply %d provenance records", len(records))
+                    results = [(False, e)] * len(records)
+                for ((_, _, _, future), (ok, result)) in zip(records, results):
+                    if future is None or future.done():
+                        continue
+                    if ok:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(result)
+            finally:
+                for _ in records:
+                    self._queue.task_done()
+
+    def _apply(self, records):
+        """
+        Apply records in the worker thread. Runs of fire-and-forget records share one session batch; records whose
+        result is awaited are applied on their own so that they see everything written before them.
+        """
+        results = []
+        with self.session:
+            i = 0
+            while i < len(records):
+                if records[i][3] is not None:
+                    results.append(self._call(records[i]))
+                    i += 1
+                    continue
+                with self.session.batch():
+                    while i < len(records) and records[i][3] is None:
+                        results.append(self._call(records[i]))
+                        i += 1
+        return results
+
+    @staticmethod
+    def _call(record):
+        (fn, args, kwargs, future) = record
+        try:
+            return True, fn(*args, **kwargs)
+        except Exception as e:
+            if future is None:
+                log.exception("failed to record provenance with %r", fn)
+            return False, e
@@ -0,0 +1,387 @@
+from array import array
+
+from rdflib import RDF, RDFS, XSD
+from rdflib.graph import Graph
+from rdflib.store import Store, VALID_STORE
+
+from kleio.prov import PROV, SUPER_PROPERTIES, INVERSE_PROPERTIES
+
+
+# leaves holding more values than this are kept as sets instead of arrays
+_ARRAY_LIMIT = 32
+
+_PROV_TERMS = sorted(set(SUPER_PROPERTIES) | set(SUPER_PROPERTIES.values()) | set(INVERSE_PROPERTIES) |
+                     set(INVERSE_PROPERTIES.values()) | set(PROV[name] for name in (
+                         "Entity", "Activity", "Agent", "Collection", "EmptyCollection", "Bundle", "Plan", "Location",
+                         "Person", "Organization", "SoftwareAgent", "InstantaneousEvent", "Influence", "Generation",
+                         "Usage", "Start", "End", "Invalidation", "Communication", "Derivation", "Revision",
+                         "Quotation", "PrimarySource", "Attribution", "Association", "Delegation", "Role",
+                         "ActivityInfluence", "AgentInfluence", "EntityInfluence", "generatedAtTime",
+                         "invalidatedAtTime", "startedAtTime", "endedAtTime", "atTime", "value", "hadRole",
+                         "hadActivity", "hadUsage", "hadGeneration", "qualifiedInfluence", "influencer")))
+
+_VOCABULARY = [RDF.type, RDFS.label, XSD.dateTime] + _PROV_TERMS
+
+
+def _leaf_add(level, key, value):
+    """
+    Add value to the leaf of level at key. A leaf is a bare int while it holds one value, an array of ints while it
+    holds up to _ARRAY_LIMIT values and a set after that. Returns False if value was already there.
+    """
+    leaf = level.get(key)
+    if leaf is None:
+        level[key] = value
+    elif type(leaf) is int:
+        if leaf == value:
+            return False
+        level[key] = array("q", (leaf, value))
+    elif value in leaf:
+        return False
+    elif type(leaf) is set:
+        leaf.add(value)
+    elif len(leaf) < _ARRAY_LIMIT:
+        leaf.append(value)
+    else:
+        leaf = level[key] = set(leaf)
+        leaf.add(value)
+    return True
+
+
+def _leaf_remove(level, key, value):
+    leaf = level[key]
+    if type(leaf) is int:
+        del level[key]
+        return
+    leaf.remove(value)
+    if len(leaf) == 1:
+        level[key] = next(iter(leaf))
+
+
+def _leaf(leaf):
+    return (leaf,) if type(leaf) is int else leaf
+
+
+def _leaf_contains(leaf, value):
+    return leaf == value if type(leaf) is int else value in leaf
+
+
+class _Index(object):
+    """
+    A three level index a -> b -> leaf of c over integer term ids.
+    """
+
+    __slots__ = ("levels",)
+
+    def __init__(self):
+        self.levels = {}
+
+    def add(self, a, b, c):
+        level = self.levels.get(a)
+        if level is None:
+            level = self.levels[a] = {}
+        return _leaf_add(level, b, c)
+
+    def remove(self, a, b, c):
+        level = self.levels[a]
+        _leaf_remove(level, b, c)
+        if not level:
+            del self.levels[a]
+
+    def contains(self, a, b, c):
+        level = self.levels.get(a)
+        if level is None:
+            return False
+        leaf = level.get(b)
+        return leaf is not None and _leaf_contains(leaf, c)
+
+    def match(self, a, b):
+        """
+        Generate the (a, b, c) rows with the given a, and b unless it is None.
+        """
+        level = self.levels.get(a)
+        if level is None:
+            return
+        if b is not None:
+            leaf = level.get(b)
+            if leaf is not None:
+                for c in _leaf(leaf):
+                    yield a, b, c
+        else:
+            for (b, leaf) in list(level.items()):
+                for c in _leaf(leaf):
+                    yield a, b, c
+
+    def __iter__(self):
+        for a in list(self.levels):
+            for row in self.match(a, None):
+                yield row
+
+
+class CompactStore(Store):
+    """
+    A context-aware in-memory rdflib store that interns every term to an integer id and keeps triples in SPO, POS and
+    OSP indexes of nested dicts whose leaves are bare ints, small arrays or, for large fan-outs, sets, instead of a
+    set object per leaf. The PROV vocabulary, rdf:type and rdfs:label are interned first so the predicates of PROV
+    graphs have small, dense ids.
+
+    The union indexes hold every distinct triple once. The first context written to, normally the default graph of
+    prov.ds, is the primary context: its triples are the union minus a small index of the triples found only in other
+    contexts. Every other context, e.g. each prov.bundle(), keeps an SPO index of its own.
+
+    Registered with rdflib as the "Compact" store plugin, e.g. prov.configure_store("Compact").
+    """
+
+    context_aware = True
+    graph_aware = True
+    formula_aware = False
+    transaction_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        self.identifier = identifier
+        self._ids = {}
+        self._terms = []
+        self._spo = _Index()
+        self._pos = _Index()
+        self._osp = _Index()
+        self._primary = None
+        self._elsewhere = _Index()
+        self._contexts = {}
+        self._sizes = {}
+        self._graphs = {}
+        self._size = 0
+        self._namespaces = {}
+        self._prefixes = {}
+        for term in _VOCABULARY:
+            self._intern(term)
+        super().__init__(configuration)
+
+    def open(self, configuration, create=True):
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction=False):
+        pass
+
+    def _intern(self, term):
+        id = self._ids.get(term)
+        if id is None:
+            id = self._ids[term] = len(self._terms)
+            self._terms.append(term)
+        return id
+
+    def _graph(self, id):
+        graph = self._graphs.get(id)
+        if graph is None:
+            graph = self._graphs[id] = Graph(store=self, identifier=self._terms[id])
+        return graph
+
+    @staticmethod
+    def _identifier(context):
+        return getattr(context, "identifier", context)
+
+    def _register(self, c):
+        if c not in self._sizes:
+            self._sizes[c] = 0
+            if self._primary is None:
+                self._primary = c
+            else:
+                self._contexts[c] = _Index()
+
+    def _in_context(self, c, s, p, o):
+        if c == self._primary:
+            return self._spo.contains(s, p, o) and not self._elsewhere.contains(s, p, o)
+        return self._contexts[c].contains(s, p, o)
+
+    def _add(self, s, p, o, c):
+        self._register(c)
+        if c == self._primary:
+            if self._spo.add(s, p, o):
+                self._pos.add(p, o, s)
+                self._osp.add(o, s, p)
+                self._size += 1
+            elif self._elsewhere.contains(s, p, o):
+                self._elsewhere.remove(s, p, o)
+            else:
+                return
+        else:
+            if not self._contexts[c].add(s, p, o):
+                return
+            if self._spo.add(s, p, o):
+                self._pos.add(p, o, s)
+                self._osp.add(o, s, p)
+                self._size += 1
+                self._elsewhere.add(s, p, o)
+        self._sizes[c] += 1
+
+    def add(self, triple, context, quoted=False):
+        Store.add(self, triple, context, quoted)
+        (s, p, o) = triple
+        intern = self._intern
+        self._add(intern(s), intern(p), intern(o), intern(self._identifier(context)))
+
+    def addN(self, quads):
+        intern = self._intern
+        for (s, p, o, c) in quads:
+            Store.add(self, (s, p, o), c)
+            self._add(intern(s), intern(p), intern(o), intern(self._identifier(c)))
+
+    def _ids_of(self, triple_pattern):
+        """
+        Return the ids of the bound terms of triple_pattern, None for unbound ones, or None if a term is unknown.
+        """
+        ids = []
+        for term in triple_pattern:
+            if term is None:
+                ids.append(None)
+            else:
+                id = self._ids.get(term)
+                if id is None:
+                    return None
+                ids.append(id)
+        return ids
+
+    def _match(self, s, p, o):
+        """
+        Generate the (s, p, o) id rows of the union graph matching the pattern.
+        """
+        if s is not None:
+            if o is not None:
+                if p is not None:
+                    if self._spo.contains(s, p, o):
+                        yield s, p, o
+                else:
+                    for (o, s, p) in self._osp.match(o, s):
+                        yield s, p, o
+            else:
+                for row in self._spo.match(s, p):
+                    yield row
+        elif p is not None:
+            for (p, o, s) in self._pos.match(p, o):
+                yield s, p, o
+        elif o is not None:
+            for (o, s, p) in self._osp.match(o, None):
+                yield s, p, o
+        else:
+            for row in self._spo:
+                yield row
+
+    def _triple_contexts(self, s, p, o):
+        for c in list(self._sizes):
+            if self._in_context(c, s, p, o):
+                yield self._graph(c)
+
+    def triples(self, triple_pattern, context=None):
+        ids = self._ids_of(triple_pattern)
+        if ids is None:
+            return
+        terms = self._terms
+        if context is None:
+            for (s, p, o) in self._match(*ids):
+                yield (terms[s], terms[p], terms[o]), self._triple_contexts(s, p, o)
+            return
+        c = self._ids.get(self._identifier(context))
+        if c not in self._sizes:
+            return
+        graph = self._graph(c)
+        if c == self._primary:
+            elsewhere = self._elsewhere if self._elsewhere.levels else None
+            for (s, p, o) in self._match(*ids):
+                if elsewhere is None or not elsewhere.contains(s, p, o):
+                    yield (terms[s], terms[p], terms[o]), iter((graph,))
+            return
+        index = self._contexts[c]
+        if ids[0] is not None or (ids[1] is None and ids[2] is None):
+            rows = index.match(ids[0], ids[1]) if ids[0] is not None else iter(index)
+            for (s, p, o) in rows:
+                if ids[2] is None or o == ids[2]:
+                    yield (terms[s], terms[p], terms[o]), iter((graph,))
+        else:
+            for (s, p, o) in self._match(*ids):
+                if index.contains(s, p, o):
+                    yield (terms[s], terms[p], terms[o]), iter((graph,))
+
+    def remove(self, triple_pattern, context=None):
+        Store.remove(self, triple_pattern, context)
+        ids = self._ids_of(triple_pattern)
+        if ids is None:
+            return
+        if context is not None:
+            c = self._ids.get(self._identifier(context))
+            if c not in self._sizes:
+                return
+            contexts = [c]
+        else:
+            contexts = list(self._sizes)
+        for (s, p, o) in list(self._match(*ids)):
+            in_primary = self._in_context(self._primary, s, p, o)
+            for c in contexts:
+                if c == self._primary:
+                    if in_primary:
+                        in_primary = False
+                        self._sizes[c] -= 1
+                elif self._contexts[c].contains(s, p, o):
+                    self._contexts[c].remove(s, p, o)
+                    self._sizes[c] -= 1
+            elsewhere = any(index.contains(s, p, o) for index in self._contexts.values())
+            if in_primary:
+                continue
+            if elsewhere:
+                self._elsewhere.add(s, p, o)
+                continue
+            if self._elsewhere.contains(s, p, o):
+                self._elsewhere.remove(s, p, o)
+            self._spo.remove(s, p, o)
+            self._pos.remove(p, o, s)
+            self._osp.remove(o, s, p)
+            self._size -= 1
+
+    def __len__(self, context=None):
+        if context is None:
+            return self._size
+        return self._sizes.get(self._ids.get(self._identifier(context)), 0)
+
+    def contexts(self, triple=None):
+        if triple is None or triple == (None, None, None):
+            for c in list(self._sizes):
+                yield self._graph(c)
+            return
+        ids = self._ids_of(triple)
+        if ids is None:
+            return
+        seen = set()
+        for (s, p, o) in self._match(*ids):
+            for graph in self._triple_contexts(s, p, o):
+                if graph.identifier not in seen:
+                    seen.add(graph.identifier)
+                    yield graph
+
+    def add_graph(self, graph):
+        c = self._intern(graph.identifier)
+        if c not in self._sizes:
+            self._sizes[c] = 0
+            self._contexts[c] = _Index()
+
+    def remove_graph(self, graph):
+        c = self._ids.get(graph.identifier)
+        if c in self._sizes:
+            self.remove((None, None, None), graph)
+            if c != self._primary:
+                del self._contexts[c]
+                del self._sizes[c]
+
+    def bind(self, prefix, namespace, override=True):
+        if not override and (prefix in self._namespaces or namespace in self._prefixes):
+            return
+        self._prefixes.pop(self._namespaces.pop(prefix, None), None)
+        self._namespaces.pop(self._prefixes.pop(namespace, None), None)
+        self._namespaces[prefix] = namespace
+        self._prefixes[namespace] = prefix
+
+    def namespace(self, prefix):
+        return self._namespaces.get(prefix)
+
+    def prefix(self, namespace):
+        return self._prefixes.get(namespace)
+
+    def namespaces(self):
+        for (prefix, namespace) in list(self._namespaces.items()):
+            yield prefix, namespace
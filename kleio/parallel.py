@@ -0,0 +1,143 @@
+"""
+Parallel loading of line-oriented RDF (N-Triples and N-Quads). The input is split into byte ranges that end on line
+boundaries, each range is parsed by a worker process and the parsed quads are added to the dataset by the calling
+process, in file order. imap() is the process pool both loading and kleio.prov.export_bundles() run their jobs in.
+"""
+
+import os
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from rdflib import BNode, ConjunctiveGraph, Dataset
+from rdflib.plugins.parsers.nquads import NQuadsParser
+from rdflib.plugins.parsers.ntriples import ParseError, r_nodeid, r_tail, r_wspace
+
+
+FORMATS = ("nt", "nquads")
+
+
+def chunks(path, chunk_size):
+    """
+    Return the (start, end) byte ranges of about chunk_size bytes covering the file at path, each ending after a
+    newline or at the end of the file.
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as stream:
+        start = 0
+        while start < size:
+            stream.seek(min(start + chunk_size, size))
+            stream.readline()
+            end = min(stream.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+class _ChunkParser(NQuadsParser):
+    """
+    N-Quads parser, and so also N-Triples parser, collecting (s, p, o, graph name or None) quads. Blank node labels
+    are prefixed with a label shared by all chunks of one load so that a blank node is the same node in every chunk
+    while not clashing with blank nodes already in the dataset.
+    """
+
+    def __init__(self, bnode_prefix):
+        super().__init__()
+        self.bnode_prefix = bnode_prefix
+        self.quads = []
+
+    def nodeid(self):
+        if self.peek('_'):
+            return BNode(self.bnode_prefix + self.eat(r_nodeid).group(1))
+        return False
+
+    def parseline(self):
+        self.eat(r_wspace)
+        if (not self.line) or self.line.startswith('#'):
+            return
+        subject = self.subject()
+        self.eat(r_wspace)
+        predicate = self.predicate()
+        self.eat(r_wspace)
+        obj = self.object()
+        self.eat(r_wspace)
+        context = self.uriref() or self.nodeid() or None
+        self.eat(r_tail)
+        if self.line:
+            raise ParseError("Trailing garbage")
+        self.quads.append((subject, predicate, obj, context))
+
+    def parse_lines(self, data):
+        for line in data.split(b"\n"):
+            self.line = line.decode("utf-8").rstrip("\r")
+            try:
+                self.parseline()
+            except ParseError as e:
+                raise ParseError("Invalid line (%s):\n%r" % (e, line))
+        return self.quads
+
+
+def _parse_chunk(path, start, end, bnode_prefix):
+    with open(path, "rb") as stream:
+        stream.seek(start)
+        data = stream.read(end - start)
+    return _ChunkParser(bnode_prefix).parse_lines(data)
+
+
+def imap(function, jobs, workers):
+    """
+    Yield function(*job) for each job, in order, computed in a pool of workers processes. At most two jobs per worker
+    are taken from jobs ahead of the result being yielded. With one worker the jobs run in the calling process.
+    """
+    if workers == 1:
+        for job in jobs:
+            yield function(*job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        jobs = iter(jobs)
+        for job in jobs:
+            pending.append(executor.submit(function, *job))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            result = pending.popleft().result()
+            for job in jobs:
+                pending.append(executor.submit(function, *job))
+                break
+            yield result
+
+
+def load(path, dataset, format="nquads", workers=None, chunk_size=1 << 24, graph=None):
+    """
+    Parse the N-Triples or N-Quads file at path with workers processes, os.cpu_count() by default, and add its quads
+    to dataset, a ConjunctiveGraph. Quads naming a graph go to that graph of dataset, the others to graph, the default
+    graph of dataset by default. At most two chunks per worker are parsed ahead of the chunk being added.
+    """
+    if format not in FORMATS:
+        raise ValueError("parallel loading supports %s, not %s" % (", ".join(FORMATS), format))
+    if not isinstance(dataset, ConjunctiveGraph):
+        raise TypeError("parallel loading needs a ConjunctiveGraph or Dataset")
+    workers = workers or os.cpu_count() or 1
+    bnode_prefix = uuid.uuid4().hex
+    ranges = chunks(path, chunk_size)
+    target = dataset.default_context if graph is None else graph
+    named = dataset.graph if isinstance(dataset, Dataset) else dataset.get_context
+    graphs = {}
+
+    def add(quads):
+        rows = []
+        for (s, p, o, c) in quads:
+            if c is None:
+                g = target
+            else:
+                g = graphs.get(c)
+                if g is None:
+                    g = graphs[c] = named(c)
+            rows.append((s, p, o, g))
+        dataset.addN(rows)
+
+    for quads in imap(_parse_chunk, ((path, start, end, bnode_prefix) for (start, end) in ranges), workers):
+        add(quads)
+    return dataset
@@ -1,5 +1,24 @@
-from rdflib import Literal, BNode, Namespace, URIRef, Graph, Dataset, RDF, RDFS, XSD
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+import csv
+import datetime
+from functools import lru_cache
+from hashlib import sha1
+from itertools import islice
+import os
+import struct
+import sys
+import threading
+import time
+from urllib.parse import quote
+import uuid
+import weakref
+from rdflib import Literal, BNode, Namespace, URIRef, Graph, ConjunctiveGraph, Dataset, RDF, RDFS, XSD
 import rdflib.resource
+from rdflib.store import NO_STORE
+from kleio import parallel, snapshot, wal
 
 __author__ = 'szednik'
 
@@ -15,59 +34,2023 @@ context = {"prov": "http://www.w3.org/ns/prov#",
            "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
            "xsd": "http://www.w3.org/2001/XMLSchema#"}
 
-ds = Dataset(default_union=True)
-ds.bind("prov", PROV)
-default_graph = ds
+# the direct super-property of each property asserted when assertSuperProperties is on
+SUPER_PROPERTIES = {
+    PROV.wasAttributedTo: PROV.wasInfluencedBy,
+    PROV.wasGeneratedBy: PROV.wasInfluencedBy,
+    PROV.wasDerivedFrom: PROV.wasInfluencedBy,
+    PROV.wasInvalidatedBy: PROV.wasInfluencedBy,
+    PROV.hadMember: PROV.wasInfluencedBy,
+    PROV.used: PROV.wasInfluencedBy,
+    PROV.wasInformedBy: PROV.wasInfluencedBy,
+    PROV.wasAssociatedWith: PROV.wasInfluencedBy,
+    PROV.wasStartedBy: PROV.wasInfluencedBy,
+    PROV.wasEndedBy: PROV.wasInfluencedBy,
+    PROV.actedOnBehalfOf: PROV.wasInfluencedBy,
+    PROV.wasRevisionOf: PROV.wasDerivedFrom,
+    PROV.wasQuotedFrom: PROV.wasDerivedFrom,
+    PROV.hadPrimarySource: PROV.wasDerivedFrom,
+    PROV.specializationOf: PROV.alternateOf,
+    PROV.generated: PROV.influenced,
+    PROV.invalidated: PROV.influenced,
+    PROV.activity: PROV.influencer,
+    PROV.agent: PROV.influencer,
+    PROV.entity: PROV.influencer
+}
 
-config = {
-    "useInverseProperties": False,
-    "assertSuperProperties": True
+# the inverse of each property asserted when useInverseProperties is on
+INVERSE_PROPERTIES = {
+    PROV.wasInfluencedBy: PROV.influenced,
+    PROV.wasAttributedTo: PROV.contributed,
+    PROV.qualifiedAttribution: PROV.qualifiedAttributionOf,
+    PROV.wasGeneratedBy: PROV.generated,
+    PROV.qualifiedGeneration: PROV.qualifiedGenerationOf,
+    PROV.wasDerivedFrom: PROV.hadDerivation,
+    PROV.qualifiedDerivation: PROV.qualifiedDerivationOf,
+    PROV.wasRevisionOf: PROV.hadRevision,
+    PROV.qualifiedRevision: PROV.revisedEntity,
+    PROV.wasQuotedFrom: PROV.quotedAs,
+    PROV.qualifiedQuotation: PROV.qualifiedQuotationOf,
+    PROV.hadPrimarySource: PROV.wasPrimarySourceOf,
+    PROV.qualifiedPrimarySource: PROV.qualifiedSourceOf,
+    PROV.wasInvalidatedBy: PROV.invalidated,
+    PROV.qualifiedInvalidation: PROV.qualifiedInvalidationOf,
+    PROV.specializationOf: PROV.generalizationOf,
+    PROV.atLocation: PROV.locationOf,
+    PROV.hadMember: PROV.wasMemberOf,
+    PROV.used: PROV.wasUsedBy,
+    PROV.qualifiedUsage: PROV.qualifiedUsingActivity,
+    PROV.wasInformedBy: PROV.informed,
+    PROV.qualifiedCommunication: PROV.qualifiedCommunicationOf,
+    PROV.wasAssociatedWith: PROV.wasAssociateFor,
+    PROV.qualifiedAssociation: PROV.qualifiedAssociationOf,
+    PROV.wasStartedBy: PROV.started,
+    PROV.qualifiedStart: PROV.qualifiedStartOf,
+    PROV.wasEndedBy: PROV.ended,
+    PROV.qualifiedEnd: PROV.qualifiedEndOf,
+    PROV.actedOnBehalfOf: PROV.hadDelegate,
+    PROV.qualifiedDelegation: PROV.qualifiedDelegationOf,
+    PROV.hadPlan: PROV.wasPlanOf
 }
 
+# properties always asserted in both directions
+SYMMETRIC_PROPERTIES = frozenset([PROV.alternateOf])
+
+
+def _super_properties(prop):
+    """
+    Return prop and all of its super-properties.
+    """
+    properties = [prop]
+    while properties[-1] in SUPER_PROPERTIES:
+        properties.append(SUPER_PROPERTIES[properties[-1]])
+    return properties
+
+
+def _sub_properties(prop):
+    """
+    Return prop and all of its sub-properties.
+    """
+    return [p for p in set(SUPER_PROPERTIES) | set(SUPER_PROPERTIES.values()) | {prop} if prop in _super_properties(p)]
+
+
+def _inverse(prop):
+    for (p, inverse) in INVERSE_PROPERTIES.items():
+        if prop == p:
+            return inverse
+        if prop == inverse:
+            return p
+    return None
+
+
+class ProvSession(object):
+    """
+    An independent provenance store with its own Dataset, configuration and namespace prefixes. Resources created in
+    one of its graphs, or created inside a 'with session:' block, are recorded in it and follow its configuration, so
+    jobs or threads using separate sessions share no state. The module-level functions act on the current session,
+    which is the default session unless a 'with session:' block is active in the calling thread.
+    """
+
+    def __init__(self, store="default", configuration=None, create=True):
+        self.config = {
+            "useInverseProperties": False,
+            "assertSuperProperties": True,
+            "reachabilityIndex": False,
+            "temporalIndex": False,
+            "contentIds": False,
+            "virtualInference": False
+        }
+        self.ds = None
+        self.lock = threading.RLock()
+        self.thread_safe = False
+        self.thread_buffer_size = 1000
+        self._batch = None
+        self._local = threading.local()
+        self._buffers = []
+        self._prefix_map = None
+        self._expand = lru_cache(maxsize=65536)(self._expand_curie)
+        self.member_index = _MemberIndex(self)
+        self.reachability_index = _ReachabilityIndex(self)
+        self.temporal_index = _TemporalIndex(self)
+        self.change_log = None
+        self.wal = None
+        self._observers = []
+        self._rules = {}
+        self.configure_store(store, configuration, create)
+
+    def __enter__(self):
+        _session_stack().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _session_stack().pop()
+
+    @property
+    def default_graph(self):
+        return self.ds
+
+    def set_use_inverse_properties(self, flag=False):
+        self.config["useInverseProperties"] = flag
+
+    def set_assert_super_properties(self, flag=False):
+        self.config["assertSuperProperties"] = flag
+
+    def using_inverse_properties(self):
+        return self.config["useInverseProperties"]
+
+    def asserting_super_properties(self):
+        return self.config["assertSuperProperties"]
+
+    def set_virtual_inference(self, flag=False):
+        """
+        Switch virtual inference on or off. With virtual inference on, the super-properties and inverse properties
+        selected by assertSuperProperties and useInverseProperties are no longer written to the store. The getters
+        derive them from SUPER_PROPERTIES, INVERSE_PROPERTIES and SYMMETRIC_PROPERTIES when they are read, and the
+        serializers add them when called with infer=True.
+        """
+        self.config["virtualInference"] = flag
+
+    def using_virtual_inference(self):
+        return self.config["virtualInference"]
+
+    def writing_super_properties(self):
+        return self.config["assertSuperProperties"] and not self.config["virtualInference"]
+
+    def writing_inverse_properties(self):
+        return self.config["useInverseProperties"] and not self.config["virtualInference"]
+
+    def inference_rules(self, prop):
+        """
+        Return the (properties, inverse properties) a getter of prop reads under virtual inference: the values of prop
+        are the objects of the former and the subjects of the latter. Returns None if virtual inference is off or
+        derives nothing for prop.
+        """
+        if not self.config["virtualInference"]:
+            return None
+        key = (prop, self.config["assertSuperProperties"], self.config["useInverseProperties"])
+        try:
+            return self._rules[key]
+        except KeyError:
+            pass
+        properties = _sub_properties(prop) if key[1] else [prop]
+        inverses = []
+        if key[2]:
+            for p in properties:
+                inverse = _inverse(p)
+                if inverse is not None:
+                    inverses.extend(_sub_properties(inverse) if key[1] else [inverse])
+        if prop in SYMMETRIC_PROPERTIES:
+            inverses.extend(properties)
+        rules = (tuple(properties), tuple(OrderedDict.fromkeys(inverses))) if len(properties) > 1 or inverses else None
+        self._rules[key] = rules
+        return rules
+
+    def entailed(self, triple):
+        """
+        Return the triples that the assertSuperProperties and useInverseProperties settings add for triple, triple
+        included.
+        """
+        (s, p, o) = triple
+        properties = _super_properties(p) if self.config["assertSuperProperties"] else [p]
+        triples = [(s, q, o) for q in properties]
+        if self.config["useInverseProperties"]:
+            for q in properties:
+                inverse = _inverse(q)
+                if inverse is not None:
+                    triples.append((o, inverse, s))
+        for q in properties:
+            if q in SYMMETRIC_PROPERTIES:
+                triples.append((o, q, s))
+        return triples
+
+    def set_reachability_index(self, flag=False):
+        """
+        Switch the reachability index of this session on or off. While it is on, ancestor and descendant queries over
+        the derivation relations are answered from derivation edges kept in memory and cached ancestor and descendant
+        sets, instead of walking the store.
+        """
+        self.config["reachabilityIndex"] = flag
+        self.reachability_index.invalidate()
+
+    def using_reachability_index(self):
+        return self.config["reachabilityIndex"]
+
+    def set_content_ids(self, flag=False):
+        """
+        Switch content-addressed ids for qualified influences on or off. While it is on, generation(), usage(),
+        association() and the other qualified relation methods called without an id name the influence node with a
+        urn:uuid IRI derived from the subject, the relation, the influencer, the time and the role or other
+        qualifiers given, instead of a fresh blank node. Recording the same influence twice then writes the same
+        triples, and graphs recorded separately can be merged by adding their triples. The same instant written in
+        different time zones gets the same id. Subjects and influencers that are blank nodes only give stable ids
+        within one graph.
+        """
+        self.config["contentIds"] = flag
+
+    def using_content_ids(self):
+        return self.config["contentIds"]
+
+    def set_temporal_index(self, flag=False):
+        """
+        Switch the temporal index of this session on or off. While it is on, the values of the PROV time properties
+        (TIME_PROPERTIES) are kept sorted in memory, and events_between(), latest_events() and as_of() search them
+        instead of reading and parsing every time literal in the store.
+        """
+        self.config["temporalIndex"] = flag
+        self.temporal_index.invalidate()
+
+    def using_temporal_index(self):
+        return self.config["temporalIndex"]
+
+    def set_change_log(self, flag=True):
+        """
+        Switch the change log of this session on or off. While it is on, every triple added or removed through kleio
+        resources, batches and clear_graph() is appended to an in-memory log, from which export_delta() writes the
+        changes made since a checkpoint. Changes made directly through rdflib are not logged. Switching the log off
+        drops it.
+        """
+        with self.lock:
+            if not flag and self.change_log is not None:
+                self._observers.remove(self.change_log)
+                self.change_log = None
+            elif flag and self.change_log is None:
+                self.change_log = _ChangeLog()
+                self._observers.append(self.change_log)
+
+    def using_change_log(self):
+        return self.change_log is not None
+
+    def checkpoint(self):
+        """
+        Return the position of the end of the change log, to pass to export_delta() later as since.
+        """
+        self.sync()
+        return self._require_change_log().end
+
+    def export_delta(self, stream, since=0, format="patch", removed=None):
+        """
+        Write the changes logged after the checkpoint since to the binary stream, and return the checkpoint they
+        were written up to. "patch" writes every change in order as an "A" (added) or "D" (deleted) line followed
+        by the quad in N-Quads syntax. "nquads" writes the quads added and not removed again as N-Quads, and the
+        quads removed and not added again to the binary stream removed, which is required if there are any.
+        """
+        if format not in ("patch", "nquads"):
+            raise ValueError("deltas can be exported as patch or nquads, not %s" % format)
+        self.sync()
+        log = self._require_change_log()
+        (changes, end) = log.since(since)
+        writer = _ChunkedWriter(stream, 65536)
+        if format == "patch":
+            for change in changes:
+                writer.write(_patch_row(change))
+        else:
+            net = OrderedDict()
+            for (added, s, p, o, c) in changes:
+                quad = (s, p, o, c)
+                if net.get(quad, added) != added:
+                    del net[quad]
+                else:
+                    net[quad] = added
+            deleted = [quad for (quad, added) in net.items() if not added]
+            if deleted and removed is None:
+                raise ValueError("the delta removes quads, pass a stream for them as removed")
+            for (quad, added) in net.items():
+                if added:
+                    writer.write(_nq_row(quad[:3], quad[3]).encode("utf-8"))
+            if deleted:
+                removed_writer = _ChunkedWriter(removed, 65536)
+                for quad in deleted:
+                    removed_writer.write(_nq_row(quad[:3], quad[3]).encode("utf-8"))
+                removed_writer.flush()
+        writer.flush()
+        return end
+
+    def discard_changes(self, until):
+        """
+        Drop the changes logged up to the checkpoint until, e.g. once they have been exported.
+        """
+        self._require_change_log().truncate(until)
+
+    def _require_change_log(self):
+        log = self.change_log
+        if log is None:
+            raise ValueError("the change log is off, switch it on with set_change_log()")
+        return log
+
+    def set_thread_safe(self, flag=True, buffer_size=1000):
+        """
+        Switch the thread-safe recording mode of this session on or off. In thread-safe mode every thread writes into
+        a buffer of its own, which is drained into the dataset under the session lock once it holds buffer_size
+        triples, when the thread reads through a kleio getter, or when sync() is called. Writers therefore only
+        contend for the store once per buffer_size triples. A thread always sees its own writes through the kleio
+        getters; writes of other threads become visible once their buffers are drained. Serialization drains all
+        buffers first. Direct access to the rdflib dataset should be wrapped in synchronized().
+        """
+        if not flag:
+            self.sync()
+        self.thread_buffer_size = buffer_size
+        self.thread_safe = flag
+
+    def _thread_buffer(self):
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buffer = self._local.buffer = _WriteBuffer(self.thread_buffer_size, self.lock, self)
+            with self.lock:
+                self._buffers.append(buffer)
+            return buffer
+
+    def sync(self):
+        """
+        Drain the write buffers of all threads into the dataset.
+        """
+        with self.lock:
+            buffers = list(self._buffers)
+        for buffer in buffers:
+            buffer.flush()
+
+    @contextmanager
+    def synchronized(self):
+        """
+        Drain all write buffers and hold the session lock for the duration of the block.
+        """
+        with self.lock:
+            self.sync()
+            yield self.ds
+
+    def reading(self):
+        """
+        Return a context manager to wrap reads from the dataset with. In thread-safe mode it drains the calling
+        thread's buffer and holds the session lock, otherwise it does nothing.
+        """
+        if not self.thread_safe:
+            return _unlocked
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is not None:
+            buffer.flush()
+        return self.lock
+
+    def configure_store(self, store="default", configuration=None, create=True):
+        """
+        Replace the dataset of this session with one backed by the rdflib store plugin 'store', e.g. kleio's "SQLite"
+        store or rdflib's "Sleepycat" store. configuration is passed on to the store's open(), for the persistent
+        stores it is the path of the database. Namespaces bound with ns() are carried over and the previous store is
+        closed. Returns the new dataset.
+        """
+        dataset = Dataset(store=store, default_union=True)
+        if configuration is not None and dataset.open(configuration, create=create) == NO_STORE:
+            raise ValueError("cannot open %s store %r" % (store, configuration))
+        dataset.bind("prov", PROV)
+        if self.ds is not None:
+            for (prefix, namespace) in self.ds.namespaces():
+                dataset.bind(prefix, namespace, override=False)
+            _sessions.pop(id(self.ds.store), None)
+            self.ds.close(commit_pending_transaction=True)
+        self.ds = dataset
+        _sessions[id(dataset.store)] = self
+        self._watch_bindings(dataset.store)
+        self.clear_prefix_cache()
+        self.invalidate_indexes()
+        return dataset
+
+    def commit(self):
+        """
+        Commit pending changes to a transactional store.
+        """
+        self.ds.commit()
+
+    def rollback(self):
+        """
+        Roll back the changes made since the last commit to a transactional store.
+        """
+        self.ds.rollback()
+        self.invalidate_indexes()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Commit the changes made in the block, or roll them back if the block raises.
+        """
+        try:
+            yield self.ds
+        except BaseException:
+            self.rollback()
+            raise
+        self.ds.commit()
+
+    def clear_graph(self, bundle=None):
+        bundle = self.ds if bundle is None else bundle
+        with self.lock:
+            if self._batch is not None:
+                self._batch.discard(bundle)
+            for buffer in self._buffers:
+                buffer.discard(bundle)
+            if self._observers:
+                if isinstance(bundle, ConjunctiveGraph):
+                    quads = list(bundle.quads((None, None, None)))
+                else:
+                    quads = [(s, p, o, bundle) for (s, p, o) in bundle]
+            bundle.remove((None, None, None))
+            if self._observers:
+                self._record([(False, s, p, o, getattr(c, "identifier", c)) for (s, p, o, c) in quads])
+            self.invalidate_indexes(bundle)
+
+    def invalidate_indexes(self, graph=None):
+        """
+        Drop what the session's indexes know about graph, or about every graph if graph is None. Call this after
+        changing the dataset directly through rdflib rather than through kleio resources.
+        """
+        self.member_index.invalidate(graph)
+        self.reachability_index.invalidate()
+        self.temporal_index.invalidate()
+
+    @contextmanager
+    def batch(self, size=None):
+        """
+        Buffer the triples written by Resource objects of this session and insert them with a single bulk write per
+        graph on exit. Reads inside the batch only see what has been flushed. If size is given, the buffer is flushed
+        every time it holds that many triples. Pending triples are discarded if the block raises. Nested batches join
+        the outer one. In thread-safe mode writes are always buffered per thread; the block drains the calling thread's
+        buffer on entry and on exit, or discards what was written in the block if it raises.
+        """
+        if self.thread_safe:
+            buffer = self._thread_buffer()
+            buffer.flush()
+            try:
+                yield buffer
+            except BaseException:
+                buffer.discard()
+                self.invalidate_indexes()
+                raise
+            buffer.flush()
+            return
+        if self._batch is not None:
+            yield self._batch
+            return
+        self._batch = _WriteBuffer(size, self.lock, self)
+        try:
+            yield self._batch
+            self._batch.flush()
+        except BaseException:
+            self.invalidate_indexes()
+            raise
+        finally:
+            self._batch = None
+
+    def _buffer(self):
+        if self.thread_safe:
+            return self._thread_buffer()
+        return self._batch
+
+    def write(self, graph, triple):
+        buffer = self._buffer()
+        if buffer is not None:
+            buffer.add(graph, triple)
+        elif self._observers:
+            self.apply(graph, [triple])
+        else:
+            graph.add(triple)
+
+    def write_all(self, graph, triples):
+        buffer = self._buffer()
+        if buffer is not None:
+            for triple in triples:
+                buffer.add(graph, triple)
+        elif self._observers:
+            self.apply(graph, triples)
+        else:
+            _add_all(graph, triples)
+
+    def replace(self, graph, triple):
+        buffer = self._buffer()
+        if buffer is not None:
+            buffer.set(graph, triple)
+        elif self._observers:
+            self.apply(graph, [triple], [triple[:2]])
+        else:
+            graph.set(triple)
+
+    def apply(self, graph, triples, replaced=()):
+        """
+        Remove the values of the (subject, predicate) pairs in replaced from graph, then add triples to it, and log
+        the quads this actually removed and added if the change log or the write-ahead log is on.
+        """
+        log = self._observers
+        context = graph.default_context if isinstance(graph, ConjunctiveGraph) else graph
+        removed = []
+        for (s, p) in replaced:
+            if log:
+                if isinstance(graph, ConjunctiveGraph):
+                    removed.extend((s, p, o, getattr(c, "identifier", c)) for (_, _, o, c) in graph.quads((s, p, None)))
+                else:
+                    removed.extend((s, p, o, context.identifier) for o in context.objects(s, p))
+            graph.remove((s, p, None))
+        if not log:
+            _add_all(graph, triples)
+            return
+        triples = list(OrderedDict.fromkeys(triples))
+        added = [(s, p, o, context.identifier) for (s, p, o) in triples if (s, p, o) not in context]
+        _add_all(graph, triples)
+        # a value that was replaced by itself has not changed
+        unchanged = set(removed).intersection(added)
+        self._record([(False,) + quad for quad in removed if quad not in unchanged] +
+                     [(True,) + quad for quad in added if quad not in unchanged])
+
+    def _record(self, changes):
+        """
+        Pass the (added, s, p, o, graph name) changes just made to the dataset on to the change log and the
+        write-ahead log.
+        """
+        if changes:
+            for observer in list(self._observers):
+                observer.record(changes)
+
+    def ns(self, prefix, namespace):
+        ns_obj = Namespace(namespace)
+        self.ds.namespace_manager.bind(prefix, ns_obj)
+        self.clear_prefix_cache()
+        return ns_obj
+
+    def clear_prefix_cache(self):
+        self._prefix_map = None
+        self._expand.cache_clear()
+
+    def _watch_bindings(self, store):
+        """
+        Clear the prefix cache whenever a namespace is bound in store, whether through ns(), a parsed document or any
+        graph's namespace manager, all of which end up in the store's bind().
+        """
+        session = weakref.ref(self)
+        bind = store.bind
+
+        def bind_and_clear(*args, **kwargs):
+            bind(*args, **kwargs)
+            if session() is not None:
+                session().clear_prefix_cache()
+
+        store.bind = bind_and_clear
+
+    def _prefixes(self):
+        """
+        Return the prefix -> namespace map of the dataset, cached until a namespace is bound in its store.
+        """
+        if self._prefix_map is None:
+            self._prefix_map = dict((p, str(namespace)) for (p, namespace) in self.ds.namespace_manager.namespaces())
+        return self._prefix_map
+
+    def _expand_curie(self, uri):
+        (prefix, colon, reference) = uri.partition(":")
+        if colon and not reference.startswith("//"):
+            namespace = self._prefixes().get(prefix)
+            if namespace is not None:
+                return namespace + reference
+        return uri
+
+    def absolutize(self, uri):
+        """
+        Expand a CURIE using the prefixes bound with ns(); any other id is returned unchanged.
+        """
+        return self._expand(str(uri))
+
+    def ancestors(self, node):
+        """
+        Return the set of nodes that node was transitively derived from, in any graph of the dataset.
+        """
+        if self.using_reachability_index():
+            return self.reachability_index.ancestors(node)
+        return frozenset(r.identifier for r in lineage(Entity.wrap(node, self.ds), "up", DERIVATION_RELATIONS))
+
+    def descendants(self, node):
+        """
+        Return the set of nodes transitively derived from node, in any graph of the dataset.
+        """
+        if self.using_reachability_index():
+            return self.reachability_index.descendants(node)
+        return frozenset(r.identifier for r in lineage(Entity.wrap(node, self.ds), "down", DERIVATION_RELATIONS))
+
+    def events_between(self, start, end, prop=None):
+        """
+        Generate the resources with a value of the time property prop, prov:generatedAtTime by default, at or after
+        start and before end, oldest first. Either bound may be None.
+        """
+        (events, cls) = self._events(prop)
+        lower = 0 if start is None else bisect_left(events, (_instant(start),))
+        upper = len(events) if end is None else bisect_left(events, (_instant(end),))
+        return (cls.wrap(events[i][1], self.ds) for i in range(lower, upper))
+
+    def latest_events(self, n=None, prop=None, before=None):
+        """
+        Generate the n resources, or all of them if n is None, with the latest values of the time property prop,
+        prov:generatedAtTime by default, newest first. If before is given only values at or before it count, which
+        makes this an as-of query for single events.
+        """
+        (events, cls) = self._events(prop)
+        upper = len(events) if before is None else bisect_left(events, (_instant(before) + 1,))
+        lower = 0 if n is None else max(0, upper - n)
+        return (cls.wrap(events[i][1], self.ds) for i in range(upper - 1, lower - 1, -1))
+
+    def as_of(self, time, kind=None):
+        """
+        Generate the entities that had been generated and not yet invalidated at time, or with kind=Activity the
+        activities that had started and not yet ended, most recently generated or started first.
+        """
+        (start, end) = (PROV.startedAtTime, PROV.endedAtTime) if kind is Activity else \
+            (PROV.generatedAtTime, PROV.invalidatedAtTime)
+        instant = _instant(time)
+        index = self.temporal_index if self.using_temporal_index() else _TemporalIndex(self, transient=True)
+        (events, cls) = index.events(start)
+        ended = index.current(end)
+        upper = bisect_left(events, (instant + 1,))
+        return (cls.wrap(events[i][1], self.ds) for i in range(upper - 1, -1, -1)
+                if ended.get(events[i][1], instant + 1) > instant)
+
+    def event_table(self, kind=None):
+        """
+        Return the times of every resource of kind, Activity by default, read in one pass over the time properties
+        of the store, as an OrderedDict of NumPy arrays: "id", the identifiers, then one datetime64[us] column (UTC,
+        NaT if missing) per time property of kind, startedAtTime and endedAtTime for activities, generatedAtTime and
+        invalidatedAtTime for entities, atTime for instantaneous events. Influences also get an "influencer" column
+        with their prov:activity, prov:entity or prov:agent. Requires NumPy.
+        """
+        numpy = _numpy()
+        kind = Activity if kind is None else kind
+        columns = [prop for prop in TIME_PROPERTIES if issubclass(kind, TIME_PROPERTIES[prop])]
+        if not columns:
+            raise ValueError("%s resources have no PROV time properties" % kind.__name__)
+        influencer = next((prop for (cls, prop) in _INFLUENCERS if issubclass(kind, cls)), None)
+        index = self.temporal_index if self.using_temporal_index() else _TemporalIndex(self, transient=True)
+        times = [index.current(prop) for prop in columns]
+        with self.synchronized():
+            ids = OrderedDict.fromkeys(self.ds.subjects(RDF.type, kind.rdf_type))
+            influencers = dict(self.ds.subject_objects(influencer)) if influencer is not None else None
+        if kind in (Entity, Activity):
+            # the time properties of entities and activities imply the type
+            for values in times:
+                ids.update(OrderedDict.fromkeys(values))
+        table = OrderedDict()
+        table["id"] = numpy.array(list(ids), dtype=object)
+        for (prop, values) in zip(columns, times):
+            column = numpy.fromiter((values.get(node, _NAT) for node in ids), dtype=numpy.int64, count=len(ids))
+            table[prop.split("#")[-1]] = column.view("datetime64[us]")
+        if influencers is not None:
+            table["influencer"] = numpy.array([influencers.get(node) for node in ids], dtype=object)
+        return table
+
+    def timings(self, activities=None):
+        """
+        Return the start and end times and durations of activities, or of every activity, as an OrderedDict of NumPy
+        arrays "id", "startedAtTime", "endedAtTime" (datetime64[us], NaT if missing) and "duration"
+        (timedelta64[us]). Requires NumPy.
+        """
+        numpy = _numpy()
+        table = self.event_table(Activity)
+        if activities is not None:
+            rows = dict((node, i) for (i, node) in enumerate(table["id"]))
+            ids = [Resource.node(activity, self) if not isinstance(activity, Resource) else activity.identifier
+                   for activity in activities]
+            selected = numpy.array([rows.get(node, -1) for node in ids], dtype=numpy.int64)
+            for name in ("startedAtTime", "endedAtTime"):
+                # row -1, activities without times, picks the NaT appended to the column
+                table[name] = numpy.append(table[name], numpy.datetime64("NaT", "us"))[selected]
+            table["id"] = numpy.array(ids, dtype=object)
+        table["duration"] = table["endedAtTime"] - table["startedAtTime"]
+        return table
+
+    def _events(self, prop):
+        prop = PROV.generatedAtTime if prop is None else prop
+        if prop not in TIME_PROPERTIES:
+            raise ValueError("%s is not one of the PROV time properties" % prop)
+        if self.using_temporal_index():
+            return self.temporal_index.events(prop)
+        return _TemporalIndex(self, transient=True).events(prop)
+
+    def bundle(self, id):
+        uri = URIRef(self.absolutize(id))
+        b = self.ds.graph(identifier=uri)
+        Bundle(id=uri, bundle=b)
+        return b
+
+    def save_snapshot(self, path):
+        """
+        Write all bundles and namespace bindings of this session to a binary snapshot at path. See kleio.snapshot.
+        """
+        with self.synchronized():
+            snapshot.write(self.ds, path)
+
+    def load_snapshot(self, path):
+        """
+        Add the bundles and namespace bindings of the binary snapshot at path to this session.
+        """
+        with self.synchronized():
+            snapshot.read(path, self.ds)
+        self.clear_prefix_cache()
+        self.invalidate_indexes()
+
+    def load_parallel(self, path, format="nquads", workers=None, bundle=None):
+        """
+        Parse the N-Triples or N-Quads file at path in a pool of worker processes and add it to this session. Quads
+        naming a graph are added to that bundle, all other triples to bundle, the default graph by default. See
+        kleio.parallel.
+        """
+        with self.synchronized():
+            parallel.load(path, self.ds, format=format, workers=workers, graph=bundle)
+        self.invalidate_indexes()
+
+    def open_wal(self, path, fsync="interval", interval=1.0, compact_size=None):
+        """
+        Replay the write-ahead log at path, and the snapshot it was last compacted into, into this session, then
+        append every triple added or removed through kleio resources, batches and clear_graph() to it, one group
+        per write or flushed batch. fsync is the policy for syncing the log to disk, "always", "interval" (every
+        interval seconds) or "never", see kleio.wal. Once the log grows past compact_size bytes it is compacted
+        into the snapshot at path + ".snapshot". Changes made directly through rdflib are not logged.
+        """
+        with self.synchronized():
+            if self.wal is not None:
+                raise ValueError("a write-ahead log is already open at %s" % self.wal.log.path)
+            log = wal.WriteAheadLog(path, fsync, interval)
+            try:
+                if os.path.exists(path + ".snapshot"):
+                    snapshot.read(path + ".snapshot", self.ds)
+                _replay(self.ds, log.read())
+            except BaseException:
+                log.close()
+                raise
+            self.wal = _WalWriter(self, log, compact_size)
+            self._observers.append(self.wal)
+        self.clear_prefix_cache()
+        self.invalidate_indexes()
+
+    def compact_wal(self):
+        """
+        Write this session's dataset to the snapshot next to the write-ahead log and empty the log.
+        """
+        with self.synchronized():
+            if self.wal is None:
+                raise ValueError("no write-ahead log is open, open one with open_wal()")
+            self.wal.log.sync()
+            snapshot.write(self.ds, self.wal.log.path + ".snapshot")
+            self.wal.log.reset()
+
+    def close_wal(self):
+        """
+        Sync and close the write-ahead log. Later changes are not logged.
+        """
+        with self.synchronized():
+            if self.wal is not None:
+                self._observers.remove(self.wal)
+                self.wal.log.close()
+                self.wal = None
+
+    def export_bundles(self, directory, format="trig", workers=None, bundles=None):
+        """
+        Write each bundle of this session, or each bundle in bundles, to a file of its own in directory, in a pool of
+        workers processes, os.cpu_count() by default. Each file holds the bundle and the statements the default graph
+        makes about the bundle, e.g. its Bundle entity: in the default graph of the file for quad formats (trig,
+        nquads, json-ld), merged into one graph otherwise. Files are named after the percent-encoded bundle IRI.
+        Return an OrderedDict mapping each bundle's identifier to its file path and the seconds spent reading and
+        writing it.
+        """
+        extension = _EXTENSIONS.get(format, format)
+        options = {"context": context, "indent": 2} if format == "json-ld" else {}
+        with self.synchronized():
+            namespaces = [(prefix, str(namespace)) for (prefix, namespace) in self.ds.namespaces()]
+            if bundles is None:
+                default = self.ds.default_context.identifier
+                bundles = [graph for graph in self.ds.contexts() if graph.identifier != default]
+        timings = OrderedDict()
+
+        def jobs():
+            for graph in bundles:
+                start = time.perf_counter()
+                with self.synchronized():
+                    triples = list(graph.triples((None, None, None)))
+                    metadata = list(self.ds.default_context.triples((graph.identifier, None, None)))
+                path = os.path.join(directory, _file_name(graph.identifier, extension))
+                timings[graph.identifier] = (path, time.perf_counter() - start)
+                yield (path, format, graph.identifier, triples, metadata, namespaces, options)
+
+        os.makedirs(directory, exist_ok=True)
+        for (identifier, seconds) in parallel.imap(_export_bundle, jobs(), workers or os.cpu_count() or 1):
+            (path, read) = timings[identifier]
+            timings[identifier] = (path, read + seconds)
+        return timings
+
+    def export_edges(self, directory, relations=None, bundle=None, format="npy"):
+        """
+        Write the edges between resources in bundle, the whole dataset by default, to directory in one pass over the
+        store, for loading into graph analytics tools. Nodes and relations are interned as integer ids in the order
+        they are first met. relations limits the edges to those properties; by default every triple with a resource
+        as object except rdf:type is an edge. Written are
+            source.npy, relation.npy, target.npy    int64 id arrays, or edges.csv (source, relation, target) with
+                                                    format="csv"
+            nodes.csv                               id, node and the most specific PROV type of each node
+            relations.csv                           id and relation
+        The .npy files are streamed to disk and need no NumPy to be written. Return the numbers of edges and nodes.
+        """
+        if format not in ("npy", "csv"):
+            raise ValueError("edges can be exported as npy or csv, not %s" % format)
+        graph = self.ds if bundle is None else bundle
+        if relations is None:
+            rows = (t for t in graph.triples((None, None, None)) if not isinstance(t[2], Literal))
+        else:
+            relations = set(relations)
+            rows = (t for t in graph.triples((None, None, None))
+                    if t[1] == RDF.type or (t[1] in relations and not isinstance(t[2], Literal)))
+        nodes = {}
+        predicates = {}
+        types = {}
+        count = 0
+        os.makedirs(directory, exist_ok=True)
+        if format == "npy":
+            columns = [_NpyColumn(os.path.join(directory, name + ".npy")) for name in ("source", "relation", "target")]
+        else:
+            stream = open(os.path.join(directory, "edges.csv"), "w", newline="", encoding="utf-8")
+            writer = csv.writer(stream)
+            writer.writerow(("source", "relation", "target"))
+        try:
+            for (s, p, o) in _paged(self.synchronized, rows):
+                if p == RDF.type:
+                    cls = _PROV_CLASSES.get(o)
+                    if cls is not None and len(cls.__mro__) > len(types.get(s, Resource).__mro__):
+                        types[s] = cls
+                    if relations is None or p not in relations:
+                        continue
+                edge = (nodes.setdefault(s, len(nodes)), predicates.setdefault(p, len(predicates)),
+                        nodes.setdefault(o, len(nodes)))
+                count += 1
+                if format == "npy":
+                    for (column, id) in zip(columns, edge):
+                        column.append(id)
+                else:
+                    writer.writerow(edge)
+        finally:
+            if format == "npy":
+                for column in columns:
+                    column.close()
+            else:
+                stream.close()
+        with open(os.path.join(directory, "nodes.csv"), "w", newline="", encoding="utf-8") as stream:
+            writer = csv.writer(stream)
+            writer.writerow(("id", "node", "type"))
+            writer.writerows((id, node.n3() if isinstance(node, BNode) else node,
+                              types[node].__name__ if node in types else "") for (node, id) in nodes.items())
+        with open(os.path.join(directory, "relations.csv"), "w", newline="", encoding="utf-8") as stream:
+            writer = csv.writer(stream)
+            writer.writerow(("id", "relation"))
+            writer.writerows((id, predicate) for (predicate, id) in predicates.items())
+        return count, len(nodes)
+
+    def ingest_table(self, columns, mapping=None, bundle=None, batch_size=10000):
+        """
+        Record one row of provenance per row of the table columns, a dict of equally long column sequences (lists,
+        NumPy arrays, ...) or a text stream of CSV with a header line, in bundle, the default graph by default.
+        mapping maps the INGEST_ROLES to column names, each role to the column of the same name by default:
+        "entity", "activity", "agent" and "used" hold ids, "generated_at", "used_at", "started_at" and "ended_at"
+        times. Each row writes what the following calls would, for the roles with a value in that row:
+
+            entity.generation(activity, datetime=generated_at)
+            activity.usage(Entity(used), datetime=used_at)
+            activity.association(agent)
+            activity.set_started_at_time(started_at), activity.set_ended_at_time(ended_at)
+
+        including the types, the qualified nodes and the super-properties and inverse properties the session is
+        configured to write. The triples of batch_size rows are written at a time. Return the number of rows.
+        """
+        if hasattr(columns, "read"):
+            rows = list(csv.reader(columns))
+            columns = OrderedDict((name, [row[i] for row in rows[1:]]) for (i, name) in enumerate(rows[0]))
+        if mapping is None:
+            mapping = dict((role, role) for role in INGEST_ROLES if role in columns)
+        unknown = set(mapping).difference(INGEST_ROLES)
+        if unknown:
+            raise ValueError("unknown ingest roles: %s" % ", ".join(sorted(unknown)))
+        roles = list(mapping)
+        values = [_ingest_column(columns[mapping[role]], role, self) for role in roles]
+        n = len(values[0]) if values else 0
+        if any(len(column) != n for column in values):
+            raise ValueError("the columns of the table differ in length")
+        graph = self.ds if bundle is None else bundle
+        templates = {}
+        for start in range(0, n, batch_size):
+            triples = []
+            for row in zip(*(column[start:start + batch_size] for column in values)):
+                present = tuple(role for (role, value) in zip(roles, row) if value is not None)
+                template = templates.get(present)
+                if template is None:
+                    template = templates[present] = _ingest_template(self, present)
+                (triples_template, blank_nodes) = template
+                substitution = dict((_INGEST_PLACEHOLDERS[role], value) for (role, value) in zip(roles, row)
+                                    if value is not None)
+                for (node, key) in blank_nodes.items():
+                    if self.using_content_ids():
+                        substitution[node] = _content_id(*(substitution.get(term, term) for term in key))
+                    else:
+                        substitution[node] = BNode()
+                triples.extend(tuple(substitution.get(term, term) for term in triple) for triple in triples_template)
+            # rows sharing an activity or agent repeat its type triples, cheaper to drop here than in the store
+            self.write_all(graph, list(OrderedDict.fromkeys(triples)))
+        self.invalidate_indexes()
+        return n
+
+    def merge(self, *sessions):
+        """
+        Add the provenance recorded in the other sessions to this one, bundle by bundle.
+        """
+        for session in sessions:
+            for (prefix, namespace) in session.ds.namespaces():
+                self.ds.bind(prefix, namespace, override=False)
+            default_identifier = session.ds.default_context.identifier
+            for graph in session.ds.contexts():
+                if graph.identifier == default_identifier:
+                    target = self.ds.default_context
+                else:
+                    target = self.ds.graph(graph.identifier)
+                _add_all(target, graph.triples((None, None, None)))
+        self.clear_prefix_cache()
+        self.invalidate_indexes()
+
+
+_EXTENSIONS = {"xml": "rdf", "pretty-xml": "rdf", "turtle": "ttl", "nquads": "nq", "json-ld": "jsonld"}
+
+_QUAD_FORMATS = ("trig", "nquads", "json-ld")
+
+
+def _file_name(identifier, extension):
+    name = quote(str(identifier), safe="")
+    if len(name) > 200:
+        name = sha1(str(identifier).encode("utf-8")).hexdigest()
+    return "%s.%s" % (name, extension)
+
+
+def _export_bundle(path, format, identifier, triples, metadata, namespaces, options):
+    """
+    Write the triples of the bundle identifier and the metadata about it from the default graph to path. Runs in a
+    worker process of export_bundles(); returns identifier and the seconds it took.
+    """
+    start = time.perf_counter()
+    if format in ("nt", "nquads"):
+        with open(path, "wb") as stream:
+            writer = _ChunkedWriter(stream, 65536)
+            for triple in metadata:
+                writer.write(_nt_row(triple).encode("utf-8"))
+            for triple in triples:
+                row = _nq_row(triple, identifier) if format == "nquads" else _nt_row(triple)
+                writer.write(row.encode("utf-8"))
+            writer.flush()
+    else:
+        if format in _QUAD_FORMATS:
+            graph = Dataset()
+            target = graph.graph(identifier)
+        else:
+            graph = target = Graph()
+        for (prefix, namespace) in namespaces:
+            graph.bind(prefix, namespace)
+        _add_all(target, triples)
+        _add_all(graph, metadata)
+        graph.serialize(destination=path, format=format, encoding="UTF-8", **options)
+    return identifier, time.perf_counter() - start
+
+
+INGEST_ROLES = ("entity", "activity", "agent", "used", "generated_at", "used_at", "started_at", "ended_at")
+
+_INGEST_TIMES = ("generated_at", "used_at", "started_at", "ended_at")
+
+# the qualified relations linking a resource to the nodes of the influences ingest_table() writes
+_INFLUENCE_RELATIONS = (PROV.qualifiedGeneration, PROV.qualifiedUsage, PROV.qualifiedAssociation)
+
+# the terms standing in for the values of each role in the triples recorded for a template row
+_INGEST_PLACEHOLDERS = dict(
+    [(role, URIRef("urn:x-kleio-ingest:" + role)) for role in INGEST_ROLES if role not in _INGEST_TIMES] +
+    [(role, Literal(datetime.datetime(1, 1, 1, 0, 0, i), datatype=XSD.dateTime))
+     for (i, role) in enumerate(_INGEST_TIMES)])
+
+
+def _ingest_column(column, role, session):
+    """
+    Return the values of column as the rdflib terms of role, None for missing values.
+    """
+    if getattr(column, "dtype", None) is not None and column.dtype.kind == "M":
+        # datetime64 values only come back as datetime objects at microsecond precision
+        column = column.astype("datetime64[us]")
+    if hasattr(column, "tolist"):
+        column = column.tolist()
+    if role in _INGEST_TIMES:
+        return [None if value is None or value == "" or value != value else
+                value if isinstance(value, Literal) else Literal(value, datatype=XSD.dateTime) for value in column]
+    return [None if value is None or value == "" or value != value else Resource.node(value, session)
+            for value in column]
+
+
+def _ingest_template(session, present):
+    """
+    Record a row with the roles present through the resource classes in a scratch session configured like session.
+    Return the triples written, with the placeholders of the roles in place of their values, and a dict from the
+    blank nodes created for the qualified relations to the subject, relation, influencer and time their content id
+    is made of.
+    """
+    scratch = ProvSession()
+    scratch.config.update(session.config)
+    scratch.config["contentIds"] = False
+    values = dict((role, _INGEST_PLACEHOLDERS[role]) for role in present)
+    with scratch:
+        entity = Entity(values["entity"]) if "entity" in values else None
+        activity = Activity(values["activity"]) if "activity" in values else None
+        agent = Agent(values["agent"]) if "agent" in values else None
+        if entity is not None and activity is not None:
+            entity.generation(activity, datetime=values.get("generated_at"))
+        if activity is not None:
+            if "used" in values:
+                activity.usage(Entity(values["used"]), datetime=values.get("used_at"))
+            if agent is not None:
+                activity.association(agent)
+            if "started_at" in values:
+                activity.set_started_at_time(values["started_at"])
+            if "ended_at" in values:
+                activity.set_ended_at_time(values["ended_at"])
+    triples = list(scratch.ds.triples((None, None, None)))
+    blank_nodes = OrderedDict((o, [s, p, None, None]) for (s, p, o) in triples
+                              if isinstance(o, BNode) and p in _INFLUENCE_RELATIONS)
+    for (s, p, o) in triples:
+        if s in blank_nodes:
+            if p in (PROV.activity, PROV.entity, PROV.agent):
+                blank_nodes[s][2] = o
+            elif p == PROV.atTime:
+                blank_nodes[s][3] = o
+    return triples, blank_nodes
+
+
+class _WriteBuffer(object):
+    """
+    Triples recorded inside a batch(), or by one thread of a thread-safe session, held per target graph until
+    flush(). Pending triples are applied to the graphs while holding lock.
+    """
+
+    def __init__(self, size=None, lock=None, session=None):
+        self.size = size
+        self.lock = lock if lock is not None else threading.RLock()
+        self.session = session
+        self.pending = 0
+        self._graphs = OrderedDict()
+        self._mutex = threading.Lock()
+
+    def _entries(self, graph):
+        try:
+            return self._graphs[id(graph)]
+        except KeyError:
+            entries = self._graphs[id(graph)] = (graph, [], {})
+            return entries
+
+    def add(self, graph, triple, replace=False):
+        with self._mutex:
+            (_, triples, replaced) = self._entries(graph)
+            if replace:
+                replaced[triple[:2]] = len(triples)
+            triples.append(triple)
+            self.pending += 1
+            full = self.size is not None and self.pending >= self.size
+        if full:
+            self.flush()
+
+    def set(self, graph, triple):
+        self.add(graph, triple, replace=True)
+
+    def discard(self, graph=None):
+        """
+        Drop pending triples for graph, or for every graph if graph is None or a ConjunctiveGraph.
+        """
+        with self._mutex:
+            if graph is None or isinstance(graph, ConjunctiveGraph):
+                self._graphs.clear()
+            else:
+                self._graphs.pop(id(graph), None)
+            self.pending = sum(len(triples) for (_, triples, _) in self._graphs.values())
+
+    def pending_triples(self, graph):
+        """
+        Return the pending triples that will be written to graph, or all of them if graph is a ConjunctiveGraph.
+        """
+        with self._mutex:
+            entries = list(self._graphs.values())
+        union = isinstance(graph, ConjunctiveGraph)
+        triples = []
+        for (target, pending, _) in entries:
+            if isinstance(target, ConjunctiveGraph):
+                target = target.default_context
+            if union or target.identifier == graph.identifier:
+                triples.extend(pending)
+        return triples
+
+    def flush(self):
+        """
+        Write all pending triples, one bulk insert per target graph.
+        """
+        with self._mutex:
+            graphs = self._graphs
+            self._graphs = OrderedDict()
+            self.pending = 0
+        if not graphs:
+            return
+        with self.lock:
+            for (graph, triples, replaced) in graphs.values():
+                if self.session is not None and self.session._observers:
+                    if replaced:
+                        triples = [t for (i, t) in enumerate(triples) if replaced.get(t[:2], -1) <= i]
+                    self.session.apply(graph, triples, list(replaced))
+                    continue
+                if replaced:
+                    for (s, p) in replaced:
+                        graph.remove((s, p, None))
+                    triples = [t for (i, t) in enumerate(triples) if replaced.get(t[:2], -1) <= i]
+                _add_all(graph, OrderedDict.fromkeys(triples))
+
+
+class _WalWriter(object):
+    """
+    Appends the changes made to a session's dataset to its write-ahead log and compacts the log once it holds
+    compact_size bytes.
+    """
+
+    def __init__(self, session, log, compact_size):
+        self.session = session
+        self.log = log
+        self.compact_size = compact_size
+
+    def record(self, changes):
+        default = self.session.ds.default_context.identifier
+        self.log.append(b"".join(_patch_row(change, default) for change in changes))
+        if self.compact_size is not None and self.log.size >= self.compact_size:
+            self.session.compact_wal()
+
+
+def _patch_row(change, default=None):
+    """
+    Return the patch row of an (added, s, p, o, graph name) change, without the graph name if it is default.
+    """
+    (added, s, p, o, c) = change
+    row = _nt_row((s, p, o)) if c == default else _nq_row((s, p, o), c)
+    return (("A " if added else "D ") + row).encode("utf-8")
+
+
+def _replay(dataset, groups):
+    """
+    Apply the groups of patch rows read from a write-ahead log to dataset. Replaying changes that are already in the
+    dataset leaves it as it is, as every row only sets whether one quad is present.
+    """
+    parser = parallel._ChunkParser("")
+    graphs = {None: dataset.default_context}
+    named = dataset.graph if isinstance(dataset, Dataset) else dataset.get_context
+    for lines in groups:
+        added = []
+        for line in lines:
+            parser.quads = []
+            parser.parse_lines(line[2:])
+            (s, p, o, c) = parser.quads[0]
+            graph = graphs.get(c)
+            if graph is None:
+                graph = graphs[c] = named(c)
+            if line.startswith(b"A"):
+                added.append((s, p, o, graph))
+            else:
+                if added:
+                    dataset.addN(added)
+                    added = []
+                dataset.remove((s, p, o, graph))
+        if added:
+            dataset.addN(added)
+
+
+class _ChangeLog(object):
+    """
+    Append-only log of the quads added to and removed from a session's dataset, as (added, s, p, o, graph name)
+    entries. Positions in the log, checkpoints, count every entry ever appended, including truncated ones.
+    """
+
+    def __init__(self):
+        self.start = 0
+        self._entries = []
+        self._mutex = threading.Lock()
+
+    @property
+    def end(self):
+        return self.start + len(self._entries)
+
+    def record(self, changes):
+        with self._mutex:
+            self._entries.extend(changes)
+
+    def since(self, checkpoint):
+        """
+        Return the entries after checkpoint and the checkpoint at their end.
+        """
+        with self._mutex:
+            if checkpoint < self.start:
+                raise ValueError("changes before checkpoint %d have been discarded" % self.start)
+            return self._entries[checkpoint - self.start:], self.end
+
+    def truncate(self, checkpoint):
+        with self._mutex:
+            checkpoint = max(self.start, min(checkpoint, self.end))
+            del self._entries[:checkpoint - self.start]
+            self.start = checkpoint
+
+
+class _MemberIndex(object):
+    """
+    The members of each collection, per graph. A collection's members are read from the store the first time they are
+    asked for and then kept up to date by Collection.set_had_member, so counts and membership tests do not scan the
+    store. Members recorded inside a pending batch are already counted.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self._members = {}
+        self._mutex = threading.Lock()
+
+    def members(self, graph, collection):
+        """
+        Return the set of members of collection in graph. The set must not be modified.
+        """
+        key = (graph.identifier, collection)
+        members = self._members.get(key)
+        if members is None:
+            with self.session.synchronized(), self._mutex:
+                members = self._members.get(key)
+                if members is None:
+                    members = set(graph.objects(collection, PROV.hadMember))
+                    if self.session._batch is not None:
+                        members.update(o for (s, p, o) in self.session._batch.pending_triples(graph)
+                                       if s == collection and p == PROV.hadMember)
+                    self._members[key] = members
+        return members
+
+    def add(self, graph, collection, member):
+        """
+        Record member as a member of collection in graph, and in the union graph of the session's dataset.
+        """
+        identifiers = {graph.identifier, self.session.ds.identifier}
+        if isinstance(graph, ConjunctiveGraph):
+            identifiers.add(graph.default_context.identifier)
+        with self._mutex:
+            for identifier in identifiers:
+                members = self._members.get((identifier, collection))
+                if members is not None:
+                    members.add(member)
+
+    def invalidate(self, graph=None):
+        with self._mutex:
+            if graph is None or isinstance(graph, ConjunctiveGraph):
+                self._members.clear()
+            else:
+                stale = (graph.identifier, self.session.ds.identifier)
+                for key in [key for key in self._members if key[0] in stale]:
+                    del self._members[key]
+
+
+class _ReachabilityIndex(object):
+    """
+    The derivation edges of a session's dataset, read from the store on first use and then kept up to date by the
+    Entity derivation setters. The ancestor and descendant sets computed by queries are cached, reusing the cached
+    sets of the nodes they reach. Adding an edge only drops the cached sets it changes: the ancestors of the derived
+    entity and of everything derived from it, and the descendants of the source and of everything it was derived
+    from. An edge between nodes that were already connected changes nothing.
+    """
+
+    def __init__(self, session, cache_size=65536):
+        self.session = session
+        self.cache_size = cache_size
+        self._parents = None
+        self._children = None
+        self._ancestors = {}
+        self._descendants = {}
+        self._mutex = threading.RLock()
+
+    def _load(self):
+        if self._parents is not None:
+            return
+        with self.session.synchronized(), self._mutex:
+            if self._parents is not None:
+                return
+            parents = {}
+            children = {}
+            edges = [self.session.ds.subject_objects(relation) for relation in DERIVATION_RELATIONS]
+            if self.session._batch is not None:
+                edges.append((s, o) for (s, p, o) in self.session._batch.pending_triples(self.session.ds)
+                             if p in DERIVATION_RELATIONS)
+            for pairs in edges:
+                for (entity, source) in pairs:
+                    parents.setdefault(entity, set()).add(source)
+                    children.setdefault(source, set()).add(entity)
+            self._children = children
+            self._parents = parents
+
+    def add(self, entity, source):
+        """
+        Record that entity was derived from source.
+        """
+        if not self.session.using_reachability_index():
+            return
+        with self._mutex:
+            if self._parents is None:
+                return
+            sources = self._parents.setdefault(entity, set())
+            if source in sources:
+                return
+            sources.add(source)
+            self._children.setdefault(source, set()).add(entity)
+            if source in self._ancestors.get(entity, ()):
+                return
+            self._ancestors = dict((n, nodes) for (n, nodes) in self._ancestors.items()
+                                   if n != entity and entity not in nodes)
+            self._descendants = dict((n, nodes) for (n, nodes) in self._descendants.items()
+                                     if n != source and source not in nodes)
+
+    def ancestors(self, node):
+        self._load()
+        with self._mutex:
+            return self._closure(node, self._parents, self._ancestors)
+
+    def descendants(self, node):
+        self._load()
+        with self._mutex:
+            return self._closure(node, self._children, self._descendants)
+
+    def _closure(self, node, edges, cache):
+        closure = cache.get(node)
+        if closure is not None:
+            return closure
+        seen = set()
+        stack = list(edges.get(node, ()))
+        while stack:
+            n = stack.pop()
+            if n in seen:
+                continue
+            seen.add(n)
+            cached = cache.get(n)
+            if cached is not None:
+                seen.update(cached)
+            else:
+                stack.extend(edges.get(n, ()))
+        seen.discard(node)
+        if len(cache) >= self.cache_size:
+            cache.clear()
+        closure = cache[node] = frozenset(seen)
+        return closure
+
+    def invalidate(self):
+        with self._mutex:
+            self._parents = None
+            self._children = None
+            self._ancestors = {}
+            self._descendants = {}
+
+
+class _TemporalIndex(object):
+    """
+    The values of the PROV time properties of a session's dataset, read from the store on first use and then kept up
+    to date by the time setters. The values of each property are kept as a list of (microseconds since the epoch in
+    UTC, node) pairs sorted by time. New values are appended to a separate list, which is sorted into the main list
+    when the property is next queried. Values replaced through set() are dropped at the same time. Queries work on
+    the sorted list of the moment, which is not modified afterwards, so their results can be consumed lazily.
+    Times without a time zone are taken to be UTC.
+    """
+
+    def __init__(self, session, transient=False):
+        self.session = session
+        self.transient = transient
+        self._events = None
+        self._pending = {}
+        self._current = {}
+        self._replaced = {}
+        self._mutex = threading.RLock()
+
+    def _load(self):
+        if self._events is not None:
+            return
+        with self.session.synchronized(), self._mutex:
+            if self._events is not None:
+                return
+            events = dict((prop, []) for prop in TIME_PROPERTIES)
+            current = dict((prop, {}) for prop in TIME_PROPERTIES)
+            triples = [self.session.ds.triples((None, prop, None)) for prop in TIME_PROPERTIES]
+            if self.session._batch is not None:
+                triples.append(t for t in self.session._batch.pending_triples(self.session.ds) if t[1] in events)
+            for rows in triples:
+                for (node, prop, value) in rows:
+                    instant = _instant(value)
+                    if instant is not None:
+                        events[prop].append((instant, node))
+                        current[prop][node] = instant
+            for prop in TIME_PROPERTIES:
+                events[prop].sort()
+                self._pending[prop] = []
+                self._replaced[prop] = len(events[prop]) - len(current[prop])
+            self._current = current
+            self._events = events
+
+    def add(self, prop, node, value, replace=True):
+        """
+        Record that node has value as prop, replacing its earlier values if replace is set.
+        """
+        if not self.transient and not self.session.using_temporal_index():
+            return
+        instant = _instant(value)
+        with self._mutex:
+            if self._events is None or instant is None:
+                return
+            current = self._current[prop]
+            if node in current:
+                self._replaced[prop] += 1
+            if replace:
+                current[node] = instant
+            else:
+                current[node] = max(instant, current.get(node, instant))
+            self._pending[prop].append((instant, node))
+
+    def events(self, prop):
+        """
+        Return the sorted list of (time, node) values of prop and the resource class of its subjects.
+        """
+        self._load()
+        with self._mutex:
+            pending = self._pending[prop]
+            events = self._events[prop]
+            if pending:
+                pending.sort()
+                events = sorted(events + pending) if events and pending[0] < events[-1] else events + pending
+                self._pending[prop] = []
+            if self._replaced[prop] and prop != PROV.atTime:
+                current = self._current[prop]
+                events = [(instant, node) for (instant, node) in events if current.get(node) == instant]
+                self._replaced[prop] = 0
+            self._events[prop] = events
+            return events, TIME_PROPERTIES[prop]
+
+    def current(self, prop):
+        """
+        Return a copy of the dict of the latest value of prop per node.
+        """
+        self._load()
+        with self._mutex:
+            return dict(self._current[prop])
+
+    def invalidate(self):
+        with self._mutex:
+            self._events = None
+            self._pending = {}
+            self._current = {}
+            self._replaced = {}
+
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+# the namespace of the name-based UUIDs of content-addressed influences
+_INFLUENCE_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://github.com/tetherless-world/kleio#influence")
+
+
+def _content_id(subject, relation, influencer, datetime=None, *qualifiers, session=None):
+    """
+    Return the urn:uuid IRI naming the influence of influencer on subject through relation at datetime with the
+    qualifiers, e.g. a role. Missing values are None; resources may be given as resources, terms or CURIEs.
+    """
+    def term(value):
+        if value is None:
+            return ""
+        if isinstance(value, rdflib.resource.Resource):
+            value = value.identifier
+        if not isinstance(value, (URIRef, BNode, Literal)):
+            value = Resource.node(value, session)
+        return value.n3()
+
+    parts = [term(subject), term(relation), term(influencer)]
+    if datetime is not None:
+        instant = _instant(datetime)
+        parts.append(str(datetime) if instant is None else str(instant))
+    else:
+        parts.append("")
+    parts.extend(term(qualifier) for qualifier in qualifiers)
+    while parts[-1] == "":
+        parts.pop()
+    return URIRef(uuid.uuid5(_INFLUENCE_NAMESPACE, "\n".join(parts)).urn)
+
+# the int64 NumPy reads as NaT
+_NAT = -2 ** 63
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("event_table() and timings() need NumPy, install kleio[numpy]")
+    return numpy
+
+
+def _instant(value):
+    """
+    Return the xsd:dateTime literal, datetime, date or lexical form value as microseconds since the epoch in UTC,
+    or None if it is not a valid time.
+    """
+    if not isinstance(value, (datetime.date, Literal)):
+        value = Literal(value, datatype=XSD.dateTime)
+    if isinstance(value, Literal):
+        value = value.toPython()
+    if not isinstance(value, datetime.datetime):
+        if not isinstance(value, datetime.date):
+            return None
+        value = datetime.datetime(value.year, value.month, value.day)
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // datetime.timedelta(microseconds=1)
+
+
+class _Unlocked(object):
+    """
+    No-op context manager standing in for the read lock of sessions that are not thread-safe.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_unlocked = _Unlocked()
+
+# number of values lazy readers take from the store per acquisition of the session lock
+_PAGE_SIZE = 1024
+
+
+def _paged(guard, rows, convert=None, page_size=_PAGE_SIZE):
+    """
+    Generate the items of the iterator rows, converted with convert if given. The iterator is advanced page_size
+    items at a time inside the context manager returned by guard(), e.g. session.reading, which is left again before
+    the page is yielded, so a suspended generator never holds the session lock.
+    """
+    while True:
+        with guard():
+            page = list(islice(rows, page_size))
+            if convert is not None:
+                page = [convert(row) for row in page]
+        for item in page:
+            yield item
+        if len(page) < page_size:
+            return
+
+
+def _add_all(graph, triples):
+    """
+    Insert triples into graph with a single addN call.
+    """
+    if isinstance(graph, ConjunctiveGraph):
+        context = graph.default_context
+    else:
+        context = graph
+    graph.addN((s, p, o, context) for (s, p, o) in triples)
+
+
+_sessions = weakref.WeakValueDictionary()
+
+_local = threading.local()
+
+
+def _session_stack():
+    try:
+        return _local.sessions
+    except AttributeError:
+        _local.sessions = []
+        return _local.sessions
+
+
+def current_session():
+    """
+    Return the session of the innermost 'with session:' block in this thread, or the default session.
+    """
+    stack = _session_stack()
+    return stack[-1] if stack else _default_session
+
+
+def _session_for(graph):
+    """
+    Return the session owning the store of graph, or the current session for graphs created outside kleio.
+    """
+    return _sessions.get(id(graph.store)) or current_session()
+
+
+_default_session = ProvSession()
+
+ds = _default_session.ds
+default_graph = ds
+config = _default_session.config
+
 
 def set_use_inverse_properties(flag=False):
-    config["useInverseProperties"] = flag
+    current_session().set_use_inverse_properties(flag)
 
 
 def set_assert_super_properties(flag=False):
-    config["assertSuperProperties"] = flag
+    current_session().set_assert_super_properties(flag)
+
+
+def set_reachability_index(flag=False):
+    current_session().set_reachability_index(flag)
+
+
+def set_virtual_inference(flag=False):
+    current_session().set_virtual_inference(flag)
 
 
 def using_inverse_properties():
-    return config["useInverseProperties"]
+    return current_session().using_inverse_properties()
 
 
 def asserting_super_properties():
-    return config["assertSuperProperties"]
+    return current_session().asserting_super_properties()
+
+
+def using_reachability_index():
+    return current_session().using_reachability_index()
+
+
+def using_virtual_inference():
+    return current_session().using_virtual_inference()
+
+
+def set_change_log(flag=True):
+    current_session().set_change_log(flag)
+
+
+def using_change_log():
+    return current_session().using_change_log()
+
+
+def checkpoint():
+    """
+    Return the position of the end of the change log of the current session.
+    """
+    return current_session().checkpoint()
+
+
+def export_delta(stream, since=0, format="patch", removed=None):
+    """
+    Write the changes logged in the current session after the checkpoint since to the binary stream and return the
+    checkpoint they were written up to. See ProvSession.export_delta.
+    """
+    return current_session().export_delta(stream, since, format, removed)
+
+
+def discard_changes(until):
+    """
+    Drop the changes logged in the current session up to the checkpoint until.
+    """
+    current_session().discard_changes(until)
+
+
+def open_wal(path, fsync="interval", interval=1.0, compact_size=None):
+    """
+    Replay the write-ahead log at path into the current session and log its changes from now on.
+    """
+    current_session().open_wal(path, fsync, interval, compact_size)
+
 
+def compact_wal():
+    current_session().compact_wal()
 
-def clear_graph(bundle=default_graph):
-    bundle.remove((None, None, None))
 
+def close_wal():
+    current_session().close_wal()
+
+
+def export_bundles(directory, format="trig", workers=None, bundles=None):
+    """
+    Write each bundle of the current session, with the statements the default graph makes about it, to a file of its
+    own in directory, in a pool of worker processes. Return the path and seconds taken per bundle.
+    """
+    return current_session().export_bundles(directory, format, workers, bundles)
+
+
+def configure_store(store="default", configuration=None, create=True):
+    """
+    Back the dataset of the current session, and the bundles created with bundle() afterwards, with the rdflib store
+    plugin 'store'. See ProvSession.configure_store. Returns the new dataset.
+    """
+    global ds, default_graph
+    session = current_session()
+    dataset = session.configure_store(store, configuration, create)
+    if session is _default_session:
+        ds = default_graph = dataset
+    return dataset
+
+
+def commit():
+    """
+    Commit pending changes to a transactional store.
+    """
+    current_session().commit()
+
+
+def rollback():
+    """
+    Roll back the changes made since the last commit to a transactional store.
+    """
+    current_session().rollback()
+
+
+def transaction():
+    """
+    Commit the changes made in the block, or roll them back if the block raises.
+    """
+    return current_session().transaction()
 
-def serialize(format="xml", bundle=default_graph):
-    if format == "json-ld":
-        return bundle.serialize(format='json-ld', context=context, indent=2).decode()
-    elif format == "nt":
-        return bundle.serialize(format='nt').decode()
+
+def batch(size=None):
+    """
+    Buffer the triples written in the current session and insert them with a single bulk write per graph on exit.
+    See ProvSession.batch.
+    """
+    return current_session().batch(size)
+
+
+def _bundle_or_default(bundle):
+    return current_session().ds if bundle is None else bundle
+
+
+def save_snapshot(path):
+    """
+    Write all bundles and namespace bindings of the current session to a binary snapshot at path.
+    """
+    current_session().save_snapshot(path)
+
+
+def load_snapshot(path):
+    """
+    Add the bundles and namespace bindings of the binary snapshot at path to the current session.
+    """
+    current_session().load_snapshot(path)
+
+
+def load_parallel(path, format="nquads", workers=None, bundle=None):
+    """
+    Parse the N-Triples or N-Quads file at path in a pool of worker processes and add it to the current session.
+    """
+    session = current_session() if bundle is None else _session_for(bundle)
+    session.load_parallel(path, format, workers, bundle)
+
+
+def clear_graph(bundle=None):
+    if bundle is None:
+        current_session().clear_graph()
     else:
-        return bundle.serialize(format=format, encoding="UTF-8").decode(encoding="UTF-8")
+        _session_for(bundle).clear_graph(bundle)
+
+
+def serialize(format="xml", bundle=None, infer=False):
+    bundle = _bundle_or_default(bundle)
+    if infer:
+        bundle = expand(bundle)
+    with _session_for(bundle).synchronized():
+        if format == "json-ld":
+            return bundle.serialize(format='json-ld', context=context, indent=2).decode()
+        elif format == "nt":
+            return "".join(iter_serialize(format, bundle))
+        else:
+            return bundle.serialize(format=format, encoding="UTF-8").decode(encoding="UTF-8")
+
+
+def serialize_to(stream, format="xml", bundle=None, chunk_size=65536, infer=False):
+    """
+    Write the serialization of bundle to a binary file-like stream without building the document in memory.
+    N-Triples and N-Quads are written line by line from the store, other formats are passed on to the stream in
+    chunks of about chunk_size bytes. With infer=True the triples derived by virtual inference are included.
+    """
+    bundle = _bundle_or_default(bundle)
+    if infer and format not in ("nt", "nquads"):
+        bundle = expand(bundle)
+        infer = False
+    writer = _ChunkedWriter(stream, chunk_size)
+    with _session_for(bundle).synchronized():
+        if format in ("nt", "nquads"):
+            for line in iter_serialize(format, bundle, infer):
+                writer.write(line.encode("utf-8"))
+        elif format == "json-ld":
+            bundle.serialize(destination=writer, format='json-ld', context=context, indent=2)
+        else:
+            bundle.serialize(destination=writer, format=format, encoding="UTF-8")
+    writer.flush()
+
+
+_NT_ESCAPES = {ord("\\"): "\\\\", ord('"'): '\\"', ord("\n"): "\\n", ord("\r"): "\\r"}
+
+
+def _nt_term(term):
+    """
+    Return the N-Triples form of an rdflib term.
+    """
+    if isinstance(term, Literal):
+        value = '"%s"' % str(term).translate(_NT_ESCAPES)
+        if term.language:
+            return "%s@%s" % (value, term.language)
+        if term.datatype is not None:
+            return "%s^^<%s>" % (value, term.datatype)
+        return value
+    return term.n3()
+
+
+def _nt_row(triple):
+    return "%s %s %s .\n" % tuple(_nt_term(term) for term in triple)
+
+
+def _nq_row(triple, context):
+    if isinstance(context, Graph):
+        context = context.identifier
+    return "%s %s %s %s .\n" % (tuple(_nt_term(term) for term in triple) + (_nt_term(context),))
+
+
+def iter_serialize(format="nt", bundle=None, infer=False):
+    """
+    Generate the N-Triples ("nt") or N-Quads ("nquads") serialization of bundle one line at a time, read straight
+    from the store. With infer=True each graph is followed by the triples virtual inference derives from it. The
+    store is read in pages under the session lock, which is not held while the generator is suspended; wrap the
+    loop in synchronized() for a consistent view of a dataset other threads are writing to.
+    """
+    if format not in ("nt", "nquads"):
+        raise ValueError("line by line serialization is only available for nt and nquads, not %s" % format)
+    bundle = _bundle_or_default(bundle)
+    session = _session_for(bundle)
+    if format == "nt":
+        triples = _entailed_triples(bundle, session) if infer else bundle.triples((None, None, None))
+        for line in _paged(session.synchronized, triples, _nt_row):
+            yield line
+        return
+    with session.synchronized():
+        graphs = list(bundle.contexts()) if isinstance(bundle, ConjunctiveGraph) else [bundle]
+    for graph in graphs:
+        triples = _entailed_triples(graph, session) if infer else graph.triples((None, None, None))
+        for line in _paged(session.synchronized, triples, lambda triple: _nq_row(triple, graph.identifier)):
+            yield line
+
+
+def _inferred_objects(graph, subject, rules):
+    """
+    Generate the distinct objects of subject for the properties of rules, and the subjects pointing at it through
+    their inverse properties.
+    """
+    (properties, inverses) = rules
+    seen = set()
+    for p in properties:
+        for o in graph.objects(subject, p):
+            if o not in seen:
+                seen.add(o)
+                yield o
+    for p in inverses:
+        for s in graph.subjects(p, subject):
+            if s not in seen:
+                seen.add(s)
+                yield s
+
+
+def _entailed_triples(graph, session):
+    """
+    Generate the triples of graph followed by those its session's settings entail, without duplicates.
+    """
+    for triple in graph.triples((None, None, None)):
+        yield triple
+    seen = set()
+    for triple in graph.triples((None, None, None)):
+        for entailed in session.entailed(triple)[1:]:
+            if entailed not in seen and entailed not in graph:
+                seen.add(entailed)
+                yield entailed
+
+
+def expand(bundle=None):
+    """
+    Return an in-memory copy of bundle, the current session's dataset by default, with the super-properties and
+    inverse properties selected by assertSuperProperties and useInverseProperties added. See set_virtual_inference.
+    """
+    bundle = _bundle_or_default(bundle)
+    session = _session_for(bundle)
+    with session.synchronized():
+        if isinstance(bundle, ConjunctiveGraph):
+            expanded = Dataset(default_union=True)
+            default_identifier = bundle.default_context.identifier
+            for graph in bundle.contexts():
+                if graph.identifier == default_identifier:
+                    target = expanded.default_context
+                else:
+                    target = expanded.graph(graph.identifier)
+                _add_all(target, _entailed_triples(graph, session))
+        else:
+            expanded = Graph(identifier=bundle.identifier)
+            _add_all(expanded, _entailed_triples(bundle, session))
+        for (prefix, namespace) in bundle.namespaces():
+            expanded.bind(prefix, namespace)
+    return expanded
+
+
+class _ChunkedWriter(object):
+    """
+    Binary file-like wrapper passing many small writes on to stream as chunks of about size bytes.
+    """
+
+    def __init__(self, stream, size):
+        self.stream = stream
+        self.size = size
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= self.size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.stream.write(bytes(self.buffer))
+            del self.buffer[:]
+
+
+class _NpyColumn(object):
+    """
+    Writes a one-dimensional int64 array to a NumPy .npy file as the values are appended, in chunks. The header is
+    written with room for any length first and rewritten with the actual length on close.
+    """
+
+    HEADER_SIZE = 128
+
+    def __init__(self, path, chunk_size=65536):
+        self.stream = open(path, "wb")
+        self.stream.write(self._header(0))
+        self.chunk_size = chunk_size
+        self.buffer = array("q")
+        self.length = 0
+
+    def _header(self, length):
+        header = "{'descr': '<i8', 'fortran_order': False, 'shape': (%d,), }" % length
+        prefix = b"\x93NUMPY\x01\x00" + struct.pack("<H", self.HEADER_SIZE - 10)
+        return prefix + header.ljust(self.HEADER_SIZE - 11).encode("latin1") + b"\n"
+
+    def append(self, value):
+        self.buffer.append(value)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if sys.byteorder != "little":
+            self.buffer.byteswap()
+        self.stream.write(self.buffer.tobytes())
+        self.length += len(self.buffer)
+        self.buffer = array("q")
+
+    def close(self):
+        self.flush()
+        self.stream.seek(0)
+        self.stream.write(self._header(self.length))
+        self.stream.close()
 
 
 def ns(prefix, namespace):
-    ns_obj = Namespace(namespace)
-    ds.namespace_manager.bind(prefix, ns_obj)
-    return ns_obj
+    return current_session().ns(prefix, namespace)
 
 
 def _absolutize(uri):
-    if ":" in uri:
-        (prefix, qname) = uri.split(":")
-        for (p, ns) in ds.namespace_manager.namespaces():
-            if prefix == p:
-                uri = ns + qname
-                break
-    return uri
+    """
+    Expand a CURIE using the prefixes bound with ns(); any other id is returned unchanged.
+    """
+    return current_session().absolutize(uri)
+
+
+_type_table = {}
+
+
+def _prov_types(cls):
+    """
+    Return the PROV types asserted for instances of cls, from the rdf_type declared by each class in its hierarchy.
+    """
+    try:
+        return _type_table[cls]
+    except KeyError:
+        types = tuple(c.__dict__["rdf_type"] for c in reversed(cls.__mro__) if c.__dict__.get("rdf_type") is not None)
+        _type_table[cls] = types
+        return types
 
 
 def bundle_entity(bundle):
@@ -77,10 +2060,7 @@ def bundle_entity(bundle):
 
 
 def bundle(id):
-    uri = URIRef(_absolutize(id))
-    b = ds.graph(identifier=uri)
-    Bundle(id=uri, bundle=b)
-    return b
+    return current_session().bundle(id)
 
 
 class Resource(rdflib.resource.Resource):
@@ -89,40 +2069,167 @@ class Resource(rdflib.resource.Resource):
     Role
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(bundle, self.node(id))
+    rdf_type = None
+
+    def __init__(self, id=None, bundle=None):
+        bundle = _bundle_or_default(bundle)
+        self._session = _session_for(bundle)
+        super().__init__(bundle, self.node(id, self._session))
+        types = _prov_types(type(self))
+        if types:
+            self._session.write_all(self.graph, [(self.identifier, RDF.type, rdf_type) for rdf_type in types])
+
+    @property
+    def session(self):
+        """
+        The ProvSession this resource is recorded in.
+        """
+        try:
+            return self._session
+        except AttributeError:
+            self._session = _session_for(self.graph)
+            return self._session
+
+    def _influence_id(self, id, relation, influencer, datetime=None, *qualifiers):
+        """
+        Return id, or if it is None and the session uses content ids, the content-addressed id of the influence of
+        influencer on this resource through the qualified relation.
+        """
+        if id is not None or not self.session.using_content_ids():
+            return id
+        return _content_id(self.identifier, relation, influencer, datetime, *qualifiers, session=self.session)
 
     @staticmethod
-    def node(id):
+    def node(id, session=None):
         """
-        Factory method returning a URIRef if id is not None and a BNode of id is None.
+        Factory method returning a URIRef if id is not None and a BNode of id is None. CURIE ids are expanded with the
+        prefixes bound with ns() in session, the current session by default; existing URIRef and BNode ids are
+        returned unchanged.
         """
         if id is None:
             return BNode()
+        elif isinstance(id, (URIRef, BNode)):
+            return id
         else:
-            return URIRef(id)
+            return URIRef((session or current_session()).absolutize(id))
 
     @classmethod
-    def ensure_type(cls, resource):
+    def wrap(cls, resource, bundle=None):
         """
-        Ensure that resource is of python type 'cls'
+        Return resource as an object of python type 'cls' without writing anything to the graph.
         """
-        if not isinstance(resource, cls):
-            return cls(resource)
-        else:
+        if isinstance(resource, rdflib.resource.Resource):
+            resource = resource.identifier
+        bundle = _bundle_or_default(bundle)
+        wrapped = cls.__new__(cls)
+        wrapped._session = _session_for(bundle)
+        rdflib.resource.Resource.__init__(wrapped, bundle, cls.node(resource, wrapped._session))
+        return wrapped
+
+    @classmethod
+    def ensure_type(cls, resource, bundle=None):
+        """
+        Ensure that resource is of python type 'cls'. The PROV type of 'cls' is only asserted in bundle if it is not
+        already there.
+        """
+        if isinstance(resource, cls):
             return resource
+        if isinstance(resource, rdflib.resource.Resource):
+            resource = resource.identifier
+        bundle = _bundle_or_default(bundle)
+        session = _session_for(bundle)
+        node = cls.node(resource, session)
+        if cls.rdf_type is None:
+            return cls.wrap(node, bundle)
+        with session.reading():
+            typed = (node, RDF.type, cls.rdf_type) in bundle
+        return cls.wrap(node, bundle) if typed else cls(node, bundle=bundle)
+
+    def add(self, p, o):
+        """
+        Add a (p, o) statement about this resource, buffered if a batch is active.
+        """
+        if isinstance(o, rdflib.resource.Resource):
+            o = o.identifier
+        self.session.write(self.graph, (self.identifier, p, o))
+
+    def set(self, p, o):
+        """
+        Replace all values of p on this resource with o, buffered if a batch is active.
+        """
+        if isinstance(o, rdflib.resource.Resource):
+            o = o.identifier
+        self.session.replace(self.graph, (self.identifier, p, o))
+
+    def value(self, p=RDF.value, o=None, default=None, any=True):
+        with self.session.reading():
+            return super().value(p, o, default, any)
+
+    def _objects(self, prop):
+        """
+        Generate the values of the property 'prop', including those derived by virtual inference.
+        """
+        rules = self.session.inference_rules(prop)
+        if rules is None:
+            return self.graph.objects(self.identifier, prop)
+        return _inferred_objects(self.graph, self.identifier, rules)
 
     def get_resources(self, clz, prop):
         """
         Return a list of values of the property 'prop' as objects of type 'clz'.
         """
-        return [clz.ensure_type(resource) for resource in self.graph.objects(self.identifier, prop)]
+        with self.session.reading():
+            return [clz.wrap(resource, self.graph) for resource in self._objects(prop)]
+
+    def iter_resources(self, clz, prop):
+        """
+        Generate the values of the property 'prop' as objects of type 'clz', one at a time.
+        """
+        graph = self.graph
+        with self.session.reading():
+            objects = self._objects(prop)
+        return _paged(self.session.reading, objects, lambda resource: clz.wrap(resource, graph))
 
     def get_literals(self, prop):
         """
         Return a list of values of the property 'prop' as python native literals.
         """
-        return [literal.toPython() for literal in self.graph.objects(self.identifier, prop)]
+        with self.session.reading():
+            return [literal.toPython() for literal in self._objects(prop)]
+
+    def iter_literals(self, prop):
+        """
+        Generate the values of the property 'prop' as python native literals, one at a time.
+        """
+        with self.session.reading():
+            objects = self._objects(prop)
+        return _paged(self.session.reading, objects, lambda literal: literal.toPython())
+
+    def count_values(self, prop):
+        """
+        Return the number of values of the property 'prop'.
+        """
+        with self.session.reading():
+            return sum(1 for _ in self._objects(prop))
+
+    def has_value(self, prop, value=None):
+        """
+        Return True if the property 'prop' has the resource 'value', or any value at all if value is None.
+        """
+        if isinstance(value, rdflib.resource.Resource):
+            value = value.identifier
+        elif value is not None:
+            value = self.node(value, self.session)
+        rules = self.session.inference_rules(prop)
+        (properties, inverses) = rules if rules is not None else ((prop,), ())
+        with self.session.reading():
+            for p in properties:
+                for _ in self.graph.triples((self.identifier, p, value)):
+                    return True
+            for p in inverses:
+                for _ in self.graph.triples((value, p, self.identifier)):
+                    return True
+            return False
 
     def set_label(self, label):
         """
@@ -151,19 +2258,17 @@ class Entity(Resource):
     @see: http://www.w3.org/TR/prov-o/#Entity
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Entity)
+    rdf_type = PROV.Entity
 
     def set_was_influenced_by(self, resource):
         """
         Specify the resource that influenced this entity.
         @iri: http://www.w3.org/ns/prov#wasInfluencedBy
         """
-        resource = Resource.ensure_type(resource)
+        resource = Resource.ensure_type(resource, self.graph)
         self.add(PROV.wasInfluencedBy, resource)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             resource.add(PROV.influenced, self)
 
     def get_was_influenced_by(self):
@@ -173,18 +2278,39 @@ class Entity(Resource):
         """
         return self.get_resources(Resource, PROV.wasInfluencedBy)
 
+    def iter_was_influenced_by(self):
+        """
+        Like get_was_influenced_by(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#wasInfluencedBy
+        """
+        return self.iter_resources(Resource, PROV.wasInfluencedBy)
+
+    def count_was_influenced_by(self):
+        """
+        Return the number of values get_was_influenced_by() would return.
+        @iri: http://www.w3.org/ns/prov#wasInfluencedBy
+        """
+        return self.count_values(PROV.wasInfluencedBy)
+
+    def has_was_influenced_by(self, value=None):
+        """
+        Return True if get_was_influenced_by() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#wasInfluencedBy
+        """
+        return self.has_value(PROV.wasInfluencedBy, value)
+
     def set_was_attributed_to(self, agent):
         """
         Specify the agent this entity was attributed to.
         @iri: http://www.w3.org/ns/prov#wasAttributedTo
         """
-        agent = Agent.ensure_type(agent)
+        agent = Agent.ensure_type(agent, self.graph)
         self.add(PROV.wasAttributedTo, agent)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_influenced_by(agent)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             agent.add(PROV.contributed, self)
 
     def get_was_attributed_to(self):
@@ -194,16 +2320,37 @@ class Entity(Resource):
         """
         return self.get_resources(Agent, PROV.wasAttributedTo)
 
+    def iter_was_attributed_to(self):
+        """
+        Like get_was_attributed_to(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#wasAttributedTo
+        """
+        return self.iter_resources(Agent, PROV.wasAttributedTo)
+
+    def count_was_attributed_to(self):
+        """
+        Return the number of values get_was_attributed_to() would return.
+        @iri: http://www.w3.org/ns/prov#wasAttributedTo
+        """
+        return self.count_values(PROV.wasAttributedTo)
+
+    def has_was_attributed_to(self, value=None):
+        """
+        Return True if get_was_attributed_to() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#wasAttributedTo
+        """
+        return self.has_value(PROV.wasAttributedTo, value)
+
     def attribution(self, agent, id=None):
         """
         Specify the agent this entity was attributed to.
         Return attribution relationship which can be used to further qualify the relationship.
         @iri: http://www.w3.org/ns/prov#qualifiedAttribution
         """
-        attribution = Attribution(id)
+        attribution = Attribution(self._influence_id(id, PROV.qualifiedAttribution, agent), bundle=self.graph)
         self.add(PROV.qualifiedAttribution, attribution)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             attribution.add(PROV.qualifiedAttributionOf, self)
 
         attribution.set_agent(agent)
@@ -217,18 +2364,39 @@ class Entity(Resource):
         """
         return self.get_resources(Attribution, PROV.qualifiedAttribution)
 
+    def iter_attribution(self):
+        """
+        Like get_attribution(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#qualifiedAttribution
+        """
+        return self.iter_resources(Attribution, PROV.qualifiedAttribution)
+
+    def count_attribution(self):
+        """
+        Return the number of values get_attribution() would return.
+        @iri: http://www.w3.org/ns/prov#qualifiedAttribution
+        """
+        return self.count_values(PROV.qualifiedAttribution)
+
+    def has_attribution(self, value=None):
+        """
+        Return True if get_attribution() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#qualifiedAttribution
+        """
+        return self.has_value(PROV.qualifiedAttribution, value)
+
     def set_was_generated_by(self, activity):
         """
         Specify the activity that generated this agent.
         @iri: http://www.w3.org/ns/prov#wasGeneratedBy
         """
-        activity = Activity.ensure_type(activity)
+        activity = Activity.ensure_type(activity, self.graph)
         self.add(PROV.wasGeneratedBy, activity)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_influenced_by(activity)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             activity.add(PROV.generated, self)
 
     def get_was_generated_by(self):
@@ -238,15 +2406,37 @@ class Entity(Resource):
         """
         return self.get_resources(Activity, PROV.wasGeneratedBy)
 
+    def iter_was_generated_by(self):
+        """
+        Like get_was_generated_by(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#wasGeneratedBy
+        """
+        return self.iter_resources(Activity, PROV.wasGeneratedBy)
+
+    def count_was_generated_by(self):
+        """
+        Return the number of values get_was_generated_by() would return.
+        @iri: http://www.w3.org/ns/prov#wasGeneratedBy
+        """
+        return self.count_values(PROV.wasGeneratedBy)
+
+    def has_was_generated_by(self, value=None):
+        """
+        Return True if get_was_generated_by() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#wasGeneratedBy
+        """
+        return self.has_value(PROV.wasGeneratedBy, value)
+
     def generation(self, activity, id=None, datetime=None, role=None):
         """
         Specify the activity that generated this agent.
         Return generation relationship which can be used to further qualify the relationship.
         @iri: http://www.w3.org/ns/prov#qualifiedGeneration
         """
-        generation = Generation(id)
+        generation = Generation(self._influence_id(id, PROV.qualifiedGeneration, activity, datetime, role),
+                                bundle=self.graph)
         self.add(PROV.qualifiedGeneration, generation)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             generation.add(PROV.qualifiedGenerationOf, self)
         generation.set_activity(activity)
         if datetime is not None:
@@ -263,18 +2453,40 @@ class Entity(Resource):
         """
         return self.get_resources(Generation, PROV.qualifiedGeneration)
 
+    def iter_generation(self):
+        """
+        Like get_generation(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#qualifiedGeneration
+        """
+        return self.iter_resources(Generation, PROV.qualifiedGeneration)
+
+    def count_generation(self):
+        """
+        Return the number of values get_generation() would return.
+        @iri: http://www.w3.org/ns/prov#qualifiedGeneration
+        """
+        return self.count_values(PROV.qualifiedGeneration)
+
+    def has_generation(self, value=None):
+        """
+        Return True if get_generation() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#qualifiedGeneration
+        """
+        return self.has_value(PROV.qualifiedGeneration, value)
+
     def set_was_derived_from(self, entity):
         """
         Specify the entity this entity was derived from.
         @iri: http://www.w3.org/ns/prov#wasDerivedFrom
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.wasDerivedFrom, entity)
+        self.session.reachability_index.add(self.identifier, entity.identifier)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_influenced_by(entity)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             entity.add(PROV.hadDerivation, self)
 
     def get_was_derived_from(self):
@@ -284,15 +2496,56 @@ class Entity(Resource):
         """
         return self.get_resources(Entity, PROV.wasDerivedFrom)
 
+    def iter_was_derived_from(self):
+        """
+        Like get_was_derived_from(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#wasDerivedFrom
+        """
+        return self.iter_resources(Entity, PROV.wasDerivedFrom)
+
+    def count_was_derived_from(self):
+        """
+        Return the number of values get_was_derived_from() would return.
+        @iri: http://www.w3.org/ns/prov#wasDerivedFrom
+        """
+        return self.count_values(PROV.wasDerivedFrom)
+
+    def has_was_derived_from(self, value=None):
+        """
+        Return True if get_was_derived_from() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#wasDerivedFrom
+        """
+        return self.has_value(PROV.wasDerivedFrom, value)
+
+    def get_ancestors(self):
+        """
+        Return all entities this entity was transitively derived from, through wasDerivedFrom, wasRevisionOf,
+        wasQuotedFrom or hadPrimarySource, in any bundle. See set_reachability_index.
+        """
+        return [Entity.wrap(node, self.session.ds) for node in self.session.ancestors(self.identifier)]
+
+    def get_descendants(self):
+        """
+        Return all entities transitively derived from this entity, in any bundle. See set_reachability_index.
+        """
+        return [Entity.wrap(node, self.session.ds) for node in self.session.descendants(self.identifier)]
+
+    def has_ancestor(self, entity):
+        """
+        Return True if this entity was transitively derived from entity.
+        """
+        node = Entity.node(entity.identifier if isinstance(entity, Resource) else entity, self.session)
+        return node in self.session.ancestors(self.identifier)
+
     def derivation(self, entity, id=None):
         """
         Specify the entity this entity was derived from.
         Return derivation relationship which can be used to further qualify the relationship.
         @iri: http://www.w3.org/ns/prov#qualifiedDerivation
         """
-        derivation = Derivation(id)
+        derivation = Derivation(self._influence_id(id, PROV.qualifiedDerivation, entity), bundle=self.graph)
         self.add(PROV.qualifiedDerivation, derivation)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             derivation.add(PROV.qualifiedDerivationOf, self)
         derivation.set_entity(entity)
         self.set_was_derived_from(entity)
@@ -303,20 +2556,42 @@ class Entity(Resource):
         Return all Derivation relationships of this entity.
         @iri: http://www.w3.org/ns/prov#qualifiedDerivation
         """
-        return self.get_resources(Derivation, PROV.qualifiedGeneration)
+        return self.get_resources(Derivation, PROV.qualifiedDerivation)
+
+    def iter_derivation(self):
+        """
+        Like get_derivation(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#qualifiedDerivation
+        """
+        return self.iter_resources(Derivation, PROV.qualifiedDerivation)
+
+    def count_derivation(self):
+        """
+        Return the number of values get_derivation() would return.
+        @iri: http://www.w3.org/ns/prov#qualifiedDerivation
+        """
+        return self.count_values(PROV.qualifiedDerivation)
+
+    def has_derivation(self, value=None):
+        """
+        Return True if get_derivation() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#qualifiedDerivation
+        """
+        return self.has_value(PROV.qualifiedDerivation, value)
 
     def set_was_revision_of(self, entity):
         """
         Specify the entity this entity was a revision of.
         @iri: http://www.w3.org/ns/prov#wasRevisionOf
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.wasRevisionOf, entity)
+        self.session.reachability_index.add(self.identifier, entity.identifier)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_derived_from(entity)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             entity.add(PROV.hadRevision, self)
 
     def get_was_revision_of(self):
@@ -326,17 +2601,38 @@ class Entity(Resource):
         """
         return self.get_resources(Entity, PROV.wasRevisionOf)
 
+    def iter_was_revision_of(self):
+        """
+        Like get_was_revision_of(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#wasRevisionOf
+        """
+        return self.iter_resources(Entity, PROV.wasRevisionOf)
+
+    def count_was_revision_of(self):
+        """
+        Return the number of values get_was_revision_of() would return.
+        @iri: http://www.w3.org/ns/prov#wasRevisionOf
+        """
+        return self.count_values(PROV.wasRevisionOf)
+
+    def has_was_revision_of(self, value=None):
+        """
+        Return True if get_was_revision_of() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#wasRevisionOf
+        """
+        return self.has_value(PROV.wasRevisionOf, value)
+
     def revision(self, entity, id=None):
         """
         Specify the entity this entity was a revision of.
         Return revision relationship which can be used to further qualify the relationship.
         @iri: http://www.w3.org/ns/prov#qualifiedRevision
         """
-        entity = Entity.ensure_type(entity)
-        revision = Revision(id)
+        entity = Entity.ensure_type(entity, self.graph)
+        revision = Revision(self._influence_id(id, PROV.qualifiedRevision, entity), bundle=self.graph)
         revision.set_entity(entity)
         self.add(PROV.qualifiedRevision, revision)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             revision.add(PROV.revisedEntity, self)
         self.set_was_revision_of(entity)
         return revision
@@ -348,26 +2644,69 @@ class Entity(Resource):
         """
         return self.get_resources(Revision, PROV.qualifiedRevision)
 
+    def iter_revision(self):
+        """
+        Like get_revision(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#qualifiedRevision
+        """
+        return self.iter_resources(Revision, PROV.qualifiedRevision)
+
+    def count_revision(self):
+        """
+        Return the number of values get_revision() would return.
+        @iri: http://www.w3.org/ns/prov#qualifiedRevision
+        """
+        return self.count_values(PROV.qualifiedRevision)
+
+    def has_revision(self, value=None):
+        """
+        Return True if get_revision() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#qualifiedRevision
+        """
+        return self.has_value(PROV.qualifiedRevision, value)
+
     def set_was_quoted_from(self, entity):
         """
         Specify the entity this entity was quoted from.
         @iri: http://www.w3.org/ns/prov#wasQuotedFrom
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.wasQuotedFrom, entity)
+        self.session.reachability_index.add(self.identifier, entity.identifier)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_derived_from(entity)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             entity.add(PROV.quotedAs, self)
 
-    def get_was_quoted_from(self):
+    def get_was_quoted_from(self):
+        """
+        Return all entities this entity was quoted from.
+        @iri: http://www.w3.org/ns/prov#wasQuotedFrom
+        """
+        return self.get_resources(Entity, PROV.wasQuotedFrom)
+
+    def iter_was_quoted_from(self):
+        """
+        Like get_was_quoted_from(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#wasQuotedFrom
+        """
+        return self.iter_resources(Entity, PROV.wasQuotedFrom)
+
+    def count_was_quoted_from(self):
+        """
+        Return the number of values get_was_quoted_from() would return.
+        @iri: http://www.w3.org/ns/prov#wasQuotedFrom
+        """
+        return self.count_values(PROV.wasQuotedFrom)
+
+    def has_was_quoted_from(self, value=None):
         """
-        Return all entities this entity was quoted from.
+        Return True if get_was_quoted_from() would return value, or any value if value is None.
         @iri: http://www.w3.org/ns/prov#wasQuotedFrom
         """
-        return self.get_resources(Entity, PROV.wasQuotedFrom)
+        return self.has_value(PROV.wasQuotedFrom, value)
 
     def quotation(self, entity, id=None):
         """
@@ -375,11 +2714,11 @@ class Entity(Resource):
         Return quotation relationship which can be used to further qualify the relationship.
         @iri: http://www.w3.org/ns/prov#qualifiedQuotation
         """
-        entity = Entity.ensure_type(entity)
-        quotation = Quotation(id)
+        entity = Entity.ensure_type(entity, self.graph)
+        quotation = Quotation(self._influence_id(id, PROV.qualifiedQuotation, entity), bundle=self.graph)
         quotation.set_entity(entity)
         self.add(PROV.qualifiedQuotation, quotation)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             quotation.add(PROV.qualifiedQuotationOf, self)
         self.set_was_quoted_from(entity)
         return quotation
@@ -391,18 +2730,40 @@ class Entity(Resource):
         """
         return self.get_resources(Quotation, PROV.qualifiedQuotation)
 
+    def iter_quotation(self):
+        """
+        Like get_quotation(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#qualifiedQuotation
+        """
+        return self.iter_resources(Quotation, PROV.qualifiedQuotation)
+
+    def count_quotation(self):
+        """
+        Return the number of values get_quotation() would return.
+        @iri: http://www.w3.org/ns/prov#qualifiedQuotation
+        """
+        return self.count_values(PROV.qualifiedQuotation)
+
+    def has_quotation(self, value=None):
+        """
+        Return True if get_quotation() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#qualifiedQuotation
+        """
+        return self.has_value(PROV.qualifiedQuotation, value)
+
     def set_had_primary_source(self, entity):
         """
         Specify the primary source of this entity.
         @iri: http://www.w3.org/ns/prov#hadPrimarySource
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.hadPrimarySource, entity)
+        self.session.reachability_index.add(self.identifier, entity.identifier)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_derived_from(entity)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             entity.add(PROV.wasPrimarySourceOf, self)
 
     def get_had_primary_source(self):
@@ -412,17 +2773,39 @@ class Entity(Resource):
         """
         return self.get_resources(Entity, PROV.hadPrimarySource)
 
+    def iter_had_primary_source(self):
+        """
+        Like get_had_primary_source(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#hadPrimarySource
+        """
+        return self.iter_resources(Entity, PROV.hadPrimarySource)
+
+    def count_had_primary_source(self):
+        """
+        Return the number of values get_had_primary_source() would return.
+        @iri: http://www.w3.org/ns/prov#hadPrimarySource
+        """
+        return self.count_values(PROV.hadPrimarySource)
+
+    def has_had_primary_source(self, value=None):
+        """
+        Return True if get_had_primary_source() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#hadPrimarySource
+        """
+        return self.has_value(PROV.hadPrimarySource, value)
+
     def primary_source(self, entity, id=None):
         """
         Specify the primary source of this entity.
         Return primary source relationship which can be used to further qualify the relationship.
         @iri: http://www.w3.org/ns/prov#qualifiedPrimarySource
         """
-        entity = Entity.ensure_type(entity)
-        primary_source = PrimarySource(id)
+        entity = Entity.ensure_type(entity, self.graph)
+        primary_source = PrimarySource(self._influence_id(id, PROV.qualifiedPrimarySource, entity),
+                                       bundle=self.graph)
         primary_source.set_entity(entity)
         self.add(PROV.qualifiedPrimarySource, primary_source)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             primary_source.add(PROV.qualifiedSourceOf, self)
         self.set_had_primary_source(entity)
         return primary_source
@@ -434,18 +2817,39 @@ class Entity(Resource):
         """
         return self.get_resources(PrimarySource, PROV.qualifiedPrimarySource)
 
+    def iter_primary_source(self):
+        """
+        Like get_primary_source(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#qualifiedPrimarySource
+        """
+        return self.iter_resources(PrimarySource, PROV.qualifiedPrimarySource)
+
+    def count_primary_source(self):
+        """
+        Return the number of values get_primary_source() would return.
+        @iri: http://www.w3.org/ns/prov#qualifiedPrimarySource
+        """
+        return self.count_values(PROV.qualifiedPrimarySource)
+
+    def has_primary_source(self, value=None):
+        """
+        Return True if get_primary_source() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#qualifiedPrimarySource
+        """
+        return self.has_value(PROV.qualifiedPrimarySource, value)
+
     def set_was_invalidated_by(self, activity):
         """
         Specify the activity that invalidated this entity.
         @iri: http://www.w3.org/ns/prov#wasInvalidatedBy
         """
-        activity = Activity.ensure_type(activity)
+        activity = Activity.ensure_type(activity, self.graph)
         self.add(PROV.wasInvalidatedBy, activity)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_influenced_by(activity)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             activity.add(PROV.invalidated, self)
 
     def get_was_invalidated_by(self):
@@ -455,19 +2859,41 @@ class Entity(Resource):
         """
         return self.get_resources(Activity, PROV.wasInvalidatedBy)
 
+    def iter_was_invalidated_by(self):
+        """
+        Like get_was_invalidated_by(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#wasInvalidatedBy
+        """
+        return self.iter_resources(Activity, PROV.wasInvalidatedBy)
+
+    def count_was_invalidated_by(self):
+        """
+        Return the number of values get_was_invalidated_by() would return.
+        @iri: http://www.w3.org/ns/prov#wasInvalidatedBy
+        """
+        return self.count_values(PROV.wasInvalidatedBy)
+
+    def has_was_invalidated_by(self, value=None):
+        """
+        Return True if get_was_invalidated_by() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#wasInvalidatedBy
+        """
+        return self.has_value(PROV.wasInvalidatedBy, value)
+
     def invalidation(self, activity, id=None, datetime=None):
         """
         Specify the activity that invalidated this entity.
         Return invalidation relationship which can be used to further qualify the relationship.
         @iri: http://www.w3.org/ns/prov#qualifiedInvalidation
         """
-        activity = Activity.ensure_type(activity)
-        invalidation = Invalidation(id)
+        activity = Activity.ensure_type(activity, self.graph)
+        invalidation = Invalidation(self._influence_id(id, PROV.qualifiedInvalidation, activity, datetime),
+                                    bundle=self.graph)
         invalidation.set_activity(activity)
         if datetime is not None:
             invalidation.set_at_time(datetime)
         self.add(PROV.qualifiedInvalidation, invalidation)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             invalidation.add(PROV.qualifiedInvalidationOf, self)
         self.set_was_invalidated_by(activity)
         return invalidation
@@ -479,14 +2905,36 @@ class Entity(Resource):
         """
         return self.get_resources(Invalidation, PROV.qualifiedInvalidation)
 
+    def iter_invalidation(self):
+        """
+        Like get_invalidation(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#qualifiedInvalidation
+        """
+        return self.iter_resources(Invalidation, PROV.qualifiedInvalidation)
+
+    def count_invalidation(self):
+        """
+        Return the number of values get_invalidation() would return.
+        @iri: http://www.w3.org/ns/prov#qualifiedInvalidation
+        """
+        return self.count_values(PROV.qualifiedInvalidation)
+
+    def has_invalidation(self, value=None):
+        """
+        Return True if get_invalidation() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#qualifiedInvalidation
+        """
+        return self.has_value(PROV.qualifiedInvalidation, value)
+
     def set_alternate_of(self, entity):
         """
         Specify an alternate of this entity.
         @iri: http://www.w3.org/ns/prov#alternateOf
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.alternateOf, entity)
-        entity.add(PROV.alternateOf, self)
+        if not self.session.using_virtual_inference():
+            entity.add(PROV.alternateOf, self)
 
     def get_alternate_of(self):
         """
@@ -495,18 +2943,39 @@ class Entity(Resource):
         """
         return self.get_resources(Entity, PROV.alternateOf)
 
+    def iter_alternate_of(self):
+        """
+        Like get_alternate_of(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#alternateOf
+        """
+        return self.iter_resources(Entity, PROV.alternateOf)
+
+    def count_alternate_of(self):
+        """
+        Return the number of values get_alternate_of() would return.
+        @iri: http://www.w3.org/ns/prov#alternateOf
+        """
+        return self.count_values(PROV.alternateOf)
+
+    def has_alternate_of(self, value=None):
+        """
+        Return True if get_alternate_of() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#alternateOf
+        """
+        return self.has_value(PROV.alternateOf, value)
+
     def set_specialization_of(self, entity):
         """
         Specify an specialization of this entity.
         @iri: http://www.w3.org/ns/prov#specializationOf
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.specializationOf, entity)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_alternate_of(entity)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             entity.add(PROV.generalizationOf, self)
 
     def get_specialization_of(self):
@@ -516,14 +2985,35 @@ class Entity(Resource):
         """
         return self.get_resources(Entity, PROV.specializationOf)
 
+    def iter_specialization_of(self):
+        """
+        Like get_specialization_of(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#specializationOf
+        """
+        return self.iter_resources(Entity, PROV.specializationOf)
+
+    def count_specialization_of(self):
+        """
+        Return the number of values get_specialization_of() would return.
+        @iri: http://www.w3.org/ns/prov#specializationOf
+        """
+        return self.count_values(PROV.specializationOf)
+
+    def has_specialization_of(self, value=None):
+        """
+        Return True if get_specialization_of() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#specializationOf
+        """
+        return self.has_value(PROV.specializationOf, value)
+
     def set_at_location(self, location):
         """
         Specify a location for this entity.
         @iri: http://www.w3.org/ns/prov#atLocation
         """
-        location = Location.ensure_type(location)
+        location = Location.ensure_type(location, self.graph)
         self.add(PROV.atLocation, location)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             location.add(PROV.locationOf, self)
 
     def get_at_location(self):
@@ -533,12 +3023,35 @@ class Entity(Resource):
         """
         return self.get_resources(Location, PROV.atLocation)
 
+    def iter_at_location(self):
+        """
+        Like get_at_location(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#atLocation
+        """
+        return self.iter_resources(Location, PROV.atLocation)
+
+    def count_at_location(self):
+        """
+        Return the number of values get_at_location() would return.
+        @iri: http://www.w3.org/ns/prov#atLocation
+        """
+        return self.count_values(PROV.atLocation)
+
+    def has_at_location(self, value=None):
+        """
+        Return True if get_at_location() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#atLocation
+        """
+        return self.has_value(PROV.atLocation, value)
+
     def set_generated_at_time(self, datetime):
         """
         Specify a generation datetime for this entity.
         @iri: http://www.w3.org/ns/prov#generatedAtTime
         """
-        self.set(PROV.generatedAtTime, Literal(datetime, datatype=XSD.dateTime))
+        value = Literal(datetime, datatype=XSD.dateTime)
+        self.set(PROV.generatedAtTime, value)
+        self.session.temporal_index.add(PROV.generatedAtTime, self.identifier, value)
 
     def get_generated_at_time(self):
         """
@@ -552,7 +3065,9 @@ class Entity(Resource):
         Specify an invalidation datetime for this entity.
         @iri: http://www.w3.org/ns/prov#invalidatedAtTime
         """
-        self.set(PROV.invalidatedAtTime, Literal(datetime, datatype=XSD.dateTime))
+        value = Literal(datetime, datatype=XSD.dateTime)
+        self.set(PROV.invalidatedAtTime, value)
+        self.session.temporal_index.add(PROV.invalidatedAtTime, self.identifier, value)
 
     def get_invalidated_at_time(self):
         """
@@ -584,9 +3099,7 @@ class Bundle(Entity):
     @see: http://www.w3.org/TR/prov-o/#Bundle
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Bundle)
+    rdf_type = PROV.Bundle
 
 
 class Collection(Entity):
@@ -597,22 +3110,21 @@ class Collection(Entity):
     @see: http://www.w3.org/TR/prov-o/#Collection
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Collection)
+    rdf_type = PROV.Collection
 
     def set_had_member(self, entity):
         """
         Specify a member entity of this collection.
         @iri: http://www.w3.org/ns/prov#hadMember
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.hadMember, entity)
+        self.session.member_index.add(self.graph, self.identifier, entity.identifier)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_influenced_by(entity)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             entity.add(PROV.wasMemberOf, self)
 
     def get_had_member(self):
@@ -620,13 +3132,31 @@ class Collection(Entity):
         Return all entities that were members of this collection.
         @iri: http://www.w3.org/ns/prov#hadMember
         """
-        return self.get_resources(Entity, PROV.hadMember)
+        return list(self.iter_members())
+
+    def iter_members(self):
+        """
+        Generate the member entities of this collection one at a time, without building a list.
+        @iri: http://www.w3.org/ns/prov#hadMember
+        """
+        graph = self.graph
+        with self.session.reading():
+            members = graph.objects(self.identifier, PROV.hadMember)
+        return _paged(self.session.reading, members, lambda member: Entity.wrap(member, graph))
+
+    def has_member(self, entity):
+        """
+        Return True if entity is a member of this collection.
+        @iri: http://www.w3.org/ns/prov#hadMember
+        """
+        node = Entity.node(entity.identifier if isinstance(entity, Resource) else entity, self.session)
+        return node in self.session.member_index.members(self.graph, self.identifier)
 
     def get_member_count(self):
         """
         Return a count of the members in this collection.
         """
-        return len(self.graph.objects(self.identifier, PROV.hadMember))
+        return len(self.session.member_index.members(self.graph, self.identifier))
 
 
 class EmptyCollection(Collection):
@@ -636,9 +3166,7 @@ class EmptyCollection(Collection):
     @see: http://www.w3.org/TR/prov-o/#EmptyCollection
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.EmptyCollection)
+    rdf_type = PROV.EmptyCollection
 
     def set_had_member(self, entity):
         """
@@ -660,9 +3188,7 @@ class Plan(Entity):
     @see: http://www.w3.org/TR/prov-o/#Plan
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Plan)
+    rdf_type = PROV.Plan
 
 
 class Location(Resource):
@@ -674,9 +3200,7 @@ class Location(Resource):
     @see: http://www.w3.org/TR/prov-o/#Location
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Location)
+    rdf_type = PROV.Location
 
 
 class Activity(Resource):
@@ -687,16 +3211,14 @@ class Activity(Resource):
     @see: http://www.w3.org/TR/prov-o/#Activity
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Activity)
+    rdf_type = PROV.Activity
 
     def set_influenced(self, entity):
         """
         Specify an entity that was influenced by this activity.
         @iri: http://www.w3.org/ns/prov#influenced
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.influenced, entity)
 
     def get_influenced(self):
@@ -706,6 +3228,27 @@ class Activity(Resource):
         """
         return self.get_resources(Entity, PROV.influenced)
 
+    def iter_influenced(self):
+        """
+        Like get_influenced(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#influenced
+        """
+        return self.iter_resources(Entity, PROV.influenced)
+
+    def count_influenced(self):
+        """
+        Return the number of values get_influenced() would return.
+        @iri: http://www.w3.org/ns/prov#influenced
+        """
+        return self.count_values(PROV.influenced)
+
+    def has_influenced(self, value=None):
+        """
+        Return True if get_influenced() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#influenced
+        """
+        return self.has_value(PROV.influenced, value)
+
     def set_was_influenced_by(self, resource):
         """
         Specify a resource that influenced this activity.
@@ -713,7 +3256,7 @@ class Activity(Resource):
         """
         self.add(PROV.wasInfluencedBy, resource)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             resource.add(PROV.influenced, self)
 
     def get_was_influenced_by(self):
@@ -721,20 +3264,41 @@ class Activity(Resource):
         Return all resources that influenced this activity.
         @iri: http://www.w3.org/ns/prov#wasInfluencedBy
         """
-        return [self.graph.objects(self.identifier, PROV.influenced)]
+        return self.get_resources(Resource, PROV.wasInfluencedBy)
+
+    def iter_was_influenced_by(self):
+        """
+        Like get_was_influenced_by(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#wasInfluencedBy
+        """
+        return self.iter_resources(Resource, PROV.wasInfluencedBy)
+
+    def count_was_influenced_by(self):
+        """
+        Return the number of values get_was_influenced_by() would return.
+        @iri: http://www.w3.org/ns/prov#wasInfluencedBy
+        """
+        return self.count_values(PROV.wasInfluencedBy)
+
+    def has_was_influenced_by(self, value=None):
+        """
+        Return True if get_was_influenced_by() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#wasInfluencedBy
+        """
+        return self.has_value(PROV.wasInfluencedBy, value)
 
     def set_used(self, entity):
         """
         Specify an entity that was used by this activity.
         @iri: http://www.w3.org/ns/prov#used
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.used, entity)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_influenced_by(entity)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             entity.add(PROV.wasUsedBy, self)
 
     def get_used(self):
@@ -744,13 +3308,34 @@ class Activity(Resource):
         """
         return self.get_resources(Entity, PROV.used)
 
+    def iter_used(self):
+        """
+        Like get_used(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#used
+        """
+        return self.iter_resources(Entity, PROV.used)
+
+    def count_used(self):
+        """
+        Return the number of values get_used() would return.
+        @iri: http://www.w3.org/ns/prov#used
+        """
+        return self.count_values(PROV.used)
+
+    def has_used(self, value=None):
+        """
+        Return True if get_used() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#used
+        """
+        return self.has_value(PROV.used, value)
+
     def usage(self, entity, id=None, datetime=None, role=None, location=None):
         """
         Specify an entity that was used by this activity.
         Return usage relationship which can be used to further qualify the relationship.
         @iri: http://www.w3.org/ns/prov#qualifiedUsage
         """
-        usage = Usage(id)
+        usage = Usage(self._influence_id(id, PROV.qualifiedUsage, entity, datetime, role, location), bundle=self.graph)
         usage.set_entity(entity)
         if datetime is not None:
             usage.set_at_time(datetime)
@@ -759,7 +3344,7 @@ class Activity(Resource):
         if location is not None:
             usage.set_at_location(location)
         self.add(PROV.qualifiedUsage, usage)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             usage.add(PROV.qualifiedUsingActivity, self)
         self.set_used(entity)
         return usage
@@ -771,18 +3356,39 @@ class Activity(Resource):
         """
         return self.get_resources(Usage, PROV.qualifiedUsage)
 
+    def iter_usage(self):
+        """
+        Like get_usage(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#qualifiedUsage
+        """
+        return self.iter_resources(Usage, PROV.qualifiedUsage)
+
+    def count_usage(self):
+        """
+        Return the number of values get_usage() would return.
+        @iri: http://www.w3.org/ns/prov#qualifiedUsage
+        """
+        return self.count_values(PROV.qualifiedUsage)
+
+    def has_usage(self, value=None):
+        """
+        Return True if get_usage() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#qualifiedUsage
+        """
+        return self.has_value(PROV.qualifiedUsage, value)
+
     def set_generated(self, entity):
         """
         Specify an entity that was generated by this activity.
         @iri: http://www.w3.org/ns/prov#generated
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.generated, entity)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_influenced(entity)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             entity.add(PROV.wasGeneratedBy, self)
 
     def get_generated(self):
@@ -792,18 +3398,39 @@ class Activity(Resource):
         """
         return self.get_resources(Entity, PROV.generated)
 
+    def iter_generated(self):
+        """
+        Like get_generated(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#generated
+        """
+        return self.iter_resources(Entity, PROV.generated)
+
+    def count_generated(self):
+        """
+        Return the number of values get_generated() would return.
+        @iri: http://www.w3.org/ns/prov#generated
+        """
+        return self.count_values(PROV.generated)
+
+    def has_generated(self, value=None):
+        """
+        Return True if get_generated() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#generated
+        """
+        return self.has_value(PROV.generated, value)
+
     def set_invalidated(self, entity):
         """
         Specify an entity that was invalidated by this activity.
         @iri: http://www.w3.org/ns/prov#invalidated
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.invalidated, entity)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_influenced(entity)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             entity.add(PROV.wasInvalidatedBy, self)
 
     def get_invalidated(self):
@@ -813,19 +3440,40 @@ class Activity(Resource):
         """
         return self.get_resources(Entity, PROV.invalidated)
 
+    def iter_invalidated(self):
+        """
+        Like get_invalidated(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#invalidated
+        """
+        return self.iter_resources(Entity, PROV.invalidated)
+
+    def count_invalidated(self):
+        """
+        Return the number of values get_invalidated() would return.
+        @iri: http://www.w3.org/ns/prov#invalidated
+        """
+        return self.count_values(PROV.invalidated)
+
+    def has_invalidated(self, value=None):
+        """
+        Return True if get_invalidated() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#invalidated
+        """
+        return self.has_value(PROV.invalidated, value)
+
     def set_was_informed_by(self, activity):
         """
         Specify an activity that informed this activity.
         @iri: http://www.w3.org/ns/prov#wasInformedBy
         """
-        activity = Activity.ensure_type(activity)
+        activity = Activity.ensure_type(activity, self.graph)
         self.add(PROV.wasInformedBy, activity)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_influenced_by(activity)
 
-        if using_inverse_properties():
-            activity.add(PROV.informed, activity)
+        if self.session.writing_inverse_properties():
+            activity.add(PROV.informed, self)
 
     def get_was_informed_by(self):
         """
@@ -834,18 +3482,40 @@ class Activity(Resource):
         """
         return self.get_resources(Activity, PROV.wasInformedBy)
 
+    def iter_was_informed_by(self):
+        """
+        Like get_was_informed_by(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#wasInformedBy
+        """
+        return self.iter_resources(Activity, PROV.wasInformedBy)
+
+    def count_was_informed_by(self):
+        """
+        Return the number of values get_was_informed_by() would return.
+        @iri: http://www.w3.org/ns/prov#wasInformedBy
+        """
+        return self.count_values(PROV.wasInformedBy)
+
+    def has_was_informed_by(self, value=None):
+        """
+        Return True if get_was_informed_by() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#wasInformedBy
+        """
+        return self.has_value(PROV.wasInformedBy, value)
+
     def communication(self, activity, id=None, role=None):
         """
         Specify an activity that informed this activity.
         Return communication relationship which can be used to further qualify the relationship.
         @iri: http://www.w3.org/ns/prov#qualifiedCommunication
         """
-        communication = Communication(id)
+        communication = Communication(self._influence_id(id, PROV.qualifiedCommunication, activity, None, role),
+                                      bundle=self.graph)
         communication.set_activity(activity)
         if role is not None:
             communication.set_had_role(role)
         self.add(PROV.qualifiedCommunication, communication)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             communication.add(PROV.qualifiedCommunicationOf, self)
         self.set_was_informed_by(activity)
         return communication
@@ -857,18 +3527,39 @@ class Activity(Resource):
         """
         return self.get_resources(Communication, PROV.qualifiedCommunication)
 
+    def iter_communication(self):
+        """
+        Like get_communication(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#qualifiedCommunication
+        """
+        return self.iter_resources(Communication, PROV.qualifiedCommunication)
+
+    def count_communication(self):
+        """
+        Return the number of values get_communication() would return.
+        @iri: http://www.w3.org/ns/prov#qualifiedCommunication
+        """
+        return self.count_values(PROV.qualifiedCommunication)
+
+    def has_communication(self, value=None):
+        """
+        Return True if get_communication() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#qualifiedCommunication
+        """
+        return self.has_value(PROV.qualifiedCommunication, value)
+
     def set_was_associated_with(self, agent):
         """
         Specify an agent that was associated with this activity.
         @iri: http://www.w3.org/ns/prov#wasAssociatedWith
         """
-        agent = Agent.ensure_type(agent)
+        agent = Agent.ensure_type(agent, self.graph)
         self.add(PROV.wasAssociatedWith, agent)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_influenced_by(agent)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             agent.add(PROV.wasAssociateFor, self)
 
     def get_was_associated_with(self):
@@ -878,20 +3569,42 @@ class Activity(Resource):
         """
         return self.get_resources(Agent, PROV.wasAssociatedWith)
 
+    def iter_was_associated_with(self):
+        """
+        Like get_was_associated_with(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#wasAssociatedWith
+        """
+        return self.iter_resources(Agent, PROV.wasAssociatedWith)
+
+    def count_was_associated_with(self):
+        """
+        Return the number of values get_was_associated_with() would return.
+        @iri: http://www.w3.org/ns/prov#wasAssociatedWith
+        """
+        return self.count_values(PROV.wasAssociatedWith)
+
+    def has_was_associated_with(self, value=None):
+        """
+        Return True if get_was_associated_with() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#wasAssociatedWith
+        """
+        return self.has_value(PROV.wasAssociatedWith, value)
+
     def association(self, agent, id=None, plan=None, role=None):
         """
         Specify an agent that was associated with this activity.
         Return association relationship which can be used to further qualify the relationship.
         @iri: http://www.w3.org/ns/prov#qualifiedAssociation
         """
-        association = Association(id)
+        association = Association(self._influence_id(id, PROV.qualifiedAssociation, agent, None, role, plan),
+                                  bundle=self.graph)
         association.set_agent(agent)
         if role is not None:
             association.set_had_role(role)
         if plan is not None:
             association.set_had_plan(plan)
         self.add(PROV.qualifiedAssociation, association)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             association.add(PROV.qualifiedAssociationOf, self)
         self.set_was_associated_with(agent)
         return association
@@ -903,18 +3616,39 @@ class Activity(Resource):
         """
         return self.get_resources(Association, PROV.qualifiedAssociation)
 
+    def iter_association(self):
+        """
+        Like get_association(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#qualifiedAssociation
+        """
+        return self.iter_resources(Association, PROV.qualifiedAssociation)
+
+    def count_association(self):
+        """
+        Return the number of values get_association() would return.
+        @iri: http://www.w3.org/ns/prov#qualifiedAssociation
+        """
+        return self.count_values(PROV.qualifiedAssociation)
+
+    def has_association(self, value=None):
+        """
+        Return True if get_association() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#qualifiedAssociation
+        """
+        return self.has_value(PROV.qualifiedAssociation, value)
+
     def set_was_started_by(self, entity):
         """
         Specify the entity that started this activity.
         @iri: http://www.w3.org/ns/prov#wasStartedBy
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.wasStartedBy, entity)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_influenced_by(entity)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             entity.add(PROV.started, self)
 
     def get_was_started_by(self):
@@ -924,44 +3658,86 @@ class Activity(Resource):
         """
         return self.get_resources(Entity, PROV.wasStartedBy)
 
+    def iter_was_started_by(self):
+        """
+        Like get_was_started_by(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#wasStartedBy
+        """
+        return self.iter_resources(Entity, PROV.wasStartedBy)
+
+    def count_was_started_by(self):
+        """
+        Return the number of values get_was_started_by() would return.
+        @iri: http://www.w3.org/ns/prov#wasStartedBy
+        """
+        return self.count_values(PROV.wasStartedBy)
+
+    def has_was_started_by(self, value=None):
+        """
+        Return True if get_was_started_by() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#wasStartedBy
+        """
+        return self.has_value(PROV.wasStartedBy, value)
+
     def start(self, entity, id=None, datetime=None, location=None):
         """
         Specify the entity that started this activity.
         Return start relationship which can be used to further qualify the relationship.
         @iri: http://www.w3.org/ns/prov#qualifiedStart
         """
-        entity = Entity.ensure_type(entity)
-        start = Start(id)
+        entity = Entity.ensure_type(entity, self.graph)
+        start = Start(self._influence_id(id, PROV.qualifiedStart, entity, datetime, None, location), bundle=self.graph)
         start.set_entity(entity)
         if datetime is not None:
             start.set_at_time(datetime)
         if location is not None:
             start.set_at_location(location)
         self.add(PROV.qualifiedStart, start)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             start.add(PROV.qualifiedStartOf, self)
         self.set_was_started_by(entity)
         return start
 
-    def get_start(self):
+    def get_start(self):
+        """
+        Return all start relationships for this activity.
+        @iri: http://www.w3.org/ns/prov#qualifiedStart
+        """
+        return self.get_resources(Start, PROV.qualifiedStart)
+
+    def iter_start(self):
+        """
+        Like get_start(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#qualifiedStart
+        """
+        return self.iter_resources(Start, PROV.qualifiedStart)
+
+    def count_start(self):
+        """
+        Return the number of values get_start() would return.
+        @iri: http://www.w3.org/ns/prov#qualifiedStart
+        """
+        return self.count_values(PROV.qualifiedStart)
+
+    def has_start(self, value=None):
         """
-        Return all start relationships for this activity.
+        Return True if get_start() would return value, or any value if value is None.
         @iri: http://www.w3.org/ns/prov#qualifiedStart
         """
-        return self.get_resources(Start, PROV.qualifiedStart)
+        return self.has_value(PROV.qualifiedStart, value)
 
     def set_was_ended_by(self, entity):
         """
         Specify the entity that ended this activity.
         @iri: http://www.w3.org/ns/prov#wasEndedBy
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.wasEndedBy, entity)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_influenced_by(entity)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             entity.add(PROV.ended, self)
 
     def get_was_ended_by(self):
@@ -971,21 +3747,42 @@ class Activity(Resource):
         """
         return self.get_resources(Entity, PROV.wasEndedBy)
 
+    def iter_was_ended_by(self):
+        """
+        Like get_was_ended_by(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#wasEndedBy
+        """
+        return self.iter_resources(Entity, PROV.wasEndedBy)
+
+    def count_was_ended_by(self):
+        """
+        Return the number of values get_was_ended_by() would return.
+        @iri: http://www.w3.org/ns/prov#wasEndedBy
+        """
+        return self.count_values(PROV.wasEndedBy)
+
+    def has_was_ended_by(self, value=None):
+        """
+        Return True if get_was_ended_by() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#wasEndedBy
+        """
+        return self.has_value(PROV.wasEndedBy, value)
+
     def end(self, entity, id=None, datetime=None, location=None):
         """
         Specify the entity that ended this activity.
         Return end relationship which can be used to further qualify the relationship.
         @iri: http://www.w3.org/ns/prov#qualifiedEnd
         """
-        entity = Entity.ensure_type(entity)
-        end = End(id)
+        entity = Entity.ensure_type(entity, self.graph)
+        end = End(self._influence_id(id, PROV.qualifiedEnd, entity, datetime, None, location), bundle=self.graph)
         end.set_entity(entity)
         if datetime is not None:
             end.set_at_time(datetime)
         if location is not None:
             end.set_at_location(location)
         self.add(PROV.qualifiedEnd, end)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             end.add(PROV.qualifiedEndOf, self)
         self.set_was_ended_by(entity)
         return end
@@ -997,14 +3794,35 @@ class Activity(Resource):
         """
         return self.get_resources(End, PROV.qualifiedEnd)
 
+    def iter_end(self):
+        """
+        Like get_end(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#qualifiedEnd
+        """
+        return self.iter_resources(End, PROV.qualifiedEnd)
+
+    def count_end(self):
+        """
+        Return the number of values get_end() would return.
+        @iri: http://www.w3.org/ns/prov#qualifiedEnd
+        """
+        return self.count_values(PROV.qualifiedEnd)
+
+    def has_end(self, value=None):
+        """
+        Return True if get_end() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#qualifiedEnd
+        """
+        return self.has_value(PROV.qualifiedEnd, value)
+
     def set_at_location(self, location):
         """
         Specify a location for this activity.
         @iri: http://www.w3.org/ns/prov#atLocation
         """
-        location = Location.ensure_type(location)
+        location = Location.ensure_type(location, self.graph)
         self.add(PROV.atLocation, location)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             location.add(PROV.locationOf, self)
 
     def get_at_location(self):
@@ -1014,12 +3832,35 @@ class Activity(Resource):
         """
         return self.get_resources(Location, PROV.atLocation)
 
+    def iter_at_location(self):
+        """
+        Like get_at_location(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#atLocation
+        """
+        return self.iter_resources(Location, PROV.atLocation)
+
+    def count_at_location(self):
+        """
+        Return the number of values get_at_location() would return.
+        @iri: http://www.w3.org/ns/prov#atLocation
+        """
+        return self.count_values(PROV.atLocation)
+
+    def has_at_location(self, value=None):
+        """
+        Return True if get_at_location() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#atLocation
+        """
+        return self.has_value(PROV.atLocation, value)
+
     def set_started_at_time(self, datetime):
         """
         Specified a start datetime for this activity.
         @iri: http://www.w3.org/ns/prov#startedAtTime
         """
-        self.set(PROV.startedAtTime, Literal(datetime, datatype=XSD.dateTime))
+        value = Literal(datetime, datatype=XSD.dateTime)
+        self.set(PROV.startedAtTime, value)
+        self.session.temporal_index.add(PROV.startedAtTime, self.identifier, value)
 
     def get_started_at_time(self):
         """
@@ -1033,7 +3874,9 @@ class Activity(Resource):
         Specify a end datetime for this activity.
         @iri: http://www.w3.org/ns/prov#endedAtTime
         """
-        self.set(PROV.endedAtTime, Literal(datetime, datatype=XSD.dateTime))
+        value = Literal(datetime, datatype=XSD.dateTime)
+        self.set(PROV.endedAtTime, value)
+        self.session.temporal_index.add(PROV.endedAtTime, self.identifier, value)
 
     def get_ended_at_time(self):
         """
@@ -1051,9 +3894,7 @@ class Agent(Resource):
     @see: http://www.w3.org/TR/prov-o/#Agent
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Agent)
+    rdf_type = PROV.Agent
 
     def set_was_influenced_by(self, resource):
         """
@@ -1069,18 +3910,39 @@ class Agent(Resource):
         """
         return self.get_resources(Resource, PROV.wasInfluencedBy)
 
+    def iter_was_influenced_by(self):
+        """
+        Like get_was_influenced_by(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#wasInfluencedBy
+        """
+        return self.iter_resources(Resource, PROV.wasInfluencedBy)
+
+    def count_was_influenced_by(self):
+        """
+        Return the number of values get_was_influenced_by() would return.
+        @iri: http://www.w3.org/ns/prov#wasInfluencedBy
+        """
+        return self.count_values(PROV.wasInfluencedBy)
+
+    def has_was_influenced_by(self, value=None):
+        """
+        Return True if get_was_influenced_by() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#wasInfluencedBy
+        """
+        return self.has_value(PROV.wasInfluencedBy, value)
+
     def set_acted_on_behalf_of(self, agent):
         """
         Specify an agent that this agent acted on behalf of (i.e. was delegate for).
         @iri: http://www.w3.org/ns/prov#actedOnBehalfOf
         """
-        agent = Agent.ensure_type(agent)
+        agent = Agent.ensure_type(agent, self.graph)
         self.add(PROV.actedOnBehalfOf, agent)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.set_was_influenced_by(agent)
 
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             agent.add(PROV.hadDelegate, self)
 
     def get_acted_on_behalf_of(self):
@@ -1090,18 +3952,39 @@ class Agent(Resource):
         """
         return self.get_resources(Agent, PROV.actedOnBehalfOf)
 
+    def iter_acted_on_behalf_of(self):
+        """
+        Like get_acted_on_behalf_of(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#actedOnBehalfOf
+        """
+        return self.iter_resources(Agent, PROV.actedOnBehalfOf)
+
+    def count_acted_on_behalf_of(self):
+        """
+        Return the number of values get_acted_on_behalf_of() would return.
+        @iri: http://www.w3.org/ns/prov#actedOnBehalfOf
+        """
+        return self.count_values(PROV.actedOnBehalfOf)
+
+    def has_acted_on_behalf_of(self, value=None):
+        """
+        Return True if get_acted_on_behalf_of() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#actedOnBehalfOf
+        """
+        return self.has_value(PROV.actedOnBehalfOf, value)
+
     def delegation(self, agent, id=None, role=None):
         """
         Specify an agent that this agent acted on behalf of (i.e. was delegate for).
         Return delegation relationship which can be used to further qualify the relationship.
         @iri: http://www.w3.org/ns/prov#qualifiedDelegation
         """
-        delegation = Delegation(id)
+        delegation = Delegation(self._influence_id(id, PROV.qualifiedDelegation, agent, None, role), bundle=self.graph)
         delegation.set_agent(agent)
         if role is not None:
             delegation.set_had_role(role)
         self.add(PROV.qualifiedDelegation, delegation)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             delegation.add(PROV.qualifiedDelegationOf, self)
         self.set_acted_on_behalf_of(agent)
         return delegation
@@ -1113,14 +3996,35 @@ class Agent(Resource):
         """
         return self.get_resources(Delegation, PROV.qualifiedDelegation)
 
+    def iter_delegation(self):
+        """
+        Like get_delegation(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#qualifiedDelegation
+        """
+        return self.iter_resources(Delegation, PROV.qualifiedDelegation)
+
+    def count_delegation(self):
+        """
+        Return the number of values get_delegation() would return.
+        @iri: http://www.w3.org/ns/prov#qualifiedDelegation
+        """
+        return self.count_values(PROV.qualifiedDelegation)
+
+    def has_delegation(self, value=None):
+        """
+        Return True if get_delegation() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#qualifiedDelegation
+        """
+        return self.has_value(PROV.qualifiedDelegation, value)
+
     def set_at_location(self, location):
         """
         Specify a location for this agent.
         @iri: http://www.w3.org/ns/prov#atLocation
         """
-        location = Location.ensure_type(location)
+        location = Location.ensure_type(location, self.graph)
         self.add(PROV.atLocation, location)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             location.add(PROV.locationOf, self)
 
     def get_at_location(self):
@@ -1130,6 +4034,27 @@ class Agent(Resource):
         """
         return self.get_resources(Location, PROV.atLocation)
 
+    def iter_at_location(self):
+        """
+        Like get_at_location(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#atLocation
+        """
+        return self.iter_resources(Location, PROV.atLocation)
+
+    def count_at_location(self):
+        """
+        Return the number of values get_at_location() would return.
+        @iri: http://www.w3.org/ns/prov#atLocation
+        """
+        return self.count_values(PROV.atLocation)
+
+    def has_at_location(self, value=None):
+        """
+        Return True if get_at_location() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#atLocation
+        """
+        return self.has_value(PROV.atLocation, value)
+
 
 class Person(Agent):
     """
@@ -1138,9 +4063,7 @@ class Person(Agent):
     @see: http://www.w3.org/TR/prov-o/#Person
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Person)
+    rdf_type = PROV.Person
 
 
 class Organization(Agent):
@@ -1150,9 +4073,7 @@ class Organization(Agent):
     @see: http://www.w3.org/ns/prov#Organization
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Organization)
+    rdf_type = PROV.Organization
 
 
 class SoftwareAgent(Agent):
@@ -1162,9 +4083,7 @@ class SoftwareAgent(Agent):
     @see: http://www.w3.org/TR/prov-o/#SoftwareAgent
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.SoftwareAgent)
+    rdf_type = PROV.SoftwareAgent
 
 
 class InstantaneousEvent(Resource):
@@ -1177,18 +4096,16 @@ class InstantaneousEvent(Resource):
     @see: http://www.w3.org/TR/prov-o/#InstantaneousEvent
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.InstantaneousEvent)
+    rdf_type = PROV.InstantaneousEvent
 
     def set_at_location(self, location):
         """
         Specify a location for this event.
         @iri: http://www.w3.org/ns/prov#atLocation
         """
-        location = Location.ensure_type(location)
+        location = Location.ensure_type(location, self.graph)
         self.add(PROV.atLocation, location)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             location.add(PROV.locationOf, self)
 
     def get_at_location(self):
@@ -1198,12 +4115,35 @@ class InstantaneousEvent(Resource):
         """
         return self.get_resources(Location, PROV.atLocation)
 
+    def iter_at_location(self):
+        """
+        Like get_at_location(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#atLocation
+        """
+        return self.iter_resources(Location, PROV.atLocation)
+
+    def count_at_location(self):
+        """
+        Return the number of values get_at_location() would return.
+        @iri: http://www.w3.org/ns/prov#atLocation
+        """
+        return self.count_values(PROV.atLocation)
+
+    def has_at_location(self, value=None):
+        """
+        Return True if get_at_location() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#atLocation
+        """
+        return self.has_value(PROV.atLocation, value)
+
     def set_at_time(self, datetime):
         """
         Specify a datetime for this event.
         @iri: http://www.w3.org/ns/prov#atTime
         """
-        self.add(PROV.atTime, Literal(datetime, datatype=XSD.dateTime))
+        value = Literal(datetime, datatype=XSD.dateTime)
+        self.add(PROV.atTime, value)
+        self.session.temporal_index.add(PROV.atTime, self.identifier, value, replace=False)
 
     def get_at_time(self):
         """
@@ -1217,7 +4157,7 @@ class InstantaneousEvent(Resource):
         specify the role associated with this event.
         @iri: http://www.w3.org/ns/prov#hadRole
         """
-        role = Role.ensure_type(role)
+        role = Role.ensure_type(role, self.graph)
         self.add(PROV.hadRole, role)
 
     def get_had_role(self):
@@ -1227,6 +4167,27 @@ class InstantaneousEvent(Resource):
         """
         return self.get_resources(Role, PROV.hadRole)
 
+    def iter_had_role(self):
+        """
+        Like get_had_role(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#hadRole
+        """
+        return self.iter_resources(Role, PROV.hadRole)
+
+    def count_had_role(self):
+        """
+        Return the number of values get_had_role() would return.
+        @iri: http://www.w3.org/ns/prov#hadRole
+        """
+        return self.count_values(PROV.hadRole)
+
+    def has_had_role(self, value=None):
+        """
+        Return True if get_had_role() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#hadRole
+        """
+        return self.has_value(PROV.hadRole, value)
+
 
 class Influence(Resource):
     """
@@ -1237,16 +4198,14 @@ class Influence(Resource):
     @see: http://www.w3.org/TR/prov-o/#Influence
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Influence)
+    rdf_type = PROV.Influence
 
     def set_had_role(self, role):
         """
         Specify the role associated with this influence.
         @iri: http://www.w3.org/ns/prov#hadRole
         """
-        role = Role.ensure_type(role)
+        role = Role.ensure_type(role, self.graph)
         self.add(PROV.hadRole, role)
 
     def get_had_role(self):
@@ -1256,13 +4215,34 @@ class Influence(Resource):
         """
         return self.get_resources(Role, PROV.hadRole)
 
+    def iter_had_role(self):
+        """
+        Like get_had_role(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#hadRole
+        """
+        return self.iter_resources(Role, PROV.hadRole)
+
+    def count_had_role(self):
+        """
+        Return the number of values get_had_role() would return.
+        @iri: http://www.w3.org/ns/prov#hadRole
+        """
+        return self.count_values(PROV.hadRole)
+
+    def has_had_role(self, value=None):
+        """
+        Return True if get_had_role() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#hadRole
+        """
+        return self.has_value(PROV.hadRole, value)
+
     def set_had_activity(self, activity):
         """
         Specify the *optional* activity of this influence, which used, generated, invalidated,
         or was the responsibility of some entity.
         @iri: @iri: http://www.w3.org/ns/prov#hadActivity
         """
-        activity = Activity.ensure_type(activity)
+        activity = Activity.ensure_type(activity, self.graph)
         self.add(PROV.hadActivity, activity)
 
     def get_had_activity(self):
@@ -1273,6 +4253,27 @@ class Influence(Resource):
         """
         return self.get_resources(Activity, PROV.hadActivity)
 
+    def iter_had_activity(self):
+        """
+        Like get_had_activity(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#hadActivity
+        """
+        return self.iter_resources(Activity, PROV.hadActivity)
+
+    def count_had_activity(self):
+        """
+        Return the number of values get_had_activity() would return.
+        @iri: http://www.w3.org/ns/prov#hadActivity
+        """
+        return self.count_values(PROV.hadActivity)
+
+    def has_had_activity(self, value=None):
+        """
+        Return True if get_had_activity() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#hadActivity
+        """
+        return self.has_value(PROV.hadActivity, value)
+
 
 class ActivityInfluence(Influence):
     """
@@ -1282,19 +4283,16 @@ class ActivityInfluence(Influence):
     @see: http://www.w3.org/TR/prov-o/#ActivityInfluence
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-
     def set_activity(self, activity):
         """
         Specify the activity that had an effect on the character, development, or behavior of another by means of
         generation, invalidation, communication, or other.
         @iri: http://www.w3.org/ns/prov#activity
         """
-        activity = Activity.ensure_type(activity)
+        activity = Activity.ensure_type(activity, self.graph)
         self.add(PROV.activity, activity)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.add(PROV.influencer, activity)
 
     def get_activity(self):
@@ -1305,6 +4303,27 @@ class ActivityInfluence(Influence):
         """
         return self.get_resources(Activity, PROV.activity)
 
+    def iter_activity(self):
+        """
+        Like get_activity(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#activity
+        """
+        return self.iter_resources(Activity, PROV.activity)
+
+    def count_activity(self):
+        """
+        Return the number of values get_activity() would return.
+        @iri: http://www.w3.org/ns/prov#activity
+        """
+        return self.count_values(PROV.activity)
+
+    def has_activity(self, value=None):
+        """
+        Return True if get_activity() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#activity
+        """
+        return self.has_value(PROV.activity, value)
+
 
 class AgentInfluence(Influence):
     """
@@ -1314,19 +4333,16 @@ class AgentInfluence(Influence):
     @see: http://www.w3.org/TR/prov-o/#AgentInfluence
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-
     def set_agent(self, agent):
         """
         Specify the agent that had an effect on the character, development, or behavior of another by means
         of attribution, association, delegation, or other.
         @iri: http://www.w3.org/ns/prov#agent
         """
-        agent = Agent.ensure_type(agent)
+        agent = Agent.ensure_type(agent, self.graph)
         self.add(PROV.agent, agent)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.add(PROV.influencer, agent)
 
     def get_agent(self):
@@ -1337,6 +4353,27 @@ class AgentInfluence(Influence):
         """
         return self.get_resources(Agent, PROV.agent)
 
+    def iter_agent(self):
+        """
+        Like get_agent(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#agent
+        """
+        return self.iter_resources(Agent, PROV.agent)
+
+    def count_agent(self):
+        """
+        Return the number of values get_agent() would return.
+        @iri: http://www.w3.org/ns/prov#agent
+        """
+        return self.count_values(PROV.agent)
+
+    def has_agent(self, value=None):
+        """
+        Return True if get_agent() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#agent
+        """
+        return self.has_value(PROV.agent, value)
+
 
 class EntityInfluence(Influence):
     """
@@ -1346,19 +4383,16 @@ class EntityInfluence(Influence):
     @see: http://www.w3.org/TR/prov-o/#EntityInfluence
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id, bundle=bundle)
-
     def set_entity(self, entity):
         """
         Specify the entity that had an effect on the character, development, or behavior of another
         by means of usage, start, end, derivation, or other.
         @iri: http://www.w3.org/ns/prov#entity
         """
-        entity = Entity.ensure_type(entity)
+        entity = Entity.ensure_type(entity, self.graph)
         self.add(PROV.entity, entity)
 
-        if asserting_super_properties():
+        if self.session.writing_super_properties():
             self.add(PROV.influencer, entity)
 
     def get_entity(self):
@@ -1367,7 +4401,28 @@ class EntityInfluence(Influence):
         by means of usage, start, end, derivation, or other.
         @iri: http://www.w3.org/ns/prov#entity
         """
-        self.get_resources(Entity, PROV.entity)
+        return self.get_resources(Entity, PROV.entity)
+
+    def iter_entity(self):
+        """
+        Like get_entity(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#entity
+        """
+        return self.iter_resources(Entity, PROV.entity)
+
+    def count_entity(self):
+        """
+        Return the number of values get_entity() would return.
+        @iri: http://www.w3.org/ns/prov#entity
+        """
+        return self.count_values(PROV.entity)
+
+    def has_entity(self, value=None):
+        """
+        Return True if get_entity() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#entity
+        """
+        return self.has_value(PROV.entity, value)
 
 
 class Generation(InstantaneousEvent, ActivityInfluence):
@@ -1378,9 +4433,7 @@ class Generation(InstantaneousEvent, ActivityInfluence):
     @see: http://www.w3.org/TR/prov-o/#Generation
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Generation)
+    rdf_type = PROV.Generation
 
 
 class Start(InstantaneousEvent, EntityInfluence):
@@ -1393,9 +4446,7 @@ class Start(InstantaneousEvent, EntityInfluence):
     @see: http://www.w3.org/TR/prov-o/#Start
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id, bundle=bundle)
-        self.add_type(PROV.Start)
+    rdf_type = PROV.Start
 
 
 class End(InstantaneousEvent, EntityInfluence):
@@ -1408,9 +4459,7 @@ class End(InstantaneousEvent, EntityInfluence):
     @see: http://www.w3.org/TR/prov-o/#End
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.End)
+    rdf_type = PROV.End
 
 
 class Invalidation(InstantaneousEvent, ActivityInfluence):
@@ -1422,9 +4471,7 @@ class Invalidation(InstantaneousEvent, ActivityInfluence):
     @see: http://www.w3.org/TR/prov-o/#Invalidation
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Invalidation)
+    rdf_type = PROV.Invalidation
 
 
 class Communication(ActivityInfluence):
@@ -1434,9 +4481,7 @@ class Communication(ActivityInfluence):
     @see: http://www.w3.org/TR/prov-o/#Communication
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Communication)
+    rdf_type = PROV.Communication
 
 
 class Usage(InstantaneousEvent, EntityInfluence):
@@ -1447,9 +4492,7 @@ class Usage(InstantaneousEvent, EntityInfluence):
     @see: http://www.w3.org/TR/prov-o/#Usage
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Usage)
+    rdf_type = PROV.Usage
 
 
 class Derivation(EntityInfluence):
@@ -1460,16 +4503,14 @@ class Derivation(EntityInfluence):
     @see: http://www.w3.org/TR/prov-o/#Derivation
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Derivation)
+    rdf_type = PROV.Derivation
 
     def set_had_usage(self, usage):
         """
         Specify the *optional* usage involved in an entity's derivation.
         @iri: http://www.w3.org/ns/prov#hadUsage
         """
-        usage = Usage.ensure_type(usage)
+        usage = Usage.ensure_type(usage, self.graph)
         self.add(PROV.hadUsage, usage)
 
     def get_had_usage(self):
@@ -1479,12 +4520,33 @@ class Derivation(EntityInfluence):
         """
         return self.get_resources(Usage, PROV.hadUsage)
 
+    def iter_had_usage(self):
+        """
+        Like get_had_usage(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#hadUsage
+        """
+        return self.iter_resources(Usage, PROV.hadUsage)
+
+    def count_had_usage(self):
+        """
+        Return the number of values get_had_usage() would return.
+        @iri: http://www.w3.org/ns/prov#hadUsage
+        """
+        return self.count_values(PROV.hadUsage)
+
+    def has_had_usage(self, value=None):
+        """
+        Return True if get_had_usage() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#hadUsage
+        """
+        return self.has_value(PROV.hadUsage, value)
+
     def set_had_generation(self, generation):
         """
         Specify the *optional* generation involved in an entity's derivation.
         @iri: http://www.w3.org/ns/prov#hadGeneration
         """
-        generation = Generation.ensure_type(generation)
+        generation = Generation.ensure_type(generation, self.graph)
         self.add(PROV.hadGeneration, generation)
 
     def get_had_generation(self):
@@ -1494,6 +4556,27 @@ class Derivation(EntityInfluence):
         """
         return self.get_resources(Generation, PROV.hadGeneration)
 
+    def iter_had_generation(self):
+        """
+        Like get_had_generation(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#hadGeneration
+        """
+        return self.iter_resources(Generation, PROV.hadGeneration)
+
+    def count_had_generation(self):
+        """
+        Return the number of values get_had_generation() would return.
+        @iri: http://www.w3.org/ns/prov#hadGeneration
+        """
+        return self.count_values(PROV.hadGeneration)
+
+    def has_had_generation(self, value=None):
+        """
+        Return True if get_had_generation() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#hadGeneration
+        """
+        return self.has_value(PROV.hadGeneration, value)
+
 
 class Revision(Derivation):
     """
@@ -1504,9 +4587,7 @@ class Revision(Derivation):
     @see: http://www.w3.org/TR/prov-o/#Revision
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Revision)
+    rdf_type = PROV.Revision
 
 
 class PrimarySource(Derivation):
@@ -1522,9 +4603,7 @@ class PrimarySource(Derivation):
     @see: http://www.w3.org/TR/prov-o/#PrimarySource
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.PrimarySource)
+    rdf_type = PROV.PrimarySource
 
 
 class Quotation(Derivation):
@@ -1535,9 +4614,7 @@ class Quotation(Derivation):
     @see: http://www.w3.org/TR/prov-o/#Quotation
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Quotation)
+    rdf_type = PROV.Quotation
 
 
 class Delegation(AgentInfluence):
@@ -1551,9 +4628,7 @@ class Delegation(AgentInfluence):
     @see: http://www.w3.org/TR/prov-o/#Delegation
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Delegation)
+    rdf_type = PROV.Delegation
 
 
 class Association(AgentInfluence):
@@ -1565,18 +4640,16 @@ class Association(AgentInfluence):
     @see: http://www.w3.org/TR/prov-o/#Association
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Association)
+    rdf_type = PROV.Association
 
     def set_had_plan(self, plan):
         """
         Specify the plan used by the agent in the context of the activity association.
         @iri: http://www.w3.org/ns/prov#hadPlan
         """
-        plan = Plan.ensure_type(plan)
+        plan = Plan.ensure_type(plan, self.graph)
         self.add(PROV.hadPlan, plan)
-        if using_inverse_properties():
+        if self.session.writing_inverse_properties():
             plan.add(PROV.wasPlanOf, self)
 
     def get_had_plan(self):
@@ -1586,6 +4659,27 @@ class Association(AgentInfluence):
         """
         return self.get_resources(Plan, PROV.hadPlan)
 
+    def iter_had_plan(self):
+        """
+        Like get_had_plan(), but generate the values one at a time.
+        @iri: http://www.w3.org/ns/prov#hadPlan
+        """
+        return self.iter_resources(Plan, PROV.hadPlan)
+
+    def count_had_plan(self):
+        """
+        Return the number of values get_had_plan() would return.
+        @iri: http://www.w3.org/ns/prov#hadPlan
+        """
+        return self.count_values(PROV.hadPlan)
+
+    def has_had_plan(self, value=None):
+        """
+        Return True if get_had_plan() would return value, or any value if value is None.
+        @iri: http://www.w3.org/ns/prov#hadPlan
+        """
+        return self.has_value(PROV.hadPlan, value)
+
 
 class Attribution(AgentInfluence):
     """
@@ -1596,9 +4690,7 @@ class Attribution(AgentInfluence):
     @see: http://www.w3.org/TR/prov-o/#Attribution
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Attribution)
+    rdf_type = PROV.Attribution
 
 
 class Role(Resource):
@@ -1609,6 +4701,187 @@ class Role(Resource):
     @see: http://www.w3.org/TR/prov-o/#Role
     """
 
-    def __init__(self, id=None, bundle=default_graph):
-        super().__init__(id=id, bundle=bundle)
-        self.add_type(PROV.Role)
+    rdf_type = PROV.Role
+
+
+def _build_type_table(cls=Resource):
+    _prov_types(cls)
+    for subclass in cls.__subclasses__():
+        _build_type_table(subclass)
+
+
+_build_type_table()
+
+
+# relations lineage() can follow, with the python types of their subjects and objects
+_lineage_relations = OrderedDict([
+    (PROV.wasDerivedFrom, (Entity, Entity)),
+    (PROV.wasRevisionOf, (Entity, Entity)),
+    (PROV.wasQuotedFrom, (Entity, Entity)),
+    (PROV.hadPrimarySource, (Entity, Entity)),
+    (PROV.wasGeneratedBy, (Entity, Activity)),
+    (PROV.used, (Activity, Entity)),
+    (PROV.wasInformedBy, (Activity, Activity)),
+    (PROV.wasInvalidatedBy, (Entity, Activity)),
+    (PROV.wasStartedBy, (Activity, Entity)),
+    (PROV.wasEndedBy, (Activity, Entity)),
+    (PROV.wasAttributedTo, (Entity, Agent)),
+    (PROV.wasAssociatedWith, (Activity, Agent)),
+    (PROV.actedOnBehalfOf, (Agent, Agent)),
+    (PROV.hadMember, (Collection, Entity)),
+    (PROV.wasInfluencedBy, (Resource, Resource))
+])
+
+# the PROV time properties and the resource class of their subjects
+TIME_PROPERTIES = OrderedDict([
+    (PROV.atTime, InstantaneousEvent),
+    (PROV.generatedAtTime, Entity),
+    (PROV.invalidatedAtTime, Entity),
+    (PROV.startedAtTime, Activity),
+    (PROV.endedAtTime, Activity)
+])
+
+def _prov_classes(cls=None):
+    cls = Resource if cls is None else cls
+    classes = {}
+    for subclass in cls.__subclasses__():
+        if subclass.__dict__.get("rdf_type") is not None:
+            classes[subclass.rdf_type] = subclass
+        classes.update(_prov_classes(subclass))
+    return classes
+
+
+# the resource class of each PROV type
+_PROV_CLASSES = _prov_classes()
+
+_INFLUENCERS = ((ActivityInfluence, PROV.activity), (EntityInfluence, PROV.entity), (AgentInfluence, PROV.agent))
+
+DERIVATION_RELATIONS = (PROV.wasDerivedFrom, PROV.wasRevisionOf, PROV.wasQuotedFrom, PROV.hadPrimarySource)
+
+LINEAGE_RELATIONS = (PROV.wasDerivedFrom, PROV.wasRevisionOf, PROV.wasQuotedFrom, PROV.hadPrimarySource,
+                     PROV.wasGeneratedBy, PROV.used, PROV.wasInformedBy)
+
+
+def lineage(resource, direction="up", relations=LINEAGE_RELATIONS, max_depth=None):
+    """
+    Generate the resources reachable from resource by following relations transitively, breadth first and each
+    resource once. direction "up" follows relations from subject to object, towards what resource was derived,
+    generated or informed from; "down" follows them from object to subject, towards what was derived from resource.
+    max_depth limits the number of hops. Resources are returned as objects of the python type implied by the relation
+    they were first reached through, without writing to the graph.
+    """
+    if direction not in ("up", "down"):
+        raise ValueError("direction must be 'up' or 'down', not %r" % direction)
+    if isinstance(resource, Resource):
+        graph = resource.graph
+        start = resource.identifier
+    else:
+        graph = current_session().ds
+        start = Resource.node(resource)
+    session = _session_for(graph)
+    up = direction == "up"
+    types = dict((p, _lineage_relations.get(p, (Resource, Resource))[1 if up else 0]) for p in relations)
+    if not isinstance(graph, ConjunctiveGraph):
+        context = graph
+    elif graph.default_union:
+        context = None
+    else:
+        context = graph.default_context
+    triples = graph.store.triples
+    visited = {start}
+    frontier = [start]
+    depth = 0
+    while frontier and (max_depth is None or depth < max_depth):
+        depth += 1
+        next_frontier = []
+        for node in frontier:
+            # the neighbours of one node are read under the lock, which is released before they are yielded
+            reached = []
+            with session.reading():
+                if up:
+                    edges = ((p, o) for ((_, p, o), _) in triples((node, None, None), context))
+                else:
+                    edges = ((p, s) for ((s, p, _), _) in triples((None, None, node), context))
+                for (p, neighbour) in edges:
+                    cls = types.get(p)
+                    if cls is None or neighbour in visited or isinstance(neighbour, Literal):
+                        continue
+                    visited.add(neighbour)
+                    next_frontier.append(neighbour)
+                    reached.append(cls.wrap(neighbour, graph))
+            for resource in reached:
+                yield resource
+        frontier = next_frontier
+
+
+def set_temporal_index(flag=False):
+    current_session().set_temporal_index(flag)
+
+
+def using_temporal_index():
+    return current_session().using_temporal_index()
+
+
+def events_between(start, end, prop=None):
+    """
+    Generate the resources of the current session with a value of the time property prop, prov:generatedAtTime by
+    default, at or after start and before end, oldest first.
+    """
+    return current_session().events_between(start, end, prop)
+
+
+def latest_events(n=None, prop=None, before=None):
+    """
+    Generate the n resources of the current session with the latest values of the time property prop, at or before
+    before if given, newest first.
+    """
+    return current_session().latest_events(n, prop, before)
+
+
+def as_of(time, kind=None):
+    """
+    Generate the entities of the current session that existed at time, or with kind=Activity the activities that
+    were running, most recent first.
+    """
+    return current_session().as_of(time, kind)
+
+
+def event_table(kind=None):
+    """
+    Return the ids and times of every resource of kind, Activity by default, in the current session as NumPy arrays.
+    """
+    return current_session().event_table(kind)
+
+
+def timings(activities=None):
+    """
+    Return the start and end times and durations of activities, or of every activity, in the current session as
+    NumPy arrays.
+    """
+    return current_session().timings(activities)
+
+
+def ingest_table(columns, mapping=None, bundle=None, batch_size=10000):
+    """
+    Record one row of provenance per row of the table columns, a dict of column sequences or a CSV text stream, in
+    bundle of the current session. See ProvSession.ingest_table.
+    """
+    session = current_session() if bundle is None else _session_for(bundle)
+    return session.ingest_table(columns, mapping, bundle, batch_size)
+
+
+def export_edges(directory, relations=None, bundle=None, format="npy"):
+    """
+    Write the edges between resources in bundle, the whole dataset of the current session by default, to directory
+    as interned id arrays with a node dictionary. See ProvSession.export_edges.
+    """
+    session = current_session() if bundle is None else _session_for(bundle)
+    return session.export_edges(directory, relations, bundle, format)
+
+
+def set_content_ids(flag=False):
+    current_session().set_content_ids(flag)
+
+
+def using_content_ids():
+    return current_session().using_content_ids()
@@ -0,0 +1,204 @@
+"""
+Binary snapshots of rdflib datasets. A snapshot holds a term dictionary and the quads of every graph as packed
+integer rows referring to it, so loading one needs no parsing beyond decoding the term strings. The file is read
+through mmap: the integer sections are used in place and each term is decoded straight from the mapped text.
+
+Layout, all integers in the byte order recorded in the header, every section aligned to 8 bytes:
+
+    header      MAGIC, version, id width (4 or 8), byte order, term count, quad count, graph count,
+                default graph id, then the offset and length of each section
+    kinds       one byte per term: 0 URI, 1 blank node, 2 literal
+    values      offsets (term count + 1 unsigned 64 bit) into the text of all term values, in bytes
+    datatypes   term id of the datatype of each term, -1 if none (signed 64 bit)
+    langs       offsets (term count + 1) into the text of all literal languages, in bytes
+    text        UTF-8 text of all term values followed by all languages
+    graphs      term ids of the graph names (unsigned, id width)
+    quads       subject, predicate, object and graph term ids of each quad (unsigned, id width)
+    namespaces  UTF-8 JSON list of [prefix, namespace] pairs
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from rdflib import BNode, Literal, URIRef, ConjunctiveGraph, Dataset
+
+
+MAGIC = b"KLEIOSNP"
+VERSION = 1
+
+_SECTIONS = ("kinds", "values", "datatypes", "langs", "text", "graphs", "quads", "namespaces")
+
+_HEADER = struct.Struct("<8sHBBQQQq" + "QQ" * len(_SECTIONS))
+
+
+def _pad(stream):
+    padding = -stream.tell() % 8
+    if padding:
+        stream.write(b"\0" * padding)
+
+
+def write(dataset, path):
+    """
+    Write every graph of dataset, a ConjunctiveGraph or a Graph, and its namespace bindings to a snapshot at path.
+    The file is written next to path and moved into place once complete.
+    """
+    ids = {}
+    kinds = bytearray()
+    values = []
+    datatypes = array("q")
+    langs = []
+
+    def intern(term):
+        id = ids.get(term)
+        if id is None:
+            id = ids[term] = len(kinds)
+            kinds.append(2 if isinstance(term, Literal) else 1 if isinstance(term, BNode) else 0)
+            values.append(str(term).encode("utf-8"))
+            datatypes.append(-1)
+            langs.append(b"")
+            if isinstance(term, Literal):
+                langs[id] = (term.language or "").encode("utf-8")
+                if term.datatype is not None:
+                    datatypes[id] = intern(term.datatype)
+        return id
+
+    if isinstance(dataset, ConjunctiveGraph):
+        graphs = list(dataset.contexts())
+        default = intern(dataset.default_context.identifier)
+    else:
+        graphs = [dataset]
+        default = -1
+    graph_ids = [intern(graph.identifier) for graph in graphs]
+    quads = []
+    for (graph, c) in zip(graphs, graph_ids):
+        for (s, p, o) in graph.triples((None, None, None)):
+            quads.extend((intern(s), intern(p), intern(o), c))
+
+    width = 4 if len(kinds) < 2 ** 32 else 8
+    code = "I" if width == 4 else "Q"
+    value_offsets = array("Q", [0])
+    for value in values:
+        value_offsets.append(value_offsets[-1] + len(value))
+    lang_offsets = array("Q", [0])
+    for lang in langs:
+        lang_offsets.append(lang_offsets[-1] + len(lang))
+    sections = {
+        "kinds": bytes(kinds),
+        "values": value_offsets.tobytes(),
+        "datatypes": datatypes.tobytes(),
+        "langs": lang_offsets.tobytes(),
+        "text": b"".join(values) + b"".join(langs),
+        "graphs": array(code, graph_ids).tobytes(),
+        "quads": array(code, quads).tobytes(),
+        "namespaces": json.dumps([[prefix, str(namespace)] for (prefix, namespace) in dataset.namespaces()]).encode()
+    }
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as stream:
+        stream.write(b"\0" * _HEADER.size)
+        _pad(stream)
+        layout = []
+        for name in _SECTIONS:
+            layout.extend((stream.tell(), len(sections[name])))
+            stream.write(sections[name])
+            _pad(stream)
+        stream.seek(0)
+        stream.write(_HEADER.pack(MAGIC, VERSION, width, sys.byteorder == "little", len(kinds), len(quads) // 4,
+                                  len(graphs), default, *layout))
+        stream.flush()
+        os.fsync(stream.fileno())
+    os.replace(temporary, path)
+
+
+def _array(buffer, code, swap):
+    """
+    Return the integers in buffer as a memoryview of it, or as a byte-swapped array copy if the snapshot was
+    written on a machine of the other byte order.
+    """
+    if not swap:
+        return buffer.cast(code)
+    values = array(code)
+    values.frombytes(buffer)
+    values.byteswap()
+    return values
+
+
+def read(path, dataset):
+    """
+    Add the graphs and namespace bindings of the snapshot at path to dataset, a ConjunctiveGraph or a Graph. The
+    default graph of the snapshot is added to the default graph of dataset. Blank nodes keep their labels.
+    """
+    with open(path, "rb") as stream:
+        size = os.fstat(stream.fileno()).st_size
+        if size < _HEADER.size:
+            raise ValueError("%s is not a kleio snapshot" % path)
+        with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            views = [memoryview(view)]
+            try:
+                return _read(path, views, size, dataset)
+            finally:
+                for v in reversed(views):
+                    v.release()
+
+
+def _read(path, views, size, dataset):
+    header = _HEADER.unpack_from(views[0])
+    (magic, version, width, little, n_terms, n_quads, n_graphs, default) = header[:8]
+    if magic != MAGIC or version != VERSION or width not in (4, 8):
+        raise ValueError("%s is not a kleio snapshot" % path)
+    swap = bool(little) != (sys.byteorder == "little")
+    code = "I" if width == 4 else "Q"
+
+    def section(i, code=None):
+        (offset, length) = header[8 + 2 * i:10 + 2 * i]
+        if offset + length > size:
+            raise ValueError("%s is a truncated kleio snapshot" % path)
+        views.append(views[0][offset:offset + length])
+        if code is None:
+            return views[-1]
+        values = _array(views[-1], code, swap)
+        if isinstance(values, memoryview):
+            views.append(values)
+        return values
+
+    kinds = section(0)
+    value_offsets = section(1, "Q")
+    datatypes = section(2, "q")
+    lang_offsets = section(3, "Q")
+    text = section(4)
+    graph_ids = section(5, code)
+    quads = section(6, code)
+    namespaces = json.loads(str(section(7), "utf-8"))
+    langs_start = value_offsets[n_terms]
+
+    def decode(start, end):
+        return str(text[start:end], "utf-8")
+
+    terms = [None] * n_terms
+    for id in range(n_terms):
+        kind = kinds[id]
+        if kind == 0:
+            terms[id] = URIRef(decode(value_offsets[id], value_offsets[id + 1]))
+        elif kind == 1:
+            terms[id] = BNode(decode(value_offsets[id], value_offsets[id + 1]))
+    for id in range(n_terms):
+        if kinds[id] == 2:
+            datatype = datatypes[id]
+            lang = decode(langs_start + lang_offsets[id], langs_start + lang_offsets[id + 1])
+            terms[id] = Literal(decode(value_offsets[id], value_offsets[id + 1]), lang=lang or None,
+                                datatype=terms[datatype] if datatype >= 0 else None)
+
+    if isinstance(dataset, ConjunctiveGraph):
+        named = dataset.graph if isinstance(dataset, Dataset) else dataset.get_context
+        graphs = dict((c, dataset.default_context if c == default else named(terms[c])) for c in graph_ids)
+    else:
+        graphs = dict((c, dataset) for c in graph_ids)
+    for (prefix, namespace) in namespaces:
+        dataset.bind(prefix, namespace, override=False)
+    rows = iter(quads)
+    dataset.addN((terms[s], terms[p], terms[o], graphs[c]) for (s, p, o, c) in zip(rows, rows, rows, rows))
+    return dataset
@@ -0,0 +1,266 @@
+import os
+import sqlite3
+
+from rdflib import BNode, Literal, URIRef
+from rdflib.graph import Graph
+from rdflib.store import Store, VALID_STORE, NO_STORE
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    datatype TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    UNIQUE (kind, value, datatype, lang)
+);
+CREATE TABLE IF NOT EXISTS quads (
+    s INTEGER NOT NULL,
+    p INTEGER NOT NULL,
+    o INTEGER NOT NULL,
+    c INTEGER NOT NULL,
+    PRIMARY KEY (s, p, o, c)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS quads_pos ON quads (p, o, s);
+CREATE INDEX IF NOT EXISTS quads_osp ON quads (o, s, p);
+CREATE INDEX IF NOT EXISTS quads_c ON quads (c);
+CREATE TABLE IF NOT EXISTS graphs (
+    c INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS namespaces (
+    prefix TEXT PRIMARY KEY,
+    uri TEXT NOT NULL
+);
+"""
+
+
+def _key(term):
+    """
+    Return the (kind, value, datatype, lang) row identifying term in the terms table.
+    """
+    if isinstance(term, Literal):
+        return ("L", str(term), str(term.datatype or ""), term.language or "")
+    elif isinstance(term, BNode):
+        return ("B", str(term), "", "")
+    else:
+        return ("U", str(term), "", "")
+
+
+def _term(kind, value, datatype, lang):
+    if kind == "L":
+        return Literal(value, datatype=URIRef(datatype) if datatype else None, lang=lang or None)
+    elif kind == "B":
+        return BNode(value)
+    else:
+        return URIRef(value)
+
+
+class SQLiteStore(Store):
+    """
+    A context-aware, transactional rdflib store keeping quads in a local SQLite database. Terms are interned in a
+    table of their own and quads are stored as integer rows with SPOC, POS and OSP indexes, so graphs do not have to
+    fit in memory. Changes are only durable once commit() is called.
+
+    Registered with rdflib as the "SQLite" store plugin; the configuration passed to open() is the database path.
+    Until a database is opened the store keeps its quads in an in-memory database.
+    """
+
+    context_aware = True
+    graph_aware = True
+    transaction_aware = True
+    formula_aware = False
+
+    def __init__(self, configuration=None, identifier=None, cache_size=100000):
+        self.identifier = identifier
+        self.cache_size = cache_size
+        self._connection = None
+        self._ids = {}
+        self._terms = {}
+        self._graphs = {}
+        super().__init__(configuration)
+        if self._connection is None:
+            self.open(":memory:")
+
+    def open(self, configuration, create=True):
+        self.close()
+        exists = configuration == ":memory:" or os.path.exists(configuration)
+        if not exists and not create:
+            return NO_STORE
+        self._connection = sqlite3.connect(configuration, check_same_thread=False)
+        if create:
+            self._connection.executescript(_SCHEMA)
+            self._connection.commit()
+        elif self._connection.execute("SELECT name FROM sqlite_master WHERE name = 'quads'").fetchone() is None:
+            self._connection.close()
+            self._connection = None
+            return NO_STORE
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction=False):
+        if self._connection is not None:
+            if commit_pending_transaction:
+                self._connection.commit()
+            self._connection.close()
+            self._connection = None
+        self._clear_caches()
+
+    def destroy(self, configuration):
+        self.close()
+        if os.path.exists(configuration):
+            os.remove(configuration)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+        self._clear_caches()
+
+    def _clear_caches(self):
+        self._ids.clear()
+        self._terms.clear()
+        self._graphs.clear()
+
+    def _id(self, term, create=False):
+        """
+        Return the integer id of term, interning it if create is True; None if the term is unknown.
+        """
+        key = _key(term)
+        id = self._ids.get(key)
+        if id is not None:
+            return id
+        row = self._connection.execute(
+            "SELECT id FROM terms WHERE kind = ? AND value = ? AND datatype = ? AND lang = ?", key).fetchone()
+        if row is not None:
+            id = row[0]
+        elif create:
+            id = self._connection.execute(
+                "INSERT INTO terms (kind, value, datatype, lang) VALUES (?, ?, ?, ?)", key).lastrowid
+        else:
+            return None
+        if len(self._ids) >= self.cache_size:
+            self._ids.clear()
+        self._ids[key] = id
+        return id
+
+    def _term(self, id):
+        term = self._terms.get(id)
+        if term is None:
+            row = self._connection.execute("SELECT kind, value, datatype, lang FROM terms WHERE id = ?", (id,))
+            term = _term(*row.fetchone())
+            if len(self._terms) >= self.cache_size:
+                self._terms.clear()
+            self._terms[id] = term
+        return term
+
+    def _graph(self, id):
+        graph = self._graphs.get(id)
+        if graph is None:
+            graph = self._graphs[id] = Graph(store=self, identifier=self._term(id))
+        return graph
+
+    @staticmethod
+    def _identifier(context):
+        return getattr(context, "identifier", context)
+
+    def _where(self, triple_pattern, context):
+        """
+        Return the SQL condition and parameters matching triple_pattern in context, or None if nothing can match.
+        """
+        conditions = []
+        params = []
+        for (column, term) in zip("spo", triple_pattern):
+            if term is not None:
+                id = self._id(term)
+                if id is None:
+                    return None
+                conditions.append("%s = ?" % column)
+                params.append(id)
+        if context is not None:
+            id = self._id(self._identifier(context))
+            if id is None:
+                return None
+            conditions.append("c = ?")
+            params.append(id)
+        return (" WHERE " + " AND ".join(conditions) if conditions else "", params)
+
+    def add(self, triple, context, quoted=False):
+        Store.add(self, triple, context, quoted)
+        (s, p, o) = triple
+        self._connection.execute(
+            "INSERT OR IGNORE INTO quads (s, p, o, c) VALUES (?, ?, ?, ?)",
+            (self._id(s, True), self._id(p, True), self._id(o, True), self._id(self._identifier(context), True)))
+
+    def addN(self, quads):
+        rows = []
+        for (s, p, o, c) in quads:
+            Store.add(self, (s, p, o), c)
+            rows.append((self._id(s, True), self._id(p, True), self._id(o, True), self._id(self._identifier(c), True)))
+        self._connection.executemany("INSERT OR IGNORE INTO quads (s, p, o, c) VALUES (?, ?, ?, ?)", rows)
+
+    def remove(self, triple_pattern, context=None):
+        Store.remove(self, triple_pattern, context)
+        where = self._where(triple_pattern, context)
+        if where is not None:
+            self._connection.execute("DELETE FROM quads" + where[0], where[1])
+
+    def triples(self, triple_pattern, context=None):
+        where = self._where(triple_pattern, context)
+        if where is None:
+            return
+        if context is not None:
+            cursor = self._connection.execute("SELECT s, p, o, c FROM quads" + where[0], where[1])
+        else:
+            cursor = self._connection.execute(
+                "SELECT s, p, o, group_concat(c) FROM quads" + where[0] + " GROUP BY s, p, o", where[1])
+        for (s, p, o, c) in cursor:
+            contexts = [self._graph(int(id)) for id in str(c).split(",")]
+            yield (self._term(s), self._term(p), self._term(o)), iter(contexts)
+
+    def __len__(self, context=None):
+        if context is not None:
+            where = self._where((None, None, None), context)
+            if where is None:
+                return 0
+            return self._connection.execute("SELECT COUNT(*) FROM quads" + where[0], where[1]).fetchone()[0]
+        return self._connection.execute("SELECT COUNT(*) FROM (SELECT DISTINCT s, p, o FROM quads)").fetchone()[0]
+
+    def contexts(self, triple=None):
+        if triple is None or triple == (None, None, None):
+            cursor = self._connection.execute("SELECT c FROM graphs UNION SELECT DISTINCT c FROM quads")
+        else:
+            where = self._where(triple, None)
+            if where is None:
+                return
+            cursor = self._connection.execute("SELECT DISTINCT c FROM quads" + where[0], where[1])
+        for (id,) in cursor.fetchall():
+            yield self._graph(id)
+
+    def add_graph(self, graph):
+        self._connection.execute("INSERT OR IGNORE INTO graphs (c) VALUES (?)",
+                                 (self._id(graph.identifier, True),))
+
+    def remove_graph(self, graph):
+        id = self._id(graph.identifier)
+        if id is not None:
+            self._connection.execute("DELETE FROM quads WHERE c = ?", (id,))
+            self._connection.execute("DELETE FROM graphs WHERE c = ?", (id,))
+
+    def bind(self, prefix, namespace, override=True):
+        if not override and (self.namespace(prefix) is not None or self.prefix(namespace) is not None):
+            return
+        self._connection.execute("DELETE FROM namespaces WHERE prefix = ? OR uri = ?", (prefix, str(namespace)))
+        self._connection.execute("INSERT INTO namespaces (prefix, uri) VALUES (?, ?)", (prefix, str(namespace)))
+
+    def namespace(self, prefix):
+        row = self._connection.execute("SELECT uri FROM namespaces WHERE prefix = ?", (prefix,)).fetchone()
+        return URIRef(row[0]) if row is not None else None
+
+    def prefix(self, namespace):
+        row = self._connection.execute("SELECT prefix FROM namespaces WHERE uri = ?", (str(namespace),)).fetchone()
+        return row[0] if row is not None else None
+
+    def namespaces(self):
+        for (prefix, uri) in self._connection.execute("SELECT prefix, uri FROM namespaces").fetchall():
+            yield prefix, URIRef(uri)
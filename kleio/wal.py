@@ -0,0 +1,117 @@
+"""
+Append-only write-ahead log file. Records are appended as groups of lines, each group closed by a commit line, and
+a group is only read back once its commit line made it to the file, so a crash in the middle of an append loses that
+group as a whole. Threads appending at the same time share fsync calls (group commit).
+
+fsync policies:
+
+    always      every append returns once its group is on disk, concurrent appends are synced together
+    interval    the file is synced on the first append at least interval seconds after the last sync, and on close
+    never       syncing is left to the operating system, the log still survives a crash of the process
+"""
+
+import os
+import threading
+import time
+
+
+POLICIES = ("always", "interval", "never")
+
+COMMIT = b"C\n"
+
+
+class WriteAheadLog(object):
+
+    def __init__(self, path, fsync="interval", interval=1.0):
+        if fsync not in POLICIES:
+            raise ValueError("fsync policy must be one of %s, not %s" % (", ".join(POLICIES), fsync))
+        self.path = path
+        self.fsync = fsync
+        self.interval = interval
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self._mutex = threading.Lock()
+        self._sync_mutex = threading.Lock()
+        self._written = 0
+        self._synced = 0
+        self._last_sync = time.monotonic()
+
+    @property
+    def size(self):
+        return os.fstat(self._fd).st_size
+
+    def append(self, data):
+        """
+        Append data, the bytes of one or more complete lines, as one group followed by a commit line.
+        """
+        with self._mutex:
+            os.write(self._fd, data + COMMIT)
+            self._written += 1
+            position = self._written
+        if self.fsync == "always":
+            self._sync(position)
+        elif self.fsync == "interval" and time.monotonic() - self._last_sync >= self.interval:
+            self.sync()
+
+    def sync(self):
+        """
+        Force everything appended so far to disk.
+        """
+        self._sync(self._written)
+
+    def _sync(self, position):
+        with self._sync_mutex:
+            # a thread that synced while this one waited may have synced this group already
+            if self._synced >= position:
+                return
+            position = self._written
+            os.fsync(self._fd)
+            self._synced = position
+            self._last_sync = time.monotonic()
+
+    def read(self):
+        """
+        Return the groups committed to the log, each a list of lines without their line ends, and cut off a group
+        left incomplete by a crash.
+        """
+        with self._mutex:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            chunks = []
+            while True:
+                chunk = os.read(self._fd, 1 << 20)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            data = b"".join(chunks)
+            groups = []
+            lines = []
+            end = 0
+            position = 0
+            for line in data.splitlines(True):
+                position += len(line)
+                if line == COMMIT:
+                    groups.append(lines)
+                    lines = []
+                    end = position
+                elif line.endswith(b"\n"):
+                    lines.append(line[:-1])
+            if end < len(data):
+                os.ftruncate(self._fd, end)
+                os.fsync(self._fd)
+            return groups
+
+    def reset(self):
+        """
+        Empty the log, e.g. once its contents are in a snapshot.
+        """
+        with self._mutex, self._sync_mutex:
+            os.ftruncate(self._fd, 0)
+            os.fsync(self._fd)
+            self._synced = self._written
+
+    def close(self):
+        if self._fd is None:
+            return
+        if self.fsync != "never":
+            self.sync()
+        os.close(self._fd)
+        self._fd = None
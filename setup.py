@@ -32,6 +32,7 @@ setup(
     description='A simple python implementation of the W3C PROV data model',
     long_description=description,
     install_requires=['rdflib', 'rdflib-jsonld', 'isodate'],
+    extras_require={'numpy': ['numpy']},
     license='MIT',
     packages=packages,
     keywords='provenance PROV PROV-O rdf',
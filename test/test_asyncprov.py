@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+
+from kleio import prov
+from kleio.asyncprov import AsyncProvEmitter
+
+
+class TestAsyncProvEmitter(unittest.TestCase):
+
+    def setUp(self):
+        self.session = prov.ProvSession()
+        self.session.ns("test", "http://tw.rpi.edu/ns/test#")
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_record_and_flush(self):
+        async def main():
+            emitter = AsyncProvEmitter(self.session)
+            emitter.record(lambda: prov.Entity("test:entity").set_was_generated_by(prov.Activity("test:activity")))
+            await emitter.flush()
+            await emitter.close()
+        self.run_async(main())
+        with self.session:
+            entity = prov.Entity.wrap("test:entity")
+            self.assertEqual(entity.get_was_generated_by()[0].identifier,
+                             prov.Activity.node("test:activity"))
+
+    def test_records_applied_in_order(self):
+        async def main():
+            emitter = AsyncProvEmitter(self.session, batch_size=3)
+            activity = "test:activity"
+            for i in range(10):
+                emitter.record(lambda i=i: prov.Activity(activity).set(prov.RDFS.label, prov.Literal(str(i))))
+            label = await emitter.run(lambda: prov.Activity.wrap(activity).get_label())
+            await emitter.close()
+            return label
+        self.assertEqual(self.run_async(main()), ["9"])
+
+    def test_run_returns_result_and_raises(self):
+        async def main():
+            emitter = AsyncProvEmitter(self.session)
+            self.assertEqual(await emitter.run(lambda x: x + 1, 1), 2)
+            with self.assertRaises(ValueError):
+                await emitter.run(int, "not a number")
+            await emitter.close()
+        self.run_async(main())
+
+    def test_failed_record_does_not_drop_batch(self):
+        async def main():
+            emitter = AsyncProvEmitter(self.session)
+            emitter.record(prov.Entity, "test:first")
+            emitter.record(int, "not a number")
+            emitter.record(prov.Entity, "test:second")
+            await emitter.flush()
+            await emitter.close()
+        with self.assertLogs("kleio.asyncprov"):
+            self.run_async(main())
+        self.assertEqual(len(self.session.ds), 2)
+
+    def test_failed_batch_does_not_stop_emitter(self):
+        async def main():
+            emitter = AsyncProvEmitter(self.session)
+            emitter.record(lambda: prov.Entity("test:entity").add(prov.PROV.value, 42))
+            await emitter.flush()
+            result = await asyncio.wait_for(emitter.run(lambda: "ok"), 5)
+            await emitter.close()
+            return result
+        with self.assertLogs("kleio.asyncprov"):
+            self.assertEqual(self.run_async(main()), "ok")
+
+    def test_serialize_async(self):
+        async def main():
+            emitter = AsyncProvEmitter(self.session)
+            emitter.record(prov.Entity, "test:entity")
+            data = await emitter.serialize_async(format="nt")
+            await emitter.close()
+            return data
+        self.assertIn("<http://tw.rpi.edu/ns/test#entity>", self.run_async(main()))
+
+    def test_emit_waits_for_room(self):
+        async def main():
+            emitter = AsyncProvEmitter(self.session, max_pending=2)
+            for i in range(20):
+                await emitter.emit(prov.Entity, "test:entity-%d" % i)
+            await emitter.close()
+        self.run_async(main())
+        self.assertEqual(len(self.session.ds), 20)
+
+if __name__ == '__main__':
+    unittest.main()
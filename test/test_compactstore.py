@@ -0,0 +1,103 @@
+import random
+import unittest
+
+from rdflib import ConjunctiveGraph, Literal, URIRef
+
+from kleio import prov
+from kleio.compactstore import CompactStore
+
+
+class TestCompactStore(unittest.TestCase):
+
+    def setUp(self):
+        prov.configure_store("Compact")
+        prov.ns("test", "http://tw.rpi.edu/ns/test#")
+
+    def tearDown(self):
+        prov.configure_store()
+
+    def test_store_plugin(self):
+        self.assertTrue(isinstance(prov.ds.store, CompactStore))
+
+    def test_entity(self):
+        entity = prov.Entity("test:entity")
+        entity.set_label("example entity")
+        entity.set_was_generated_by(prov.Activity("test:activity"))
+        self.assertEqual(entity.get_label(), ["example entity"])
+        self.assertEqual(entity.get_was_generated_by()[0].identifier, prov.Activity.node("test:activity"))
+
+    def test_set_replaces_value(self):
+        activity = prov.Activity("test:activity")
+        activity.set_label("first")
+        activity.set(prov.RDFS.label, Literal("second"))
+        self.assertEqual(activity.get_label(), ["second"])
+
+    def test_bundle(self):
+        bundle = prov.bundle(id="test:bundle")
+        e1 = prov.Entity(id="test:entity-in-bundle", bundle=bundle)
+        e2 = prov.Entity(id="test:entity-not-in-bundle")
+        self.assertTrue(e1.identifier in bundle.subjects())
+        self.assertFalse(e2.identifier in bundle.subjects())
+        self.assertTrue(e1.identifier in prov.ds.subjects())
+        prov.clear_graph(bundle)
+        self.assertEqual(len(bundle), 0)
+        self.assertFalse(e1.identifier in prov.ds.subjects())
+        self.assertTrue(e2.identifier in prov.ds.subjects())
+
+    def test_large_fan_out(self):
+        collection = prov.Collection("test:collection")
+        with prov.batch():
+            for i in range(100):
+                collection.set_had_member("test:member-%d" % i)
+        self.assertEqual(len(list(prov.ds.objects(collection.identifier, prov.PROV.hadMember))), 100)
+        prov.ds.remove((collection.identifier, prov.PROV.hadMember, prov.Entity.node("test:member-7")))
+        self.assertEqual(len(list(prov.ds.objects(collection.identifier, prov.PROV.hadMember))), 99)
+
+    def test_serialize_matches_memory_store(self):
+        bundle = prov.bundle(id="test:bundle")
+        entity = prov.Entity("test:entity", bundle=bundle)
+        entity.set_label("example entity")
+        entity.set_generated_at_time("2014-05-01T00:00:00")
+        entity.set_was_generated_by(prov.Activity("test:activity"))
+        memory = ConjunctiveGraph()
+        memory.parse(data=prov.serialize(format="nquads"), format="nquads")
+        self.assertEqual(set((s, p, o, g.identifier) for (s, p, o, g) in memory.quads((None, None, None))),
+                         set(prov.ds.quads((None, None, None))))
+
+    def test_matches_memory_store(self):
+        rng = random.Random(42)
+        terms = [URIRef("http://tw.rpi.edu/ns/test#t%d" % i) for i in range(6)] + [Literal("x"), Literal(1)]
+        names = [URIRef("http://tw.rpi.edu/ns/test#g%d" % i) for i in range(3)]
+        compact = ConjunctiveGraph(store=CompactStore())
+        memory = ConjunctiveGraph()
+        for step in range(3000):
+            triple = (rng.choice(terms[:6]), rng.choice(terms[:3]), rng.choice(terms))
+            name = rng.choice(names)
+            if rng.random() < 0.7:
+                compact.get_context(name).add(triple)
+                memory.get_context(name).add(triple)
+            else:
+                pattern = tuple(t if rng.random() < 0.6 else None for t in triple)
+                context = name if rng.random() < 0.5 else None
+                for graph in (compact, memory):
+                    (graph.get_context(context) if context is not None else graph).remove(pattern)
+        self.assertEqual(len(compact), len(memory))
+        for name in names:
+            self.assertEqual(set(compact.get_context(name)), set(memory.get_context(name)))
+            self.assertEqual(len(compact.get_context(name)), len(memory.get_context(name)))
+        for triple in set(memory):
+            for pattern in [(triple[0], None, None), (None, triple[1], None), (None, None, triple[2]),
+                            (triple[0], triple[1], None), (None, triple[1], triple[2]),
+                            (triple[0], None, triple[2]), triple]:
+                self.assertEqual(set(compact.triples(pattern)), set(memory.triples(pattern)))
+            self.assertEqual(set(c.identifier for c in compact.contexts(triple)),
+                             set(c.identifier for c in memory.contexts(triple)))
+
+    def test_remove_graph(self):
+        bundle = prov.bundle(id="test:bundle")
+        prov.Entity(id="test:entity-in-bundle", bundle=bundle)
+        prov.ds.remove_graph(bundle)
+        self.assertEqual(len(prov.ds), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from rdflib import BNode, Dataset, Graph
+from rdflib.compare import isomorphic
+
+from kleio import parallel, prov
+
+
+class TestParallelLoad(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.session = prov.ProvSession()
+        self.session.ns("test", "http://tw.rpi.edu/ns/test#")
+        with self.session:
+            bundle = prov.bundle("test:bundle")
+            for i in range(200):
+                entity = prov.Entity("test:entity%d" % i, bundle=bundle if i % 2 else None)
+                entity.set_label(u"entité \"%d\"\n" % i)
+                entity.set_was_derived_from(prov.Entity("test:entity%d" % (i // 2)))
+                entity.set_was_generated_by(prov.Activity("test:activity%d" % i))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, format, graph):
+        path = os.path.join(self.directory, "prov." + format)
+        with open(path, "wb") as stream:
+            stream.write(graph.serialize(format=format))
+        return path
+
+    def assertSameGraphs(self, expected, actual):
+        default = expected.default_context.identifier
+        self.assertEqual(len(actual), len(expected))
+        for graph in expected.contexts():
+            if graph.identifier == default:
+                loaded = actual.default_context
+            else:
+                loaded = actual.graph(graph.identifier)
+            self.assertTrue(isomorphic(graph, loaded), graph.identifier)
+
+    def test_chunks(self):
+        path = self.write("nquads", self.session.ds)
+        ranges = parallel.chunks(path, 1000)
+        self.assertTrue(len(ranges) > 10)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], os.path.getsize(path))
+        with open(path, "rb") as stream:
+            for (start, end) in ranges:
+                stream.seek(end - 1)
+                self.assertTrue(end == os.path.getsize(path) or stream.read(1) == b"\n")
+
+    def test_load_nquads(self):
+        path = self.write("nquads", self.session.ds)
+        for workers in (1, 2):
+            loaded = prov.ProvSession()
+            parallel.load(path, loaded.ds, workers=workers, chunk_size=1000)
+            self.assertSameGraphs(self.session.ds, loaded.ds)
+
+    def test_load_ntriples_into_bundle(self):
+        path = self.write("nt", self.session.ds.default_context)
+        loaded = prov.ProvSession()
+        with loaded:
+            bundle = prov.bundle("http://tw.rpi.edu/ns/test#loaded")
+            prov.load_parallel(path, format="nt", workers=2, bundle=bundle)
+        self.assertEqual(len(loaded.ds.default_context), 0)
+        bundle.remove((bundle.identifier, None, None))
+        self.assertEqual(set(bundle), set(self.session.ds.default_context))
+
+    def test_blank_nodes_across_chunks(self):
+        path = os.path.join(self.directory, "bnodes.nt")
+        with open(path, "w") as stream:
+            for i in range(100):
+                stream.write('_:b1 <http://tw.rpi.edu/ns/test#value> "%d" .\n' % i)
+            stream.write('_:b2 <http://tw.rpi.edu/ns/test#value> "other" .\n')
+        loaded = prov.ProvSession()
+        loaded.load_parallel(path, format="nt", workers=2)
+        subjects = set(loaded.ds.subjects())
+        self.assertEqual(len(subjects), 2)
+        self.assertTrue(all(isinstance(subject, BNode) for subject in subjects))
+        self.assertEqual(len(loaded.ds), 101)
+        again = prov.ProvSession()
+        parallel.load(path, again.ds, format="nt", workers=1, chunk_size=64)
+        self.assertTrue(isomorphic(loaded.ds.default_context, again.ds.default_context))
+        self.assertFalse(subjects & set(again.ds.subjects()))
+
+    def test_unsupported_format(self):
+        path = self.write("nt", self.session.ds.default_context)
+        self.assertRaises(ValueError, prov.ProvSession().load_parallel, path, format="turtle")
+
+
+class TestExportBundles(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.session = prov.ProvSession()
+        self.session.ns("test", "http://tw.rpi.edu/ns/test#")
+        with self.session:
+            self.bundles = [prov.bundle("test:bundle%d" % i) for i in range(5)]
+            for (i, bundle) in enumerate(self.bundles):
+                for j in range(20):
+                    entity = prov.Entity("test:entity%d-%d" % (i, j), bundle=bundle)
+                    entity.set_label(u"entité %d" % j)
+                    entity.set_was_generated_by(prov.Activity("test:activity%d" % i, bundle=bundle))
+                metadata = prov.Bundle(bundle.identifier)
+                metadata.set_was_generated_by(prov.Activity("test:run%d" % i))
+            prov.Entity("test:unrelated")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def metadata(self, bundle):
+        return set(self.session.ds.default_context.triples((bundle.identifier, None, None)))
+
+    def unnamed(self, loaded, bundle):
+        # the parsers name the unnamed graph after the source or with a fresh blank node
+        return set(triple for graph in loaded.contexts() if graph.identifier != bundle.identifier for triple in graph)
+
+    def test_trig(self):
+        for workers in (1, 2):
+            timings = self.session.export_bundles(self.directory, workers=workers)
+            self.assertEqual(set(timings), set(bundle.identifier for bundle in self.bundles))
+            for bundle in self.bundles:
+                (path, seconds) = timings[bundle.identifier]
+                self.assertTrue(seconds > 0)
+                self.assertTrue(path.endswith(".trig"))
+                loaded = Dataset()
+                loaded.parse(path, format="trig")
+                self.assertEqual(set(loaded.graph(bundle.identifier)), set(bundle))
+                self.assertEqual(self.unnamed(loaded, bundle), self.metadata(bundle))
+
+    def test_nquads(self):
+        with self.session:
+            timings = prov.export_bundles(self.directory, format="nquads", bundles=self.bundles[:2])
+        self.assertEqual(len(timings), 2)
+        for bundle in self.bundles[:2]:
+            loaded = Dataset()
+            loaded.parse(timings[bundle.identifier][0], format="nquads")
+            self.assertEqual(set(loaded.graph(bundle.identifier)), set(bundle))
+            self.assertEqual(self.unnamed(loaded, bundle), self.metadata(bundle))
+
+    def test_turtle_merges_metadata(self):
+        timings = self.session.export_bundles(self.directory, format="turtle", workers=2)
+        bundle = self.bundles[3]
+        loaded = Graph()
+        loaded.parse(timings[bundle.identifier][0], format="turtle")
+        self.assertEqual(set(loaded), set(bundle) | self.metadata(bundle))
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         sorted("http%3A%2F%2Ftw.rpi.edu%2Fns%2Ftest%23bundle" + "%d.ttl" % i for i in range(5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,25 @@
 __author__ = 'szednik'
 
+import csv
+import os
+import shutil
+import tempfile
+import threading
 import unittest
+from io import BytesIO, StringIO
 from datetime import datetime
 from rdflib.resource import Resource
-from rdflib import Graph
+from rdflib import Graph, ConjunctiveGraph
+from rdflib.compare import isomorphic
 from rdflib.plugin import PluginException
 
 from kleio import prov
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class TestPROV(unittest.TestCase):
 
@@ -47,6 +59,656 @@ class TestPROV(unittest.TestCase):
         collection = prov.Collection("test:collection")
         self.assertTrue(isinstance(collection, prov.Entity))
 
+    def test_collection_member_count(self):
+        collection = prov.Collection("test:collection")
+        self.assertEqual(collection.get_member_count(), 0)
+        collection.set_had_member(prov.Entity("test:member-1"))
+        collection.set_had_member("test:member-2")
+        collection.set_had_member("test:member-2")
+        self.assertEqual(collection.get_member_count(), 2)
+        self.assertTrue(collection.has_member("test:member-1"))
+        self.assertTrue(collection.has_member(prov.Entity.wrap("test:member-2")))
+        self.assertFalse(collection.has_member("test:member-3"))
+
+    def test_collection_member_index_built_from_store(self):
+        prov.ds.add((prov.Entity.node("test:collection"), prov.PROV.hadMember, prov.Entity.node("test:member")))
+        collection = prov.Collection.wrap("test:collection")
+        self.assertEqual(collection.get_member_count(), 1)
+        self.assertTrue(collection.has_member("test:member"))
+
+    def test_collection_member_count_in_bundle(self):
+        bundle = prov.bundle("test:bundle")
+        collection = prov.Collection("test:collection", bundle=bundle)
+        self.assertEqual(prov.Collection.wrap(collection.identifier).get_member_count(), 0)
+        collection.set_had_member("test:member")
+        self.assertEqual(collection.get_member_count(), 1)
+        self.assertEqual(prov.Collection.wrap(collection.identifier).get_member_count(), 1)
+        prov.clear_graph(bundle)
+        self.assertEqual(collection.get_member_count(), 0)
+
+    def test_collection_member_count_in_batch(self):
+        collection = prov.Collection("test:collection")
+        with prov.batch():
+            collection.set_had_member("test:member-1")
+            self.assertEqual(collection.get_member_count(), 1)
+            collection.set_had_member("test:member-2")
+            self.assertEqual(collection.get_member_count(), 2)
+        self.assertEqual(collection.get_member_count(), 2)
+        try:
+            with prov.batch():
+                collection.set_had_member("test:member-3")
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(collection.get_member_count(), 2)
+
+    def test_collection_member_index_does_not_flush_batch(self):
+        collection = prov.Collection("test:collection")
+        size = len(prov.ds)
+        try:
+            with prov.batch():
+                collection.set_had_member("test:member")
+                self.assertEqual(collection.get_member_count(), 1)
+                self.assertTrue(collection.has_member("test:member"))
+                self.assertEqual(len(prov.ds), size)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(len(prov.ds), size)
+        self.assertEqual(collection.get_member_count(), 0)
+
+    def test_collection_iter_members(self):
+        collection = prov.Collection("test:collection")
+        collection.set_had_member("test:member-1")
+        collection.set_had_member("test:member-2")
+        members = collection.iter_members()
+        self.assertFalse(isinstance(members, list))
+        self.assertEqual(set(m.identifier for m in members),
+                         set(m.identifier for m in collection.get_had_member()))
+        self.assertTrue(all(isinstance(m, prov.Entity) for m in collection.get_had_member()))
+
+    def test_lineage_up(self):
+        report = prov.Entity("test:report")
+        data = prov.Entity("test:data")
+        raw = prov.Entity("test:raw")
+        activity = prov.Activity("test:analysis")
+        report.set_was_generated_by(activity)
+        activity.set_used(data)
+        data.set_was_revision_of(raw)
+        upstream = list(prov.lineage(report))
+        self.assertEqual([r.identifier for r in upstream], [activity.identifier, data.identifier, raw.identifier])
+        self.assertTrue(isinstance(upstream[0], prov.Activity))
+        self.assertTrue(isinstance(upstream[1], prov.Entity))
+
+    def test_lineage_down_and_depth(self):
+        a = prov.Entity("test:a")
+        b = prov.Entity("test:b")
+        c = prov.Entity("test:c")
+        b.set_was_derived_from(a)
+        c.set_was_derived_from(b)
+        self.assertEqual([r.identifier for r in prov.lineage("test:a", direction="down")],
+                         [b.identifier, c.identifier])
+        self.assertEqual([r.identifier for r in prov.lineage(c, max_depth=1)], [b.identifier])
+        self.assertEqual(list(prov.lineage(c, relations=[prov.PROV.used])), [])
+        self.assertRaises(ValueError, lambda: list(prov.lineage(c, direction="sideways")))
+
+    def test_lineage_cycle_and_no_writes(self):
+        a = prov.Entity("test:a")
+        b = prov.Entity("test:b")
+        a.set_was_derived_from(b)
+        b.set_was_derived_from(a)
+        size = len(prov.ds)
+        self.assertEqual([r.identifier for r in prov.lineage(a)], [b.identifier])
+        self.assertEqual(len(prov.ds), size)
+
+    def test_lineage_in_bundle(self):
+        bundle = prov.bundle("test:bundle")
+        a = prov.Entity("test:a", bundle=bundle)
+        b = prov.Entity("test:b")
+        a.set_was_derived_from(prov.Entity("test:source", bundle=bundle))
+        b.set_was_derived_from(a)
+        self.assertEqual([r.identifier for r in prov.lineage(prov.Entity.wrap(b.identifier, bundle))], [])
+        self.assertEqual(len(list(prov.lineage(b))), 2)
+
+    def check_ancestry(self, session):
+        with session:
+            session.ns("test", "http://tw.rpi.edu/ns/test#")
+            raw = prov.Entity("test:raw")
+            data = prov.Entity("test:data")
+            report = prov.Entity("test:report")
+            data.set_had_primary_source(raw)
+            report.set_was_derived_from(data)
+            self.assertEqual(set(e.identifier for e in report.get_ancestors()), {raw.identifier, data.identifier})
+            self.assertTrue(report.has_ancestor("test:raw"))
+            self.assertFalse(raw.has_ancestor(report))
+            self.assertEqual(set(e.identifier for e in raw.get_descendants()), {data.identifier, report.identifier})
+            older = prov.Entity("test:older")
+            raw.set_was_revision_of(older)
+            self.assertTrue(report.has_ancestor(older))
+            self.assertEqual(len(older.get_descendants()), 3)
+            older.set_was_quoted_from(report)
+            self.assertEqual(len(report.get_ancestors()), 3)
+            self.assertTrue(raw.has_ancestor(report))
+            self.assertEqual(len(raw.get_descendants()), 3)
+
+    def test_ancestors_without_index(self):
+        self.check_ancestry(prov.ProvSession())
+
+    def test_ancestors_with_index(self):
+        session = prov.ProvSession()
+        session.set_reachability_index(True)
+        self.check_ancestry(session)
+
+    def test_reachability_index_does_not_flush_batch(self):
+        session = prov.ProvSession()
+        session.set_reachability_index(True)
+        with session:
+            a = prov.Entity("http://tw.rpi.edu/ns/test#a")
+            try:
+                with prov.batch():
+                    b = prov.Entity("http://tw.rpi.edu/ns/test#b")
+                    b.set_was_derived_from(a)
+                    self.assertTrue(b.has_ancestor(a))
+                    raise ValueError
+            except ValueError:
+                pass
+            self.assertEqual(len(session.ds), 1)
+            self.assertFalse(b.has_ancestor(a))
+
+    def test_reachability_index_sees_bundles_and_direct_writes(self):
+        session = prov.ProvSession()
+        session.set_reachability_index(True)
+        with session:
+            bundle = prov.bundle("http://tw.rpi.edu/ns/test#bundle")
+            a = prov.Entity("http://tw.rpi.edu/ns/test#a", bundle=bundle)
+            b = prov.Entity("http://tw.rpi.edu/ns/test#b")
+            b.set_was_derived_from(a)
+            self.assertTrue(b.has_ancestor(a))
+            c = prov.Entity.node("http://tw.rpi.edu/ns/test#c")
+            bundle.add((a.identifier, prov.PROV.wasDerivedFrom, c))
+            self.assertFalse(b.has_ancestor(c))
+            session.invalidate_indexes()
+            self.assertTrue(b.has_ancestor(c))
+            prov.clear_graph(bundle)
+            self.assertFalse(b.has_ancestor(c))
+
+    def check_temporal_queries(self, session):
+        with session:
+            session.ns("test", "http://tw.rpi.edu/ns/test#")
+            for hour in (3, 1, 2, 0):
+                entity = prov.Entity("test:entity%d" % hour)
+                entity.set_generated_at_time("2014-05-01T%02d:30:00" % hour)
+            prov.Entity("test:entity0").set_invalidated_at_time("2014-05-01T01:00:00")
+            # the same instant written in another time zone
+            prov.Entity("test:entity1").set_generated_at_time("2014-05-01T03:30:00+02:00")
+            activity = prov.Activity("test:activity")
+            activity.set_started_at_time(datetime(2014, 5, 1, 0, 0))
+            with prov.batch():
+                prov.Activity("test:batched").set_started_at_time("2014-05-01T02:00:00")
+                names = [e.identifier.split("#")[1] for e in prov.events_between("2014-05-01T01:00:00",
+                                                                                 "2014-05-01T03:00:00")]
+                self.assertEqual(names, ["entity1", "entity2"])
+                self.assertEqual([a.identifier.split("#")[1] for a in
+                                  prov.latest_events(prop=prov.PROV.startedAtTime)], ["batched", "activity"])
+            self.assertEqual([e.identifier.split("#")[1] for e in prov.latest_events(2)], ["entity3", "entity2"])
+            self.assertEqual([e.identifier.split("#")[1] for e in prov.latest_events(2, before="2014-05-01T02:30:00")],
+                             ["entity2", "entity1"])
+            self.assertEqual([e.identifier.split("#")[1] for e in prov.as_of("2014-05-01T02:00:00")], ["entity1"])
+            self.assertEqual(len(list(prov.as_of("2014-05-01T02:00:00", kind=prov.Activity))), 2)
+            self.assertTrue(all(isinstance(e, prov.Entity) for e in prov.events_between(None, None)))
+            self.assertRaises(ValueError, prov.events_between, None, None, prov.RDFS.label)
+
+    def test_temporal_queries_without_index(self):
+        self.check_temporal_queries(prov.ProvSession())
+
+    def test_temporal_queries_with_index(self):
+        session = prov.ProvSession()
+        session.set_temporal_index(True)
+        self.check_temporal_queries(session)
+
+    def test_temporal_index_is_kept_up_to_date(self):
+        session = prov.ProvSession()
+        session.set_temporal_index(True)
+        with session:
+            session.ns("test", "http://tw.rpi.edu/ns/test#")
+            entity = prov.Entity("test:entity")
+            entity.set_generated_at_time("2014-05-01T00:00:00")
+            self.assertEqual(len(list(prov.latest_events())), 1)
+            events = prov.events_between(None, None)
+            entity.set_generated_at_time("2014-05-02T00:00:00")
+            # a query already running keeps the index of the moment it started
+            self.assertEqual(len(list(events)), 1)
+            self.assertEqual(len(list(prov.events_between(None, "2014-05-01T12:00:00"))), 0)
+            self.assertEqual(len(list(prov.events_between("2014-05-01T12:00:00", None))), 1)
+            usage = prov.Usage()
+            usage.set_at_time("2014-05-01T00:00:00")
+            usage.set_at_time("2014-05-03T00:00:00")
+            self.assertEqual(len(list(prov.events_between(None, None, prov.PROV.atTime))), 2)
+            session.ds.add((entity.identifier, prov.PROV.invalidatedAtTime,
+                            prov.Literal("2014-05-01T00:00:00", datatype=prov.XSD.dateTime)))
+            self.assertEqual(len(list(prov.as_of("2014-05-02T12:00:00"))), 1)
+            session.invalidate_indexes()
+            self.assertEqual(len(list(prov.as_of("2014-05-02T12:00:00"))), 0)
+
+    def record_timings(self, session):
+        with session:
+            session.ns("test", "http://tw.rpi.edu/ns/test#")
+            for i in range(3):
+                activity = prov.Activity("test:activity%d" % i)
+                activity.set_started_at_time("2014-05-01T0%d:00:00" % i)
+                if i:
+                    activity.set_ended_at_time("2014-05-01T0%d:30:00+00:00" % i)
+                entity = prov.Entity("test:entity%d" % i)
+                generation = entity.generation(activity)
+                generation.set_at_time("2014-05-01T0%d:15:00" % i)
+            prov.Activity("test:untimed")
+
+    @unittest.skipIf(numpy is None, "needs numpy")
+    def test_event_table(self):
+        for indexed in (False, True):
+            session = prov.ProvSession()
+            session.set_temporal_index(indexed)
+            self.record_timings(session)
+            with session:
+                table = prov.event_table()
+                self.assertEqual(list(table), ["id", "startedAtTime", "endedAtTime"])
+                self.assertEqual(len(table["id"]), 4)
+                started = dict(zip(table["id"], table["startedAtTime"]))
+                self.assertEqual(started[prov.URIRef("http://tw.rpi.edu/ns/test#activity1")],
+                                 numpy.datetime64("2014-05-01T01:00:00"))
+                self.assertTrue(numpy.isnat(started[prov.URIRef("http://tw.rpi.edu/ns/test#untimed")]))
+                generations = prov.event_table(prov.Generation)
+                self.assertEqual(list(generations), ["id", "atTime", "influencer"])
+                latency = dict(zip(generations["influencer"], generations["atTime"]))
+                self.assertEqual([latency[node] - started[node] for node in latency],
+                                 [numpy.timedelta64(15, "m")] * 3)
+                self.assertEqual(len(prov.event_table(prov.Entity)["id"]), 3)
+                self.assertRaises(ValueError, prov.event_table, prov.Agent)
+
+    @unittest.skipIf(numpy is None, "needs numpy")
+    def test_timings(self):
+        session = prov.ProvSession()
+        self.record_timings(session)
+        with session:
+            table = prov.timings(["test:activity2", prov.Activity("test:activity0"), "test:missing"])
+        self.assertEqual(list(table["id"]), [prov.URIRef("http://tw.rpi.edu/ns/test#%s" % i)
+                                             for i in ("activity2", "activity0", "missing")])
+        self.assertEqual(table["duration"][0], numpy.timedelta64(30, "m"))
+        self.assertTrue(numpy.isnat(table["duration"][1:]).all())
+        self.assertEqual(len(session.timings()["duration"]), 4)
+
+    def record_rows(self, session, rows):
+        with session:
+            session.ns("test", "http://tw.rpi.edu/ns/test#")
+            for (entity, activity, agent, generated, used) in rows:
+                entity = prov.Entity(entity)
+                activity = prov.Activity(activity)
+                entity.generation(activity, datetime=generated or None)
+                if used:
+                    activity.usage(prov.Entity(used))
+                if agent:
+                    activity.association(prov.Agent(agent))
+
+    def ingested_session(self, virtual=False):
+        session = prov.ProvSession()
+        session.set_use_inverse_properties(True)
+        session.set_virtual_inference(virtual)
+        session.ns("test", "http://tw.rpi.edu/ns/test#")
+        return session
+
+    def test_ingest_table_matches_row_by_row_recording(self):
+        rows = [("test:e1", "test:a1", "test:agent", "2014-05-01T00:00:00", "test:input"),
+                ("test:e2", "test:a1", "", "", ""),
+                ("test:e3", "test:a2", "test:agent", "2014-05-02T00:00:00", "")]
+        for virtual in (False, True):
+            expected = self.ingested_session(virtual)
+            self.record_rows(expected, rows)
+            session = self.ingested_session(virtual)
+            columns = dict(zip(("e", "a", "agent", "at", "input"), (list(column) for column in zip(*rows))))
+            with session:
+                count = prov.ingest_table(columns, mapping={"entity": "e", "activity": "a", "agent": "agent",
+                                                            "generated_at": "at", "used": "input"}, batch_size=2)
+            self.assertEqual(count, 3)
+            self.assertTrue(isomorphic(session.ds.default_context, expected.ds.default_context))
+
+    def test_ingest_table_from_csv(self):
+        session = prov.ProvSession()
+        session.set_temporal_index(True)
+        session.ns("test", "http://tw.rpi.edu/ns/test#")
+        stream = StringIO("activity,started_at,ended_at,agent\n"
+                          "test:a1,2014-05-01T00:00:00,2014-05-01T01:00:00,test:agent\n"
+                          "test:a2,2014-05-01T02:00:00,,\n")
+        with session:
+            bundle = prov.bundle("test:bundle")
+            self.assertEqual(len(list(prov.latest_events(prop=prov.PROV.startedAtTime))), 0)
+            self.assertEqual(prov.ingest_table(stream, bundle=bundle), 2)
+            self.assertEqual(len(list(prov.latest_events(prop=prov.PROV.startedAtTime))), 2)
+            activity = prov.Activity("test:a1", bundle=bundle)
+            self.assertEqual(activity.get_ended_at_time(), self.get_datetime("2014-05-01T01:00:00"))
+            self.assertEqual(len(activity.get_was_associated_with()), 1)
+            self.assertFalse(prov.Activity("test:a2", bundle=bundle).has_was_associated_with())
+        self.assertEqual(len(session.ds.default_context), 0)
+
+    @unittest.skipIf(numpy is None, "needs numpy")
+    def test_ingest_table_from_arrays(self):
+        session = prov.ProvSession()
+        n = 50
+        columns = {"entity": numpy.array(["http://tw.rpi.edu/ns/test#e%d" % i for i in range(n)]),
+                   "activity": numpy.array(["http://tw.rpi.edu/ns/test#a%d" % (i % 5) for i in range(n)]),
+                   "generated_at": numpy.datetime64("2014-05-01T00:00:00") + numpy.arange(n).astype("m8[s]")}
+        columns["generated_at"][3] = numpy.datetime64("NaT")
+        self.assertEqual(session.ingest_table(columns), n)
+        self.assertEqual(len(list(session.ds.subjects(prov.RDF.type, prov.PROV.Generation))), n)
+        self.assertEqual(len(list(session.ds.triples((None, prov.PROV.atTime, None)))), n - 1)
+        self.assertRaises(ValueError, session.ingest_table, columns, {"entity": "entity", "derived": "entity"})
+        self.assertRaises(ValueError, session.ingest_table, {"entity": [1, 2], "activity": [1]})
+
+    def record_influences(self, session, generated="2014-05-01T12:00:00Z"):
+        with session:
+            session.ns("test", "http://tw.rpi.edu/ns/test#")
+            activity = prov.Activity("test:analysis")
+            report = prov.Entity("test:report")
+            generation = report.generation(activity, datetime=generated, role="test:output")
+            usage = activity.usage(prov.Entity("test:data"))
+            activity.association(prov.Agent("test:analyst"), plan="test:protocol")
+        return generation, usage
+
+    def test_content_ids(self):
+        session = prov.ProvSession()
+        self.assertFalse(session.using_content_ids())
+        (generation, _) = self.record_influences(session)
+        self.assertIsInstance(generation.identifier, prov.BNode)
+
+        session = prov.ProvSession()
+        session.set_content_ids(True)
+        (generation, usage) = self.record_influences(session)
+        self.assertTrue(generation.identifier.startswith("urn:uuid:"))
+        self.assertNotEqual(generation.identifier, usage.identifier)
+        self.assertFalse([term for triple in session.ds for term in triple if isinstance(term, prov.BNode)])
+        count = len(session.ds)
+        self.assertEqual(self.record_influences(session)[0].identifier, generation.identifier)
+        self.assertEqual(len(session.ds), count)
+        # the same instant in another time zone names the same generation, another role does not
+        (other, _) = self.record_influences(session, "2014-05-01T14:00:00+02:00")
+        self.assertEqual(other.identifier, generation.identifier)
+        with session:
+            explicit = prov.Entity("test:report").generation(prov.Activity("test:analysis"), id="test:generation")
+            self.assertEqual(explicit.identifier, prov.URIRef("http://tw.rpi.edu/ns/test#generation"))
+            another = prov.Entity("test:report").generation(prov.Activity("test:analysis"),
+                                                            datetime="2014-05-01T12:00:00Z", role="test:input")
+            self.assertNotEqual(another.identifier, generation.identifier)
+
+    def test_content_ids_merge_as_union(self):
+        sessions = []
+        for extra in ("test:first", "test:second"):
+            session = prov.ProvSession()
+            session.set_content_ids(True)
+            self.record_influences(session)
+            with session:
+                prov.Activity("test:analysis").usage(prov.Entity(extra), datetime="2014-05-01T11:00:00Z")
+            sessions.append(session)
+        merged = prov.ProvSession()
+        merged.merge(*sessions)
+        self.assertEqual(set(merged.ds), set(sessions[0].ds) | set(sessions[1].ds))
+        self.assertEqual(len(list(merged.ds.subjects(prov.RDF.type, prov.PROV.Usage))), 3)
+
+    def test_ingest_table_content_ids(self):
+        rows = [("test:e1", "test:a1", "test:agent", "2014-05-01T00:00:00Z", "test:input"),
+                ("test:e2", "test:a1", "", "", "")]
+        expected = self.ingested_session()
+        expected.set_content_ids(True)
+        self.record_rows(expected, rows)
+        session = self.ingested_session()
+        session.set_content_ids(True)
+        columns = dict(zip(("entity", "activity", "agent", "generated_at", "used"),
+                           (list(column) for column in zip(*rows))))
+        session.ingest_table(columns)
+        self.assertEqual(set(session.ds), set(expected.ds))
+        session.ingest_table(columns)
+        self.assertEqual(len(session.ds), len(expected.ds))
+
+    def record_edges(self, session):
+        with session:
+            session.ns("test", "http://tw.rpi.edu/ns/test#")
+            bundle = prov.bundle("test:bundle")
+            report = prov.Entity("test:report", bundle=bundle)
+            report.set_label("report")
+            data = prov.Entity("test:data", bundle=bundle)
+            report.set_was_derived_from(data)
+            report.generation(prov.Activity("test:analysis", bundle=bundle))
+            prov.Entity("test:other").set_was_derived_from(data)
+        return bundle
+
+    def read_csv(self, directory, name):
+        with open(os.path.join(directory, name), newline="", encoding="utf-8") as stream:
+            return list(csv.reader(stream))[1:]
+
+    def edges(self, directory, format):
+        if format == "csv":
+            edges = [tuple(int(id) for id in row) for row in self.read_csv(directory, "edges.csv")]
+        else:
+            edges = list(zip(*(numpy.load(os.path.join(directory, name + ".npy")).tolist()
+                               for name in ("source", "relation", "target"))))
+        nodes = dict((int(id), node) for (id, node, _) in self.read_csv(directory, "nodes.csv"))
+        relations = dict((int(id), relation) for (id, relation) in self.read_csv(directory, "relations.csv"))
+        return set((nodes[s], relations[p], nodes[o]) for (s, p, o) in edges)
+
+    def test_export_edges(self):
+        session = prov.ProvSession()
+        bundle = self.record_edges(session)
+        directory = tempfile.mkdtemp()
+        try:
+            formats = ("csv", "npy") if numpy is not None else ("csv",)
+            for format in formats:
+                (count, nodes) = session.export_edges(directory, format=format)
+                name = lambda node: node.n3() if isinstance(node, prov.BNode) else str(node)
+                expected = set((name(s), str(p), name(o))
+                               for (s, p, o) in session.ds.triples((None, None, None))
+                               if p != prov.RDF.type and not isinstance(o, prov.Literal))
+                self.assertEqual(self.edges(directory, format), expected)
+                self.assertEqual(count, len(expected))
+            types = dict((node, type) for (_, node, type) in self.read_csv(directory, "nodes.csv"))
+            self.assertEqual(types["http://tw.rpi.edu/ns/test#analysis"], "Activity")
+            self.assertEqual(types["http://tw.rpi.edu/ns/test#report"], "Entity")
+            # the bundle entity only has types, so it is in no edge
+            self.assertNotIn("http://tw.rpi.edu/ns/test#bundle", types)
+            self.assertEqual(nodes, len(types))
+            self.assertEqual(len([t for t in types.values() if t == "Generation"]), 1)
+
+            with session:
+                prov.export_edges(directory, relations=[prov.PROV.wasDerivedFrom], bundle=bundle, format="csv")
+            self.assertEqual(self.edges(directory, "csv"), {("http://tw.rpi.edu/ns/test#report",
+                                                              str(prov.PROV.wasDerivedFrom),
+                                                              "http://tw.rpi.edu/ns/test#data")})
+            self.assertRaises(ValueError, session.export_edges, directory, format="parquet")
+        finally:
+            shutil.rmtree(directory)
+
+    def delta(self, session, since, format="patch"):
+        stream = BytesIO()
+        removed = BytesIO()
+        end = session.export_delta(stream, since, format, removed)
+        return end, stream.getvalue().decode("utf-8").splitlines(), removed.getvalue().decode("utf-8").splitlines()
+
+    def test_change_log_patch(self):
+        session = prov.ProvSession()
+        session.set_change_log(True)
+        with session:
+            session.ns("test", "http://tw.rpi.edu/ns/test#")
+            entity = prov.Entity("test:entity")
+            entity.set(prov.RDFS.label, prov.Literal("first"))
+            start = prov.checkpoint()
+            entity.set(prov.RDFS.label, prov.Literal("second"))
+            entity.set(prov.RDFS.label, prov.Literal("second"))
+            (end, lines, _) = self.delta(session, start)
+        self.assertEqual(end, start + 2)
+        self.assertEqual([line[:2] for line in lines], ["D ", "A "])
+        self.assertTrue('"first"' in lines[0] and '"second"' in lines[1])
+        self.assertEqual(self.delta(session, end)[1], [])
+
+    def test_change_log_nquads_replays_dataset(self):
+        session = prov.ProvSession()
+        session.set_change_log(True)
+        with session:
+            session.ns("test", "http://tw.rpi.edu/ns/test#")
+            bundle = prov.bundle("test:bundle")
+            entity = prov.Entity("test:entity", bundle=bundle)
+            entity.set_was_generated_by(prov.Activity("test:activity"))
+            with prov.batch():
+                prov.Entity("test:batched").set_was_derived_from(entity)
+            try:
+                with prov.batch():
+                    prov.Entity("test:discarded")
+                    raise ValueError
+            except ValueError:
+                pass
+        (end, lines, removed) = self.delta(session, 0, "nquads")
+        self.assertEqual(removed, [])
+        replica = ConjunctiveGraph()
+        replica.parse(data="\n".join(lines), format="nquads")
+        self.assertEqual(set((s, p, o, c.identifier) for (s, p, o, c) in replica.quads((None, None, None))),
+                         set(session.ds.quads((None, None, None))))
+
+    def test_change_log_clear_graph(self):
+        session = prov.ProvSession()
+        session.set_change_log(True)
+        with session:
+            bundle = prov.bundle("http://tw.rpi.edu/ns/test#bundle")
+            prov.Entity("http://tw.rpi.edu/ns/test#entity", bundle=bundle)
+            prov.Entity("http://tw.rpi.edu/ns/test#kept")
+            start = prov.checkpoint()
+            prov.Entity("http://tw.rpi.edu/ns/test#gone", bundle=bundle)
+            prov.clear_graph(bundle)
+        (_, added, removed) = self.delta(session, start, "nquads")
+        self.assertEqual(added, [])
+        self.assertEqual(len(removed), 3)
+        self.assertRaises(ValueError, session.export_delta, BytesIO(), start, "nquads")
+        session.discard_changes(start)
+        self.assertRaises(ValueError, session.export_delta, BytesIO(), 0)
+        self.assertEqual(len(self.delta(session, start)[1]), 5)
+
+    def test_change_log_off(self):
+        self.assertFalse(prov.using_change_log())
+        self.assertRaises(ValueError, prov.checkpoint)
+
+    def test_iter_getters(self):
+        activity = prov.Activity("test:activity")
+        for i in range(3):
+            activity.set_used(prov.Entity("test:entity-%d" % i))
+        used = activity.iter_used()
+        self.assertFalse(isinstance(used, list))
+        self.assertEqual(set(e.identifier for e in used), set(e.identifier for e in activity.get_used()))
+        self.assertTrue(all(isinstance(e, prov.Entity) for e in activity.iter_used()))
+        self.assertEqual(list(activity.iter_generated()), [])
+
+    def test_count_and_has_getters(self):
+        activity = prov.Activity("test:activity")
+        entity = prov.Entity("test:entity")
+        entity.set_was_generated_by(activity)
+        entity.set_was_attributed_to(prov.Agent("test:agent"))
+        self.assertEqual(entity.count_was_generated_by(), 1)
+        self.assertEqual(entity.count_was_derived_from(), 0)
+        self.assertTrue(entity.has_was_generated_by())
+        self.assertTrue(entity.has_was_generated_by(activity))
+        self.assertTrue(entity.has_was_attributed_to("test:agent"))
+        self.assertFalse(entity.has_was_attributed_to("test:other"))
+        self.assertFalse(entity.has_was_derived_from())
+        self.assertEqual(entity.count_was_influenced_by(), 2)
+
+    def test_iter_getters_release_lock(self):
+        session = prov.ProvSession()
+        session.set_thread_safe(True, buffer_size=1)
+        with session:
+            activity = prov.Activity("http://tw.rpi.edu/ns/test#activity")
+            collection = prov.Collection("http://tw.rpi.edu/ns/test#collection")
+            for i in range(2500):
+                entity = prov.Entity("http://tw.rpi.edu/ns/test#entity-%d" % i)
+                activity.set_used(entity)
+                collection.set_had_member(entity)
+            iterators = [activity.iter_used(), collection.iter_members(), prov.lineage(activity)]
+            for iterator in iterators:
+                next(iterator)
+
+        def write():
+            with session:
+                prov.Entity("http://tw.rpi.edu/ns/test#other")
+                session.sync()
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual([1 + sum(1 for _ in iterator) for iterator in iterators], [2500, 2500, 2500])
+
+    def test_iter_getters_do_not_write(self):
+        activity = prov.Activity("test:activity")
+        activity.add(prov.PROV.used, prov.Entity.node("test:untyped"))
+        size = len(prov.ds)
+        self.assertEqual(len(list(activity.iter_used())), 1)
+        self.assertEqual(activity.count_used(), 1)
+        self.assertEqual(len(prov.ds), size)
+
+    def test_qualified_getters(self):
+        entity = prov.Entity("test:entity")
+        derivation = entity.derivation(prov.Entity("test:source"))
+        self.assertEqual(entity.get_derivation()[0].identifier, derivation.identifier)
+        self.assertEqual(derivation.get_entity()[0].identifier, prov.Entity.node("test:source"))
+        activity = prov.Activity("test:activity")
+        activity.set_was_influenced_by(prov.Agent("test:agent"))
+        self.assertEqual(activity.get_was_influenced_by()[0].identifier, prov.Agent.node("test:agent"))
+
+    def record_example(self, session):
+        with session:
+            session.ns("test", "http://tw.rpi.edu/ns/test#")
+            activity = prov.Activity("test:activity")
+            entity = prov.Entity("test:entity")
+            entity.set_was_generated_by(activity)
+            entity.set_was_revision_of(prov.Entity("test:original"))
+            entity.set_specialization_of(prov.Entity("test:general"))
+            entity.set_alternate_of(prov.Entity("test:alternate"))
+            activity.set_used(prov.Entity("test:input"))
+            activity.set_was_associated_with(prov.Agent("test:agent"))
+            return entity, activity
+
+    def test_virtual_inference_getters(self):
+        for inverse in (False, True):
+            materialized = prov.ProvSession()
+            materialized.set_use_inverse_properties(inverse)
+            virtual = prov.ProvSession()
+            virtual.set_use_inverse_properties(inverse)
+            virtual.set_virtual_inference(True)
+            (m_entity, m_activity) = self.record_example(materialized)
+            (v_entity, v_activity) = self.record_example(virtual)
+            self.assertLess(len(virtual.ds), len(materialized.ds))
+            for name in ("was_influenced_by", "was_derived_from", "alternate_of", "was_generated_by"):
+                self.assertEqual(set(r.identifier for r in getattr(v_entity, "get_" + name)()),
+                                 set(r.identifier for r in getattr(m_entity, "get_" + name)()))
+            self.assertEqual(v_entity.count_was_influenced_by(), m_entity.count_was_influenced_by())
+            self.assertTrue(v_entity.has_was_derived_from("http://tw.rpi.edu/ns/test#original"))
+            with virtual:
+                v_alternate = prov.Entity.wrap("test:alternate")
+                reverse = virtual.ds.triples((v_alternate.identifier, prov.PROV.alternateOf, None))
+                self.assertEqual(len(list(reverse)), 0)
+                self.assertEqual([r.identifier for r in v_alternate.get_alternate_of()], [v_entity.identifier])
+            if inverse:
+                self.assertEqual(set(r.identifier for r in v_activity.get_generated()), {v_entity.identifier})
+                self.assertTrue(v_activity.has_generated(v_entity))
+
+    def test_virtual_inference_serialize(self):
+        materialized = prov.ProvSession()
+        virtual = prov.ProvSession()
+        virtual.set_virtual_inference(True)
+        self.record_example(materialized)
+        self.record_example(virtual)
+        m_graph = Graph().parse(data=prov.serialize("nt", materialized.ds), format="nt")
+        v_graph = Graph().parse(data=prov.serialize("nt", virtual.ds, infer=True), format="nt")
+        self.assertEqual(set(v_graph), set(m_graph))
+        lines = list(prov.iter_serialize("nquads", virtual.ds, infer=True))
+        self.assertEqual(len(lines), len(set(lines)))
+        self.assertEqual(len(lines), len(m_graph))
+        x_graph = Graph().parse(data=prov.serialize("turtle", virtual.ds, infer=True), format="turtle")
+        self.assertEqual(len(x_graph), len(m_graph))
+
     def test_activity_constructor(self):
         activity = prov.Activity("test:activity")
         self.assertEqual(activity.identifier, activity.identifier)
@@ -242,6 +904,54 @@ class TestPROV(unittest.TestCase):
         ntriples = prov.serialize(format="nt")
         self.assertIsNotNone(ntriples)
 
+    def test_serialize_to_turtle(self):
+        entity = prov.Entity("test:entity")
+        entity.set_label("example entity")
+        stream = BytesIO()
+        prov.serialize_to(stream, format="turtle")
+        self.assertEqual(stream.getvalue().decode("utf-8"), prov.serialize(format="turtle"))
+
+    def test_serialize_to_chunks(self):
+        for i in range(100):
+            prov.Entity("test:entity%d" % i).set_label("example entity %d" % i)
+        chunks = []
+        stream = BytesIO()
+        stream.write = lambda data: chunks.append(data) or len(data)
+        prov.serialize_to(stream, format="trig", chunk_size=1024)
+        self.assertTrue(len(chunks) > 1)
+        self.assertTrue(all(len(chunk) < 2048 for chunk in chunks))
+
+    def test_serialize_to_ntriples(self):
+        entity = prov.Entity("test:entity")
+        entity.set_label("multi\nline \"label\"")
+        stream = BytesIO()
+        prov.serialize_to(stream, format="nt")
+        graph = Graph().parse(data=stream.getvalue().decode("utf-8"), format="nt")
+        self.assertEqual(set(graph), set(prov.ds.triples((None, None, None))))
+
+    def test_iter_serialize_nquads(self):
+        bundle = prov.bundle(id="test:bundle")
+        prov.Entity(id="test:entity-in-bundle", bundle=bundle)
+        prov.Entity(id="test:entity-not-in-bundle")
+        lines = list(prov.iter_serialize(format="nquads"))
+        self.assertEqual(len(lines), 4)
+        dataset = ConjunctiveGraph()
+        dataset.parse(data="".join(lines), format="nquads")
+        self.assertEqual(len(dataset.get_context(bundle.identifier)), 3)
+
+    def test_iter_serialize_releases_lock(self):
+        prov.Entity(id="test:entity")
+        lines = prov.iter_serialize(format="nt")
+        next(lines)
+        thread = threading.Thread(target=prov.serialize, kwargs={"format": "nt"})
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        lines.close()
+
+    def test_iter_serialize_unsupported(self):
+        self.assertRaises(ValueError, list, prov.iter_serialize(format="turtle"))
+
     def test_bundle_factory_method(self):
         bundle = prov.bundle(id="test:bundle")
         self.assertIsNotNone(bundle)
@@ -260,5 +970,238 @@ class TestPROV(unittest.TestCase):
         self.assertIsNotNone(bundle_entity)
         self.assertEqual(bundle.identifier, bundle_entity.identifier)
 
+    def test_batch_defers_writes(self):
+        with prov.batch():
+            entity = prov.Entity("test:entity")
+            activity = prov.Activity("test:activity")
+            entity.set_was_generated_by(activity)
+            self.assertEqual(len(prov.ds), 0)
+        self.assertEqual(entity.get_was_generated_by()[0].identifier, activity.identifier)
+
+    def test_batch_set_replaces_value(self):
+        activity = prov.Activity("test:activity")
+        activity.set_started_at_time(self.get_datetime("2014-05-01T00:00:00"))
+        with prov.batch():
+            activity.set_started_at_time(self.get_datetime("2014-05-02T00:00:00"))
+            activity.set_started_at_time(self.get_datetime("2014-05-03T00:00:00"))
+        self.assertEqual(activity.get_started_at_time().isoformat(), "2014-05-03T00:00:00")
+
+    def test_batch_bundle(self):
+        bundle = prov.bundle(id="test:bundle")
+        with prov.batch():
+            e1 = prov.Entity(id="test:entity-in-bundle", bundle=bundle)
+            e2 = prov.Entity(id="test:entity-not-in-bundle")
+        self.assertTrue(e1.identifier in bundle.subjects())
+        self.assertFalse(e2.identifier in bundle.subjects())
+
+    def test_batch_size_flushes(self):
+        with prov.batch(size=2):
+            prov.Entity("test:entity")
+            prov.Entity("test:other")
+            self.assertEqual(len(prov.ds), 2)
+
+    def test_batch_discarded_on_error(self):
+        try:
+            with prov.batch():
+                prov.Entity("test:entity")
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(len(prov.ds), 0)
+
+    def count_store_adds(self, fn):
+        store = prov.ds.store
+        added = []
+
+        def add(triple, context, quoted=False):
+            added.append(triple)
+            type(store).add(store, triple, context, quoted)
+
+        store.add = add
+        try:
+            fn()
+        finally:
+            del store.add
+        return len(added)
+
+    def test_getters_do_not_write(self):
+        entity = prov.Entity("test:entity")
+        activity = prov.Activity("test:activity")
+        entity.set_was_generated_by(activity)
+        activity.set_used(prov.Entity("test:input"))
+        adds = self.count_store_adds(lambda: (entity.get_was_generated_by(), entity.get_was_influenced_by(),
+                                              activity.get_used()))
+        self.assertEqual(adds, 0)
+
+    def test_ensure_type_skips_existing_type(self):
+        entity = prov.Entity("test:entity")
+        activity = prov.Activity("test:activity")
+        adds = self.count_store_adds(lambda: entity.set_was_generated_by(activity.identifier))
+        self.assertEqual(adds, 2)
+
+    def test_ensure_type_asserts_missing_type(self):
+        entity = prov.Entity("test:entity")
+        entity.set_was_generated_by("test:activity")
+        activity = prov.URIRef("http://tw.rpi.edu/ns/test#activity")
+        self.assertIn((activity, prov.RDF.type, prov.PROV.Activity), prov.ds)
+
+    def test_wrap(self):
+        entity = prov.Entity.wrap("test:entity")
+        self.assertTrue(isinstance(entity, prov.Entity))
+        self.assertEqual(len(prov.ds), 0)
+
+    def test_generation_types(self):
+        generation = prov.Generation("test:generation")
+        types = set(prov.ds.objects(generation.identifier, prov.RDF.type))
+        self.assertEqual(types, {prov.PROV.Generation, prov.PROV.InstantaneousEvent, prov.PROV.Influence})
+
+    def test_constructor_types_single_write(self):
+        adds = self.count_store_adds(lambda: prov.Revision("test:revision"))
+        self.assertEqual(adds, 3)
+
+    def test_subclass_types(self):
+        class Dataset(prov.Entity):
+            rdf_type = prov.URIRef("http://tw.rpi.edu/ns/test#Dataset")
+
+        dataset = Dataset("test:dataset")
+        types = set(prov.ds.objects(dataset.identifier, prov.RDF.type))
+        self.assertEqual(types, {prov.PROV.Entity, Dataset.rdf_type})
+
+    def test_curie_expansion(self):
+        entity = prov.Entity("test:entity")
+        self.assertEqual(entity.identifier, prov.URIRef("http://tw.rpi.edu/ns/test#entity"))
+
+    def test_curie_unbound_prefix(self):
+        entity = prov.Entity("unbound:entity")
+        self.assertEqual(entity.identifier, prov.URIRef("unbound:entity"))
+
+    def test_absolutize_url_with_port(self):
+        self.assertEqual(prov._absolutize("http://example.org:8080/entity"), "http://example.org:8080/entity")
+
+    def test_ns_rebind_invalidates_cache(self):
+        self.assertEqual(prov._absolutize("test2:entity"), "test2:entity")
+        prov.ns("test2", "http://tw.rpi.edu/ns/test2#")
+        self.assertEqual(prov._absolutize("test2:entity"), "http://tw.rpi.edu/ns/test2#entity")
+
+    def test_parsed_prefix_invalidates_cache(self):
+        self.assertEqual(prov._absolutize("ex:a"), "ex:a")
+        prov.ds.parse(data="@prefix ex: <http://example.org/> . ex:a a ex:Thing .", format="turtle")
+        self.assertEqual(prov.bundle("ex:b").identifier, prov.URIRef("http://example.org/b"))
+        prov.ds.graph(prov.URIRef("http://example.org/g")).bind("other", "http://example.org/other#")
+        self.assertEqual(prov.Entity("other:a").identifier, prov.URIRef("http://example.org/other#a"))
+
+    def test_session_isolated(self):
+        session = prov.ProvSession()
+        entity = prov.Entity("http://tw.rpi.edu/ns/test#entity", bundle=session.ds)
+        entity.set_was_generated_by(prov.Activity("http://tw.rpi.edu/ns/test#activity", bundle=session.ds))
+        self.assertEqual(len(prov.ds), 0)
+        self.assertEqual(len(session.ds), 4)
+
+    def test_session_context(self):
+        with prov.ProvSession() as session:
+            prov.ns("test", "http://tw.rpi.edu/ns/session#")
+            entity = prov.Entity("test:entity")
+            self.assertIs(prov.current_session(), session)
+        self.assertIs(prov.current_session(), prov._default_session)
+        self.assertEqual(entity.identifier, prov.URIRef("http://tw.rpi.edu/ns/session#entity"))
+        self.assertIs(entity.session, session)
+        self.assertEqual(len(prov.ds), 0)
+        self.assertEqual(prov.Entity("test:entity").identifier, prov.URIRef("http://tw.rpi.edu/ns/test#entity"))
+
+    def test_session_config(self):
+        session = prov.ProvSession()
+        session.set_use_inverse_properties(True)
+        entity = prov.Entity(bundle=session.ds)
+        activity = prov.Activity(bundle=session.ds)
+        entity.set_was_generated_by(activity)
+        self.assertFalse(prov.using_inverse_properties())
+        self.assertIn((activity.identifier, prov.PROV.generated, entity.identifier), session.ds)
+
+    def test_session_qualified_relation(self):
+        session = prov.ProvSession()
+        entity = prov.Entity(bundle=session.ds)
+        generation = entity.generation(prov.Activity(bundle=session.ds))
+        self.assertIs(generation.graph, session.ds)
+        self.assertEqual(len(prov.ds), 0)
+
+    def test_session_bundle(self):
+        with prov.ProvSession() as session:
+            bundle = prov.bundle("http://tw.rpi.edu/ns/test#bundle")
+            prov.Entity("http://tw.rpi.edu/ns/test#entity", bundle=bundle)
+        self.assertEqual(len(list(session.ds.contexts())), 2)
+        self.assertEqual(len(prov.ds), 0)
+
+    def test_session_threads_merge(self):
+        sessions = [prov.ProvSession() for i in range(4)]
+
+        def record(session, n):
+            with session:
+                for i in range(50):
+                    entity = prov.Entity("http://tw.rpi.edu/ns/test#entity-%d-%d" % (n, i))
+                    entity.set_was_generated_by(prov.Activity("http://tw.rpi.edu/ns/test#activity-%d" % n))
+
+        threads = [threading.Thread(target=record, args=(session, n)) for (n, session) in enumerate(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        merged = prov.ProvSession()
+        merged.merge(*sessions)
+        self.assertEqual(len(merged.ds), sum(len(session.ds) for session in sessions))
+        self.assertEqual(len(merged.ds), 4 * (1 + 50 * 3))
+
+    def test_thread_safe_reads_own_writes(self):
+        session = prov.ProvSession()
+        session.set_thread_safe(True)
+        entity = prov.Entity("http://tw.rpi.edu/ns/test#entity", bundle=session.ds)
+        activity = prov.Activity("http://tw.rpi.edu/ns/test#activity", bundle=session.ds)
+        entity.set_was_generated_by(activity)
+        self.assertEqual(entity.get_was_generated_by()[0].identifier, activity.identifier)
+
+    def test_thread_safe_batch_discarded_on_error(self):
+        session = prov.ProvSession()
+        session.set_thread_safe(True)
+        with session:
+            prov.Entity("http://tw.rpi.edu/ns/test#kept")
+            try:
+                with prov.batch():
+                    prov.Entity("http://tw.rpi.edu/ns/test#entity")
+                    raise ValueError
+            except ValueError:
+                pass
+        session.sync()
+        self.assertEqual(set(session.ds.subjects()), set([prov.URIRef("http://tw.rpi.edu/ns/test#kept")]))
+
+    def test_thread_safe_stress(self):
+        session = prov.ProvSession()
+        session.set_thread_safe(True, buffer_size=64)
+        errors = []
+
+        def record(n):
+            try:
+                with session:
+                    activity = prov.Activity("http://tw.rpi.edu/ns/test#activity-%d" % n)
+                    for i in range(100):
+                        entity = prov.Entity("http://tw.rpi.edu/ns/test#entity-%d-%d" % (n, i))
+                        entity.set_was_generated_by(activity)
+                        entity.set_generated_at_time(self.get_datetime("2014-05-01T00:00:00"))
+                        entity.set_generated_at_time(self.get_datetime("2014-05-02T00:00:00"))
+                        if i % 50 == 0:
+                            self.assertEqual(len(entity.get_was_generated_by()), 1)
+                            prov.serialize(format="nt", bundle=session.ds)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=record, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        session.sync()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(session.ds), 8 * (1 + 100 * 4))
+        times = set(session.ds.objects(None, prov.PROV.generatedAtTime))
+        self.assertEqual([t.toPython().day for t in times], [2])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from rdflib import BNode, ConjunctiveGraph, Literal
+
+from kleio import prov
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "prov.snapshot")
+        self.session = prov.ProvSession()
+        self.session.ns("test", "http://tw.rpi.edu/ns/test#")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self):
+        with self.session:
+            bundle = prov.bundle("test:bundle")
+            entity = prov.Entity("test:entity", bundle=bundle)
+            entity.set_label("example entity")
+            entity.set(prov.RDFS.comment, Literal("ein Beispiel", lang="de"))
+            entity.set_generated_at_time("2014-05-01T00:00:00")
+            entity.set_was_generated_by(prov.Activity("test:activity"))
+            activity = prov.Activity("test:activity")
+            activity.set_label(u"activité")
+            activity.set_used(prov.Entity())
+            activity.add(prov.PROV.value, Literal(42))
+            prov.bundle("test:empty-bundle")
+
+    def quads(self, session):
+        graph = ConjunctiveGraph()
+        graph.parse(data=prov.serialize("trig", session.ds), format="trig")
+        # the parser names the unnamed graph of the trig document with a fresh blank node
+        return set((s, p, o, None if isinstance(c.identifier, BNode) else c.identifier)
+                   for (s, p, o, c) in graph.quads())
+
+    def test_round_trip(self):
+        self.record()
+        self.session.save_snapshot(self.path)
+        loaded = prov.ProvSession()
+        loaded.load_snapshot(self.path)
+        self.assertEqual(len(loaded.ds), len(self.session.ds))
+        self.assertEqual(set(loaded.ds.quads((None, None, None))), set(self.session.ds.quads((None, None, None))))
+        self.assertEqual(self.quads(loaded), self.quads(self.session))
+
+    def test_namespaces_and_bundles(self):
+        self.record()
+        self.session.save_snapshot(self.path)
+        loaded = prov.ProvSession()
+        loaded.load_snapshot(self.path)
+        self.assertEqual(loaded.absolutize("test:entity"), "http://tw.rpi.edu/ns/test#entity")
+        bundle = loaded.ds.graph(prov.URIRef("http://tw.rpi.edu/ns/test#bundle"))
+        with loaded:
+            entity = prov.Entity.wrap("test:entity", bundle)
+            self.assertEqual(entity.get_label(), ["example entity"])
+            self.assertEqual(entity.get_generated_at_time().year, 2014)
+        self.assertTrue(prov.URIRef("http://tw.rpi.edu/ns/test#empty-bundle") in
+                        [c.identifier for c in loaded.ds.contexts()])
+
+    def test_module_functions(self):
+        with self.session:
+            prov.Entity("test:entity")
+            prov.save_snapshot(self.path)
+        loaded = prov.ProvSession()
+        with loaded:
+            prov.load_snapshot(self.path)
+        self.assertEqual(set(loaded.ds), set(self.session.ds))
+
+    def test_not_a_snapshot(self):
+        with open(self.path, "wb") as stream:
+            stream.write(b"\0" * 1024)
+        self.assertRaises(ValueError, prov.ProvSession().load_snapshot, self.path)
+        open(self.path, "wb").close()
+        self.assertRaises(ValueError, prov.ProvSession().load_snapshot, self.path)
+
+    def test_truncated_snapshot(self):
+        self.record()
+        self.session.save_snapshot(self.path)
+        with open(self.path, "rb") as stream:
+            data = stream.read()
+        for size in (10, len(data) // 2):
+            with open(self.path, "wb") as stream:
+                stream.write(data[:size])
+            self.assertRaises(ValueError, prov.ProvSession().load_snapshot, self.path)
+
+if __name__ == '__main__':
+    unittest.main()
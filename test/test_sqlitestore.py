@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from rdflib import ConjunctiveGraph, Literal, URIRef
+
+from kleio import prov
+
+
+class TestSQLiteStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "prov.db")
+        prov.configure_store("SQLite", self.path)
+        prov.ns("test", "http://tw.rpi.edu/ns/test#")
+
+    def tearDown(self):
+        prov.configure_store()
+        shutil.rmtree(self.directory)
+
+    def reopen(self):
+        prov.configure_store()
+        prov.configure_store("SQLite", self.path, create=False)
+
+    def test_entity_persisted_after_commit(self):
+        entity = prov.Entity("test:entity")
+        entity.set_label("example entity")
+        prov.commit()
+        self.reopen()
+        self.assertEqual(prov.Entity.wrap("test:entity").get_label(), ["example entity"])
+
+    def test_rollback(self):
+        prov.Entity("test:entity")
+        prov.commit()
+        prov.Entity("test:other")
+        prov.rollback()
+        self.assertEqual(len(prov.ds), 1)
+
+    def test_transaction_rolls_back_on_error(self):
+        try:
+            with prov.transaction():
+                prov.Entity("test:entity")
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(len(prov.ds), 0)
+
+    def test_namespaces_persisted(self):
+        prov.commit()
+        self.reopen()
+        self.assertEqual(prov.Entity("test:entity").identifier, URIRef("http://tw.rpi.edu/ns/test#entity"))
+
+    def test_bundle(self):
+        bundle = prov.bundle(id="test:bundle")
+        e1 = prov.Entity(id="test:entity-in-bundle", bundle=bundle)
+        e2 = prov.Entity(id="test:entity-not-in-bundle")
+        prov.commit()
+        self.reopen()
+        bundle = prov.ds.graph(bundle.identifier)
+        self.assertTrue(e1.identifier in bundle.subjects())
+        self.assertFalse(e2.identifier in bundle.subjects())
+
+    def test_batch(self):
+        with prov.batch():
+            entity = prov.Entity("test:entity")
+            activity = prov.Activity("test:activity")
+            entity.set_was_generated_by(activity)
+        self.assertEqual(entity.get_was_generated_by()[0].identifier, activity.identifier)
+
+    def test_set_replaces_value(self):
+        activity = prov.Activity("test:activity")
+        activity.set_label("first")
+        activity.set(prov.RDFS.label, Literal("second"))
+        self.assertEqual(activity.get_label(), ["second"])
+
+    def test_serialize_matches_memory_store(self):
+        entity = prov.Entity("test:entity")
+        entity.set_label("example entity")
+        entity.set_generated_at_time("2014-05-01T00:00:00")
+        entity.set_was_generated_by(prov.Activity("test:activity"))
+        memory = ConjunctiveGraph()
+        memory.parse(data=prov.serialize(format="nquads"), format="nquads")
+        self.assertEqual(set(memory.triples((None, None, None))), set(prov.ds.triples((None, None, None))))
+
+    def test_remove_graph(self):
+        bundle = prov.bundle(id="test:bundle")
+        prov.Entity(id="test:entity-in-bundle", bundle=bundle)
+        prov.ds.remove_graph(bundle)
+        self.assertEqual(len(prov.ds), 0)
+    def test_in_memory_without_configuration(self):
+        session = prov.ProvSession(store="SQLite")
+        with session:
+            prov.Entity("test:entity").set_label("example entity")
+        self.assertEqual(len(session.ds), 2)
+
+    def test_missing_database(self):
+        missing = os.path.join(self.directory, "missing.db")
+        self.assertRaises(ValueError, prov.ProvSession, "SQLite", missing, False)
+
+    def test_rollback_forgets_graphs(self):
+        prov.commit()
+        prov.Entity("test:entity", bundle=prov.bundle("test:b1"))
+        prov.rollback()
+        prov.Entity("test:entity", bundle=prov.bundle("test:b2"))
+        contexts = set(c for (_, _, _, c) in prov.ds.quads((None, None, None)))
+        self.assertEqual(contexts, set([URIRef("http://tw.rpi.edu/ns/test#b2")]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from rdflib import Literal
+
+from kleio import prov, wal
+
+
+class TestWriteAheadLog(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "prov.wal")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_groups(self):
+        for policy in wal.POLICIES:
+            log = wal.WriteAheadLog(self.path + policy, fsync=policy, interval=0)
+            log.append(b"a\nb\n")
+            log.append(b"c\n")
+            log.close()
+            log = wal.WriteAheadLog(self.path + policy, fsync=policy)
+            self.assertEqual(log.read(), [[b"a", b"b"], [b"c"]])
+            log.close()
+
+    def test_torn_group_is_dropped(self):
+        log = wal.WriteAheadLog(self.path)
+        log.append(b"a\n")
+        log.close()
+        with open(self.path, "ab") as stream:
+            stream.write(b"b\nc")
+        log = wal.WriteAheadLog(self.path)
+        self.assertEqual(log.read(), [[b"a"]])
+        self.assertEqual(log.size, len(b"a\n" + wal.COMMIT))
+        log.append(b"d\n")
+        self.assertEqual(log.read(), [[b"a"], [b"d"]])
+        log.close()
+
+    def test_concurrent_appends(self):
+        log = wal.WriteAheadLog(self.path, fsync="always")
+
+        def append(i):
+            for j in range(50):
+                log.append(b"%d %d\n" % (i, j))
+
+        threads = [threading.Thread(target=append, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        groups = log.read()
+        log.close()
+        self.assertEqual(sorted(line for lines in groups for line in lines),
+                         sorted(b"%d %d" % (i, j) for i in range(4) for j in range(50)))
+
+    def test_bad_policy(self):
+        self.assertRaises(ValueError, wal.WriteAheadLog, self.path, "sometimes")
+
+
+class TestSessionWal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "prov.wal")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self, session):
+        with session:
+            session.ns("test", "http://tw.rpi.edu/ns/test#")
+            bundle = prov.bundle("test:bundle")
+            entity = prov.Entity("test:entity", bundle=bundle)
+            entity.set(prov.RDFS.comment, Literal("first comment"))
+            entity.set(prov.RDFS.comment, Literal("second comment"))
+            entity.set_was_generated_by(prov.Activity("test:activity"))
+            with prov.batch():
+                activity = prov.Activity("test:activity")
+                activity.set_used(prov.Entity())
+                activity.add(prov.PROV.value, Literal(42))
+            prov.Entity("test:removed", bundle=prov.bundle("test:cleared"))
+            prov.clear_graph(prov.bundle("test:cleared"))
+
+    def reopen(self, **options):
+        session = prov.ProvSession()
+        session.open_wal(self.path, **options)
+        return session
+
+    def test_replay(self):
+        session = self.reopen()
+        self.record(session)
+        session.close_wal()
+        replica = self.reopen()
+        self.assertEqual(set(replica.ds.quads((None, None, None))), set(session.ds.quads((None, None, None))))
+        self.assertEqual(list(replica.ds.objects(predicate=prov.RDFS.comment)), [Literal("second comment")])
+        replica.close_wal()
+
+    def test_unlogged_after_close(self):
+        session = self.reopen()
+        session.close_wal()
+        with session:
+            prov.Entity("http://tw.rpi.edu/ns/test#entity")
+        replica = self.reopen()
+        self.assertEqual(len(replica.ds), 0)
+        replica.close_wal()
+
+    def test_compaction(self):
+        session = self.reopen(fsync="always", compact_size=512)
+        self.record(session)
+        self.assertTrue(os.path.exists(self.path + ".snapshot"))
+        self.assertLess(os.path.getsize(self.path), 1024)
+        with session:
+            prov.Entity("http://tw.rpi.edu/ns/test#late")
+        session.close_wal()
+        replica = self.reopen()
+        self.assertEqual(set(replica.ds.quads((None, None, None))), set(session.ds.quads((None, None, None))))
+        replica.close_wal()
+
+    def test_replay_is_idempotent(self):
+        session = self.reopen()
+        self.record(session)
+        session.close_wal()
+        # a crash between writing the snapshot and emptying the log replays the log on top of the snapshot
+        session.save_snapshot(self.path + ".snapshot")
+        replica = self.reopen()
+        self.assertEqual(set(replica.ds.quads((None, None, None))), set(session.ds.quads((None, None, None))))
+        replica.close_wal()
+
+    def test_thread_safe(self):
+        session = self.reopen()
+        session.set_thread_safe(True, buffer_size=10)
+
+        def record(i):
+            with session:
+                for j in range(25):
+                    prov.Entity("http://tw.rpi.edu/ns/test#entity-%d-%d" % (i, j))
+
+        threads = [threading.Thread(target=record, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        session.close_wal()
+        replica = self.reopen()
+        self.assertEqual(set(replica.ds.quads((None, None, None))), set(session.ds.quads((None, None, None))))
+        self.assertEqual(len(replica.ds), 100)
+        replica.close_wal()
+
+    def test_open_twice(self):
+        session = self.reopen()
+        self.assertRaises(ValueError, session.open_wal, self.path)
+        session.close_wal()
+        self.assertRaises(ValueError, session.compact_wal)
+
+
+if __name__ == '__main__':
+    unittest.main()